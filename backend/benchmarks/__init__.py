@@ -0,0 +1,5 @@
+"""
+Benchmark and load-test tooling for the FactsAura backend.
+
+Run from the backend directory, e.g. ``python -m benchmarks.run_benchmarks``.
+"""
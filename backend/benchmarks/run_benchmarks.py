@@ -0,0 +1,381 @@
+"""
+Benchmark suite for the service layer and the HTTP API.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.run_benchmarks --posts-per-incident 500 --output bench_results.json
+    python -m benchmarks.run_benchmarks --backend postgres   # uses DATABASE_URL
+    python -m benchmarks.run_benchmarks --compare previous.json
+
+Results are written as JSON (one latency summary per benchmark) so runs can
+be diffed over time.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from benchmarks.stub_prisma import StubPrisma
+from benchmarks.synthetic import generate_dataset, mutate, to_scanner_post
+
+# The API scenarios measure the service, not the per-client rate limits
+# (POST /api/analyze would mostly get 429 at the default analyze rate).
+# Run with ADMISSION_ENABLED=true to benchmark the limiter itself.
+os.environ.setdefault("ADMISSION_ENABLED", "false")
+
+
+def summarize(samples_ms: List[float]) -> Dict[str, Any]:
+    """
+    Reduces raw latency samples (milliseconds) to percentiles.
+    """
+    if not samples_ms:
+        return {"count": 0}
+    ordered = sorted(samples_ms)
+
+    def pct(p: float) -> float:
+        index = min(len(ordered) - 1, max(0, int(round(p / 100.0 * len(ordered))) - 1))
+        return round(ordered[index], 4)
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered), 4),
+        "p50_ms": pct(50),
+        "p90_ms": pct(90),
+        "p99_ms": pct(99),
+        "max_ms": round(ordered[-1], 4),
+    }
+
+
+async def time_calls(fn: Callable[[Any], Awaitable[Any]], inputs: Iterable[Any]) -> List[float]:
+    samples = []
+    for item in inputs:
+        start = time.perf_counter()
+        await fn(item)
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return samples
+
+
+def _parse_time(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _db_rows(dataset: Dict[str, List[Dict[str, Any]]]):
+    incidents = [
+        {k: inc[k] for k in ("id", "title", "severity", "location", "status")}
+        for inc in dataset["incidents"]
+    ]
+    posts = [
+        {
+            "id": p["id"],
+            "content": p["content"],
+            "author": p["author"],
+            "incidentId": p["incidentId"],
+            "parentId": p["parentId"],
+            "timestamp": _parse_time(p["timestamp"]),
+            "mutationScore": p["mutationScore"],
+            "mutationType": p["mutationType"],
+        }
+        for p in dataset["posts"]
+    ]
+    return incidents, posts
+
+
+class Backend:
+    """
+    Hands out database clients for the chosen backend and loads/cleans data.
+    """
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.store: Dict[str, Any] = {}
+
+    def client(self):
+        if self.kind == "stub":
+            return StubPrisma(self.store)
+        from prisma import Prisma
+        return Prisma()
+
+    async def load(self, dataset, chunk_size: int = 1000):
+        db = self.client()
+        await db.connect()
+        incidents, posts = _db_rows(dataset)
+        await db.incident.create_many(data=incidents, skip_duplicates=True)
+        for i in range(0, len(posts), chunk_size):
+            await db.post.create_many(data=posts[i:i + chunk_size], skip_duplicates=True)
+        await db.disconnect()
+
+    async def cleanup(self, incident_ids: List[str]):
+        db = self.client()
+        await db.connect()
+        post_ids = [p.id for p in await db.post.find_many(where={"incidentId": {"in": incident_ids}})]
+        await db.comment.delete_many(where={"postId": {"in": post_ids}})
+        await db.post.delete_many(where={"incidentId": {"in": incident_ids}})
+        await db.incident.delete_many(where={"id": {"in": incident_ids}})
+        await db.disconnect()
+
+    def install_into_routes(self):
+        """
+        Points the route-level service singletons at this backend's clients.
+        """
+        if self.kind != "stub":
+            return
+        from routes import analysis, demo_routes, incident_routes, post_routes
+        from services.analysis_service import AnalysisService
+        from services.demo_service import DemoService
+        from services.incident_service import IncidentService
+        from services.post_service import PostService
+        post_routes._service = PostService(self.client())
+        incident_routes._service = IncidentService(self.client())
+        demo_routes._service = DemoService(self.client())
+        analysis._service = AnalysisService(self.client())
+
+
+class _NullWebSocket:
+    """
+    WebSocket stand-in that serializes like the real one but discards output.
+    """
+
+    def __init__(self):
+        self.sent = 0
+
+    async def send_json(self, message: dict):
+        json.dumps(message, default=str)
+        self.sent += 1
+
+    async def send_text(self, data: str):
+        self.sent += 1
+
+    async def send_bytes(self, data: bytes):
+        self.sent += 1
+
+
+async def bench_services(backend: Backend, dataset, args, rng: random.Random) -> Dict[str, Any]:
+    from services.analysis_service import AnalysisService
+    from services.post_service import PostService
+
+    results: Dict[str, Any] = {}
+    posts = dataset["posts"]
+    by_id = {p["id"]: p for p in posts}
+    children = [p for p in posts if p["parentId"]]
+    iterations = args.iterations
+
+    # find_similar_posts: lightly mutated copies of existing posts
+    db = backend.client()
+    await db.connect()
+    analysis_service = AnalysisService(db)
+    queries = [mutate(rng, rng.choice(posts)["content"], 2) for _ in range(iterations)]
+    results["find_similar_posts"] = summarize(
+        await time_calls(analysis_service.find_similar_posts, queries)
+    )
+
+    # calculate_mutation_score over real parent/child pairs
+    post_service = PostService(backend.client())
+    pairs = [(by_id[c["parentId"]]["content"], c["content"]) for c in rng.sample(children, min(len(children), iterations * 10))]
+    samples = []
+    for parent_content, child_content in pairs:
+        start = time.perf_counter()
+        post_service.calculate_mutation_score(parent_content, child_content)
+        samples.append((time.perf_counter() - start) * 1000.0)
+    results["calculate_mutation_score"] = summarize(samples)
+
+    results["get_post_diff"] = summarize(await time_calls(
+        post_service.get_post_diff,
+        [rng.choice(children)["id"] for _ in range(iterations)],
+    ))
+    results["get_posts_by_incident"] = summarize(await time_calls(
+        post_service.get_posts_by_incident,
+        [inc["id"] for inc in dataset["incidents"]] * max(1, iterations // len(dataset["incidents"])),
+    ))
+    results["vote_on_post"] = summarize(await time_calls(
+        lambda post_id: post_service.vote_on_post(post_id, rng.random() < 0.5),
+        [rng.choice(posts)["id"] for _ in range(iterations)],
+    ))
+    await db.disconnect()
+    return results
+
+
+async def bench_broadcast(args) -> Dict[str, Any]:
+    from services.connection_manager import ConnectionManager
+
+    results = {}
+    message = {
+        "type": "new_post",
+        "payload": {"id": "x", "content": "y" * 280, "author": "bench", "mutationScore": 12.5},
+    }
+    for subscribers in args.subscribers:
+        cm = ConnectionManager()
+        cm.active_connections["bench"] = [_NullWebSocket() for _ in range(subscribers)]
+        samples = await time_calls(lambda _: cm.broadcast(message, "bench"), range(args.iterations))
+        results[f"broadcast_{subscribers}_subscribers"] = summarize(samples)
+    return results
+
+
+async def bench_agent_pipeline(backend: Backend, args) -> Dict[str, Any]:
+    from services.agent_manager import AgentManager
+
+    dataset = generate_dataset(
+        incidents=1,
+        posts_per_incident=args.iterations,
+        content_words=args.content_words,
+        seed=args.seed + 1,
+        id_prefix=f"{args.id_prefix}_agent",
+    )
+    manager = AgentManager()
+    manager.setup(client_factory=backend.client)
+    manager.scanner.incidents = dataset["incidents"]
+
+    samples = []
+    # The agents log with print(); keep benchmark output readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        for post in dataset["posts"]:
+            start = time.perf_counter()
+            await manager.run_pipeline(to_scanner_post(post))
+            samples.append((time.perf_counter() - start) * 1000.0)
+
+    if backend.kind != "stub":
+        await backend.cleanup([inc["id"] for inc in dataset["incidents"]])
+    return {"agent_pipeline": summarize(samples)}
+
+
+async def bench_asgi(backend: Backend, dataset, args, rng: random.Random) -> Dict[str, Any]:
+    import httpx
+    from main import app
+
+    backend.install_into_routes()
+    posts = dataset["posts"]
+    children = [p for p in posts if p["parentId"]]
+    incident_ids = [inc["id"] for inc in dataset["incidents"]]
+
+    scenarios: Dict[str, Callable[[], Any]] = {
+        "GET /api/incidents/": lambda: ("GET", "/api/incidents/", None),
+        "GET /api/incidents/{id}/posts": lambda: ("GET", f"/api/incidents/{rng.choice(incident_ids)}/posts", None),
+        "GET /api/posts/{id}/diff": lambda: ("GET", f"/api/posts/{rng.choice(children)['id']}/diff", None),
+        "POST /api/posts/{id}/vote": lambda: ("POST", f"/api/posts/{rng.choice(posts)['id']}/vote", {"isCredible": True}),
+        "GET /api/demo/state": lambda: ("GET", "/api/demo/state", None),
+        "POST /api/analyze": lambda: ("POST", "/api/analyze", {"content": mutate(rng, rng.choice(posts)["content"], 2)}),
+    }
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def one(make_request, samples, errors):
+            method, url, body = make_request()
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.request(method, url, json=body)
+                samples.append((time.perf_counter() - start) * 1000.0)
+                if response.status_code >= 400:
+                    errors.append(response.status_code)
+
+        for name, make_request in scenarios.items():
+            samples: List[float] = []
+            errors: List[int] = []
+            await asyncio.gather(*(one(make_request, samples, errors) for _ in range(args.requests)))
+            summary = summarize(samples)
+            summary["errors"] = len(errors)
+            results[name] = summary
+    return results
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+def compare(current: Dict[str, Any], previous: Dict[str, Any]):
+    """
+    Prints p50/p99 ratios against a previous results file.
+    """
+    print(f"{'benchmark':55} {'p50 ratio':>10} {'p99 ratio':>10}")
+    for section, benchmarks in current["results"].items():
+        for name, summary in benchmarks.items():
+            old = previous.get("results", {}).get(section, {}).get(name)
+            if not old or not old.get("p50_ms") or not old.get("p99_ms"):
+                continue
+            p50 = summary["p50_ms"] / old["p50_ms"]
+            p99 = summary["p99_ms"] / old["p99_ms"]
+            print(f"{section + ':' + name:55} {p50:>10.2f} {p99:>10.2f}")
+
+
+async def main(args) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    dataset = generate_dataset(
+        incidents=args.incidents,
+        posts_per_incident=args.posts_per_incident,
+        content_words=args.content_words,
+        recency_bias=args.recency_bias,
+        seed=args.seed,
+        id_prefix=args.id_prefix,
+    )
+    backend = Backend(args.backend)
+    await backend.load(dataset)
+
+    report: Dict[str, Any] = {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "params": vars(args),
+        },
+        "results": {},
+    }
+    try:
+        sections = set(args.only or ["services", "broadcast", "agents", "asgi"])
+        if "services" in sections:
+            report["results"]["services"] = await bench_services(backend, dataset, args, rng)
+        if "broadcast" in sections:
+            report["results"]["broadcast"] = await bench_broadcast(args)
+        if "agents" in sections:
+            report["results"]["agents"] = await bench_agent_pipeline(backend, args)
+        if "asgi" in sections:
+            report["results"]["asgi"] = await bench_asgi(backend, dataset, args, rng)
+    finally:
+        if backend.kind != "stub":
+            await backend.cleanup([inc["id"] for inc in dataset["incidents"]])
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="FactsAura backend benchmarks")
+    parser.add_argument("--backend", choices=["stub", "postgres"], default="stub",
+                        help="stub = in-memory Prisma stand-in, postgres = real DB via DATABASE_URL")
+    parser.add_argument("--incidents", type=int, default=4)
+    parser.add_argument("--posts-per-incident", type=int, default=250)
+    parser.add_argument("--content-words", type=int, default=30)
+    parser.add_argument("--recency-bias", type=float, default=0.7)
+    parser.add_argument("--iterations", type=int, default=50, help="calls per service benchmark")
+    parser.add_argument("--requests", type=int, default=200, help="requests per ASGI scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--subscribers", type=int, nargs="+", default=[1, 100, 1000])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--id-prefix", default="bench")
+    parser.add_argument("--only", nargs="+", choices=["services", "broadcast", "agents", "asgi"])
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="previous results file to compare against")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    results = asyncio.run(main(arguments))
+    with open(arguments.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, default=str)
+    print(f"Wrote benchmark results to {arguments.output}")
+    if arguments.compare:
+        with open(arguments.compare, encoding="utf-8") as f:
+            compare(results, json.load(f))
@@ -0,0 +1,163 @@
+"""
+Full-text search benchmark against a real Postgres (DATABASE_URL).
+
+Seeds a large synthetic corpus server-side (INSERT ... SELECT over
+generate_series, so a million rows take seconds rather than hours), then
+times SearchService.search for queries of different selectivity, with and
+without filters, and for a second page reached through the cursor.
+
+    python -m benchmarks.search_benchmark --posts 1000000 --budget-ms 100
+    python -m benchmarks.search_benchmark --posts 1000000 --keep   # reuse the corpus next run
+
+Word frequencies follow a power law over a vocabulary of common words plus
+synthetic rare terms, so the queries range from a handful of hits to a
+large fraction of the table.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Any, Dict, List
+
+from benchmarks.run_benchmarks import summarize
+from benchmarks.synthetic import VOCABULARY
+
+INCIDENTS = 8
+PREFIX = "searchbench"
+
+# (label, query, filtered by incident, sort)
+QUERIES = [
+    ("rare_term", "term4711", False, "rank"),
+    ("rare_phrase", '"term120 term121"', False, "rank"),
+    ("mid_term", "term42", False, "rank"),
+    ("mid_and", "term7 hospital", False, "rank"),
+    ("mid_term_incident", "term42", True, "rank"),
+    ("exclusion", "bridge -closed", False, "recent"),
+    ("common_term_recent", "flood", False, "recent"),
+    ("common_or_recent", "vaccine or evacuate", False, "recent"),
+    ("common_term_incident_recent", "flood", True, "recent"),
+    # Ranking every match of a very common word; reported for reference
+    ("common_term_rank", "flood", False, "rank"),
+]
+
+
+def _vocabulary(rare_terms: int) -> List[str]:
+    return list(VOCABULARY) + [f"term{i}" for i in range(rare_terms)]
+
+
+async def seed(db, posts: int, words_per_post: int, rare_terms: int, batch: int):
+    existing = await db.query_raw(
+        'SELECT COUNT(*)::int AS "count" FROM "Post" WHERE "incidentId" LIKE $1', f"{PREFIX}_%"
+    )
+    if existing and existing[0]["count"] >= posts:
+        print(f"Reusing {existing[0]['count']} seeded posts")
+        return
+
+    await cleanup(db)
+    for i in range(INCIDENTS):
+        await db.execute_raw(
+            'INSERT INTO "Incident" ("id", "title", "severity", "location", "status", "createdAt", "updatedAt") '
+            "VALUES ($1, $2, 'WARNING', 'Benchmark', 'ACTIVE', now(), now())",
+            f"{PREFIX}_{i}", f"Search benchmark {i}",
+        )
+
+    words = _vocabulary(rare_terms)
+    # Vocabulary entries are generated identifiers, safe to inline as a literal
+    array = "ARRAY[" + ",".join(f"'{w}'" for w in words) + "]"
+    started = time.perf_counter()
+    for offset in range(0, posts, batch):
+        count = min(batch, posts - offset)
+        await db.execute_raw(
+            f"""
+            INSERT INTO "Post" ("id", "content", "author", "incidentId", "timestamp", "createdAt", "updatedAt")
+            SELECT '{PREFIX}_p' || g,
+                   array_to_string(ARRAY(
+                       SELECT ({array})[1 + floor(power(random(), 3) * {len(words)})::int]
+                       FROM generate_series(1, {words_per_post}) WHERE g > 0
+                   ), ' '),
+                   'bench_author_' || (g % 5000),
+                   '{PREFIX}_' || (g % {INCIDENTS}),
+                   now() - (g || ' seconds')::interval,
+                   now(), now()
+            FROM generate_series({offset + 1}, {offset + count}) AS g
+            """
+        )
+        print(f"  seeded {offset + count}/{posts} posts ({time.perf_counter() - started:.1f}s)")
+    await db.execute_raw('ANALYZE "Post"')
+
+
+async def cleanup(db):
+    await db.execute_raw(
+        'DELETE FROM "Comment" WHERE "postId" IN (SELECT "id" FROM "Post" WHERE "incidentId" LIKE $1)', f"{PREFIX}_%"
+    )
+    await db.execute_raw('DELETE FROM "Post" WHERE "incidentId" LIKE $1', f"{PREFIX}_%")
+    await db.execute_raw('DELETE FROM "Incident" WHERE "id" LIKE $1', f"{PREFIX}_%")
+
+
+async def run(args) -> Dict[str, Any]:
+    from prisma import Prisma
+    from services.search_service import SearchService
+
+    db = Prisma()
+    await db.connect()
+    service = SearchService(db)
+    results: Dict[str, Any] = {}
+    try:
+        await seed(db, args.posts, args.words, args.rare_terms, args.batch)
+        for label, query, filtered, sort in QUERIES:
+            incident_id = f"{PREFIX}_3" if filtered else None
+            first_page, second_page, hits = [], [], 0
+            for _ in range(args.iterations):
+                start = time.perf_counter()
+                page = await service.search(query, incident_id=incident_id, kind="posts", sort=sort, limit=args.limit)
+                first_page.append((time.perf_counter() - start) * 1000.0)
+                hits = len(page["results"])
+                if page["nextCursor"]:
+                    start = time.perf_counter()
+                    await service.search(query, incident_id=incident_id, kind="posts", sort=sort,
+                                         limit=args.limit, cursor=page["nextCursor"])
+                    second_page.append((time.perf_counter() - start) * 1000.0)
+            results[label] = {
+                "query": query,
+                "sort": sort,
+                "page_hits": hits,
+                "first_page": summarize(first_page),
+                "second_page": summarize(second_page),
+            }
+            print(f"{label:30} p50 {results[label]['first_page']['p50_ms']:>9} ms  "
+                  f"p99 {results[label]['first_page']['p99_ms']:>9} ms")
+    finally:
+        if not args.keep:
+            await cleanup(db)
+        await db.disconnect()
+    return {"params": vars(args), "results": results}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Full-text search benchmark (Postgres)")
+    parser.add_argument("--posts", type=int, default=1_000_000)
+    parser.add_argument("--words", type=int, default=25, help="words per synthetic post")
+    parser.add_argument("--rare-terms", type=int, default=20000, help="synthetic low-frequency vocabulary size")
+    parser.add_argument("--batch", type=int, default=50000)
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--budget-ms", type=float, default=100.0, help="fail if any first-page p99 exceeds this")
+    parser.add_argument("--keep", action="store_true", help="leave the corpus in place for the next run")
+    parser.add_argument("--output", default="bench_results_search.json")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    report = asyncio.run(run(arguments))
+    with open(arguments.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote search benchmark results to {arguments.output}")
+    over = [
+        label for label, r in report["results"].items()
+        if label != "common_term_rank" and r["first_page"].get("p99_ms", 0) > arguments.budget_ms
+    ]
+    if over:
+        print(f"Over the {arguments.budget_ms} ms budget: {', '.join(over)}")
+        sys.exit(1)
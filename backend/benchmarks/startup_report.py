@@ -0,0 +1,118 @@
+"""
+Cold-start import report for the API.
+
+Runs ``python -X importtime -c "import main"`` in a fresh interpreter and
+reports the total import time plus the slowest modules, as JSON.
+
+    python -m benchmarks.startup_report --top 25 --output startup_report.json
+    python -m benchmarks.startup_report --budget-ms 800          # exit 1 if slower
+    python -m benchmarks.startup_report --compare startup_report.json
+
+Modules listed in ``LAZY_MODULES`` must not be imported at startup at all;
+the report flags them and exits non-zero when they show up.
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from typing import Any, Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Heavy dependencies that must only load on first use
+LAZY_MODULES = ("google.generativeai", "Levenshtein", "difflib", "prisma.client")
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def measure(target: str = "main", runs: int = 3) -> Dict[str, Any]:
+    """
+    Imports ``target`` in ``runs`` fresh interpreters and keeps the fastest run.
+    """
+    best = None
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+            cwd=BACKEND_DIR,
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"import {target} failed:\n{proc.stderr[-2000:]}")
+
+        modules: List[Dict[str, Any]] = []
+        for line in proc.stderr.splitlines():
+            match = _LINE.match(line)
+            if match:
+                self_us, cumulative_us, indent, name = match.groups()
+                modules.append({
+                    "module": name,
+                    "self_ms": int(self_us) / 1000.0,
+                    "cumulative_ms": int(cumulative_us) / 1000.0,
+                    "depth": len(indent) // 2,
+                })
+        root = next((m for m in modules if m["module"] == target), None)
+        total = root["cumulative_ms"] if root else sum(m["self_ms"] for m in modules)
+        run = {"total_ms": round(total, 3), "modules": modules}
+        if best is None or run["total_ms"] < best["total_ms"]:
+            best = run
+    return best
+
+
+def build_report(target: str, runs: int, top: int) -> Dict[str, Any]:
+    run = measure(target, runs)
+    modules = run["modules"]
+    names = {m["module"] for m in modules}
+    by_package: Dict[str, float] = {}
+    for m in modules:
+        package = m["module"].split(".")[0]
+        by_package[package] = by_package.get(package, 0.0) + m["self_ms"]
+    return {
+        "target": target,
+        "total_ms": run["total_ms"],
+        "module_count": len(modules),
+        "eager_heavy_modules": [name for name in LAZY_MODULES if name in names],
+        "slowest_cumulative": sorted(modules, key=lambda m: m["cumulative_ms"], reverse=True)[:top],
+        "slowest_self": sorted(modules, key=lambda m: m["self_ms"], reverse=True)[:top],
+        "by_package_ms": dict(sorted(
+            ((k, round(v, 3)) for k, v in by_package.items()), key=lambda kv: kv[1], reverse=True
+        )[:top]),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Per-module import time report")
+    parser.add_argument("--target", default="main")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--budget-ms", type=float, help="fail if total import time exceeds this")
+    parser.add_argument("--compare", help="previous report to compare totals against")
+    args = parser.parse_args(argv)
+
+    report = build_report(args.target, args.runs, args.top)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    status = 0
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            previous = json.load(f)
+        print(f"total: {previous['total_ms']:.1f} ms -> {report['total_ms']:.1f} ms", file=sys.stderr)
+    if report["eager_heavy_modules"]:
+        print(f"Heavy modules imported at startup: {report['eager_heavy_modules']}", file=sys.stderr)
+        status = 1
+    if args.budget_ms is not None and report["total_ms"] > args.budget_ms:
+        print(f"Import time {report['total_ms']:.1f} ms exceeds budget {args.budget_ms:.1f} ms", file=sys.stderr)
+        status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
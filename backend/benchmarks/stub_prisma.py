@@ -0,0 +1,297 @@
+"""
+In-memory stand-in for the generated Prisma client.
+
+Implements the subset of the query API the services use (find_many,
+find_unique, find_first, create, create_many, update, upsert, delete_many,
+count) so the benchmarks can time service code without a running Postgres.
+"""
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+
+MODEL_DEFAULTS: Dict[str, Dict[str, Any]] = {
+    "incident": {
+        "archivedAt": None,
+    },
+    "post": {
+        "parentId": None,
+        "attributionConfidence": None,
+        "mutationScore": None,
+        "mutationType": None,
+        "credibleVotes": 0,
+        "totalVotes": 0,
+        "commentCount": 0,
+        "contentHash": None,
+    },
+    "comment": {},
+    "demostate": {
+        "speed": 1.0,
+        "isPaused": False,
+        "currentPosition": 0,
+    },
+    "author": {
+        "postCount": 0,
+        "classifiedCount": 0,
+        "fabricationCount": 0,
+        "credibleVotes": 0,
+        "totalVotes": 0,
+    },
+    "analysisjob": {
+        "result": None,
+        "status": "QUEUED",
+        "priority": 0,
+        "attempts": 0,
+        "maxAttempts": 5,
+        "lockedUntil": None,
+        "lockedBy": None,
+        "lastError": None,
+        "incidentId": None,
+    },
+    "ingestshard": {
+        "position": 0,
+        "lockedBy": None,
+        "lockedUntil": None,
+    },
+}
+
+# Models whose @id isn't "id"
+PRIMARY_KEYS: Dict[str, str] = {"author": "name"}
+
+
+class StubRecord:
+    """
+    Attribute-access record mimicking a Prisma model instance.
+    """
+
+    def __init__(self, **fields: Any):
+        self.__dict__.update(fields)
+
+    def dict(self) -> Dict[str, Any]:
+        return dict(self.__dict__)
+
+    def model_dump(self, **kwargs: Any) -> Dict[str, Any]:
+        return self.dict()
+
+    def __repr__(self) -> str:
+        return f"StubRecord({self.__dict__!r})"
+
+
+def _matches(record: StubRecord, where: Optional[Dict[str, Any]]) -> bool:
+    if not where:
+        return True
+    for key, condition in where.items():
+        if key == "AND":
+            if not all(_matches(record, c) for c in condition):
+                return False
+            continue
+        if key == "OR":
+            if not any(_matches(record, c) for c in condition):
+                return False
+            continue
+        if key == "NOT":
+            if _matches(record, condition):
+                return False
+            continue
+
+        value = getattr(record, key, None)
+        if isinstance(condition, dict):
+            for op, operand in condition.items():
+                if op == "equals" and value != operand:
+                    return False
+                if op == "not" and value == operand:
+                    return False
+                if op == "in" and value not in operand:
+                    return False
+                if op == "not_in" and value in operand:
+                    return False
+                if op in ("gt", "gte", "lt", "lte"):
+                    if value is None:
+                        return False
+                    if op == "gt" and not value > operand:
+                        return False
+                    if op == "gte" and not value >= operand:
+                        return False
+                    if op == "lt" and not value < operand:
+                        return False
+                    if op == "lte" and not value <= operand:
+                        return False
+                if op == "contains" and (value is None or operand not in value):
+                    return False
+        elif value != condition:
+            return False
+    return True
+
+
+def _apply_update(record: StubRecord, data: Dict[str, Any]):
+    for key, value in data.items():
+        if isinstance(value, dict):
+            current = getattr(record, key, 0) or 0
+            if "increment" in value:
+                value = current + value["increment"]
+            elif "decrement" in value:
+                value = current - value["decrement"]
+            elif "set" in value:
+                value = value["set"]
+        setattr(record, key, value)
+    record.updatedAt = datetime.now(timezone.utc)
+
+
+class StubActions:
+    """
+    Query actions for one model, backed by a dict keyed on primary key.
+    """
+
+    def __init__(self, name: str, rows: Dict[str, StubRecord], primary_key: str = "id"):
+        self.name = name
+        self.rows = rows
+        self.primary_key = primary_key
+
+    def _select(self, where=None, order=None) -> List[StubRecord]:
+        rows = [r for r in self.rows.values() if _matches(r, where)]
+        if order:
+            orders = order if isinstance(order, list) else [order]
+            for clause in reversed(orders):
+                for field, direction in clause.items():
+                    rows.sort(
+                        key=lambda r: (getattr(r, field, None) is None, getattr(r, field, None)),
+                        reverse=direction == "desc",
+                    )
+        return rows
+
+    def _new_record(self, data: Dict[str, Any]) -> StubRecord:
+        now = datetime.now(timezone.utc)
+        fields = dict(MODEL_DEFAULTS.get(self.name, {}))
+        fields.update({k: v for k, v in data.items() if v is not None})
+        fields.setdefault(self.primary_key, str(uuid.uuid4()))
+        for key in ("createdAt", "updatedAt"):
+            fields.setdefault(key, now)
+        if self.name == "post":
+            fields.setdefault("timestamp", now)
+        return StubRecord(**fields)
+
+    async def find_many(self, where=None, order=None, take=None, skip=None, cursor=None, **kwargs):
+        rows = self._select(where, order)
+        if cursor:
+            key, value = next(iter(cursor.items()))
+            for index, row in enumerate(rows):
+                if getattr(row, key, None) == value:
+                    rows = rows[index:]
+                    break
+            else:
+                rows = []
+        if skip:
+            rows = rows[skip:]
+        if take is not None:
+            rows = rows[:take]
+        return rows
+
+    async def find_first(self, where=None, order=None, **kwargs):
+        rows = self._select(where, order)
+        return rows[0] if rows else None
+
+    async def find_unique(self, where, **kwargs):
+        key, value = next(iter(where.items()))
+        if key == self.primary_key:
+            return self.rows.get(value)
+        return await self.find_first(where=where)
+
+    async def count(self, where=None, **kwargs) -> int:
+        if not where:
+            return len(self.rows)
+        return len(self._select(where))
+
+    async def create(self, data: Dict[str, Any], **kwargs):
+        record = self._new_record(data)
+        key = getattr(record, self.primary_key)
+        if key in self.rows:
+            raise ValueError(f"Unique constraint failed on {self.name}.{self.primary_key}: {key}")
+        self.rows[key] = record
+        return record
+
+    async def create_many(self, data: List[Dict[str, Any]], skip_duplicates: bool = False, **kwargs) -> int:
+        created = 0
+        for item in data:
+            key = item.get(self.primary_key)
+            if key is not None and key in self.rows:
+                if skip_duplicates:
+                    continue
+                raise ValueError(f"Unique constraint failed on {self.name}.{self.primary_key}: {key}")
+            await self.create(item)
+            created += 1
+        return created
+
+    async def update(self, where, data: Dict[str, Any], **kwargs):
+        record = await self.find_unique(where=where)
+        if record is None:
+            return None
+        _apply_update(record, data)
+        return record
+
+    async def update_many(self, where, data: Dict[str, Any], **kwargs) -> int:
+        rows = self._select(where)
+        for record in rows:
+            _apply_update(record, data)
+        return len(rows)
+
+    async def upsert(self, where, data: Dict[str, Any], **kwargs):
+        record = await self.find_unique(where=where)
+        if record is None:
+            return await self.create(data["create"])
+        _apply_update(record, data.get("update", {}))
+        return record
+
+    async def delete(self, where, **kwargs):
+        record = await self.find_unique(where=where)
+        if record is not None:
+            del self.rows[getattr(record, self.primary_key)]
+        return record
+
+    async def delete_many(self, where=None, **kwargs) -> int:
+        doomed = [getattr(r, self.primary_key) for r in self._select(where)]
+        for key in doomed:
+            del self.rows[key]
+        return len(doomed)
+
+
+class StubPrisma:
+    """
+    Drop-in replacement for ``prisma.Prisma`` sharing one in-memory store.
+
+    Several services each construct their own client; pass the same
+    ``store`` to every instance so they all see the same rows.
+    """
+
+    def __init__(self, store: Optional[Dict[str, Dict[str, StubRecord]]] = None):
+        self.store = store if store is not None else {}
+        self._connected = False
+        for name in MODEL_DEFAULTS:
+            rows = self.store.setdefault(name, {})
+            setattr(self, name, StubActions(name, rows, PRIMARY_KEYS.get(name, "id")))
+
+    def is_connected(self) -> bool:
+        return self._connected
+
+    async def connect(self):
+        self._connected = True
+
+    async def disconnect(self):
+        self._connected = False
+
+    def tx(self):
+        return _StubTransaction(self)
+
+
+class _StubTransaction:
+    """
+    No-op transaction context; the stub applies writes immediately.
+    """
+
+    def __init__(self, client: StubPrisma):
+        self.client = client
+
+    async def __aenter__(self) -> StubPrisma:
+        return self.client
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
@@ -0,0 +1,118 @@
+"""
+Synthetic incident and mutation-tree generator for benchmarks.
+
+Trees are grown the way rumours spread: each new post picks a parent
+(biased towards recent posts) and copies its text with a few word-level
+edits, so mutation scores and similarity lookups see realistic inputs.
+"""
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+SEVERITIES = ["CRITICAL", "WARNING"]
+STATUSES = ["ACTIVE", "MONITORING", "RESOLVED"]
+VOCABULARY = (
+    "flood water rising bridge closed hospital emergency rumour vaccine "
+    "officials confirm deny reports breaking urgent share before deleted "
+    "government hiding truth thousands dead army deployed power outage "
+    "schools shut trains cancelled evacuate now citizens warned police "
+    "video shows fake claim verified source local news update"
+).split()
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(VOCABULARY) for _ in range(words)).capitalize() + "."
+
+
+def mutate(rng: random.Random, text: str, edits: int) -> str:
+    """
+    Applies ``edits`` random word replacements, insertions or deletions.
+    """
+    words = text.split()
+    for _ in range(edits):
+        op = rng.random()
+        position = rng.randrange(len(words) + 1)
+        if op < 0.5 and words:
+            words[min(position, len(words) - 1)] = rng.choice(VOCABULARY)
+        elif op < 0.8 or not words:
+            words.insert(position, rng.choice(VOCABULARY).upper())
+        else:
+            del words[min(position, len(words) - 1)]
+    return " ".join(words) if words else rng.choice(VOCABULARY)
+
+
+def mutation_type_for(edits: int) -> str:
+    if edits <= 1:
+        return "FACTUAL"
+    if edits <= 4:
+        return "EMOTIONAL"
+    return "FABRICATION"
+
+
+def generate_dataset(
+    incidents: int = 4,
+    posts_per_incident: int = 250,
+    content_words: int = 30,
+    recency_bias: float = 0.7,
+    seed: int = 42,
+    id_prefix: str = "bench",
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Builds incidents and posts in the same shape as ``simulation_data.json``.
+
+    ``recency_bias`` is the chance a new post replies to one of the ten most
+    recent posts instead of any earlier post, which controls tree depth.
+    """
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    dataset: Dict[str, List[Dict[str, Any]]] = {"incidents": [], "posts": []}
+
+    for i in range(incidents):
+        incident_id = f"{id_prefix}_inc_{i:04d}"
+        dataset["incidents"].append({
+            "id": incident_id,
+            "title": f"Synthetic incident {i}",
+            "severity": SEVERITIES[i % len(SEVERITIES)],
+            "location": "Benchmark City",
+            "status": STATUSES[i % len(STATUSES)],
+        })
+
+        tree: List[Dict[str, Any]] = []
+        for j in range(posts_per_incident):
+            timestamp = start + timedelta(days=i, minutes=j)
+            if not tree:
+                parent = None
+                content = _sentence(rng, content_words)
+                edits = 0
+            else:
+                if rng.random() < recency_bias:
+                    parent = rng.choice(tree[-10:])
+                else:
+                    parent = rng.choice(tree)
+                edits = rng.choice([0, 1, 1, 2, 3, 5, 8])
+                content = mutate(rng, parent["content"], edits)
+
+            post = {
+                "id": f"{incident_id}_p{j:06d}",
+                "content": content,
+                "author": f"user_{rng.randrange(max(1, posts_per_incident // 4))}",
+                "timestamp": timestamp.isoformat().replace("+00:00", "Z"),
+                "incidentId": incident_id,
+                "parentId": parent["id"] if parent else None,
+                "mutationScore": None,
+                "mutationType": mutation_type_for(edits) if parent else None,
+            }
+            tree.append(post)
+            dataset["posts"].append(post)
+
+    return dataset
+
+
+def to_scanner_post(post: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Adds the snake_case keys ``VerifierAgent.verify`` reads.
+    """
+    scanner_post = dict(post)
+    scanner_post["mutation_score"] = post["mutationScore"]
+    scanner_post["mutation_type"] = post["mutationType"]
+    return scanner_post
@@ -0,0 +1,381 @@
+"""
+WebSocket scale test for /api/ws/incidents/{incident_id}.
+
+Opens thousands of concurrent subscribers spread across incidents, drives
+``POST /api/posts`` and ``POST /api/posts/{id}/vote`` at a fixed open-loop
+rate, and measures for every broadcast:
+
+  - end-to-end delivery latency (write issued -> frame received), p50..max,
+    per message type;
+  - dropped messages (frames each subscriber of the incident should have
+    received but didn't within the drain period);
+  - memory per connection (tracemalloc, in-process mode only);
+  - connect time and achieved write rate.
+
+By default everything runs in this process against the ASGI app: writes go
+through httpx's ASGI transport and each subscriber is a WebSocket ASGI
+session on the real route, backed by the in-memory Prisma stub. No server,
+ports or database are needed, so the numbers isolate the app's own
+connection bookkeeping, serialization and broadcast loop. With ``--url`` the
+same load is sent to a running server over real sockets (needs the
+``websockets`` package).
+
+    python -m benchmarks.ws_load --clients 5000 --incidents 20 --rate 50 --duration 20
+    python -m benchmarks.ws_load --url http://localhost:8000 --clients 2000
+    python -m benchmarks.ws_load --compare previous_ws.json
+
+Results are written as JSON (``--output``) for regression tracking.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from benchmarks.run_benchmarks import _git_revision, summarize
+
+# Subscribers measure themselves; rate limiting would only distort the load
+os.environ.setdefault("ADMISSION_ENABLED", "false")
+
+
+class AsgiWebSocket:
+    """
+    One in-process WebSocket client: drives an ASGI websocket session on
+    ``app`` and records (receive time, text) for every frame sent to it.
+    """
+    def __init__(self, app, path: str, client_port: int):
+        self.app = app
+        self.path = path
+        self.client_port = client_port
+        self.frames: List[Tuple[float, str]] = []
+        self._inbox: asyncio.Queue = asyncio.Queue()
+        self._accepted: Optional[asyncio.Future] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def connect(self):
+        scope = {
+            "type": "websocket",
+            "asgi": {"version": "3.0"},
+            "scheme": "ws",
+            "path": self.path,
+            "raw_path": self.path.encode(),
+            "root_path": "",
+            "query_string": b"",
+            "headers": [(b"host", b"bench")],
+            "server": ("bench", 80),
+            "client": ("127.0.0.1", self.client_port),
+            "subprotocols": [],
+        }
+        self._accepted = asyncio.get_running_loop().create_future()
+        self._inbox.put_nowait({"type": "websocket.connect"})
+        self._task = asyncio.create_task(self.app(scope, self._receive, self._send))
+        await self._accepted
+
+    async def _receive(self):
+        return await self._inbox.get()
+
+    async def _send(self, message):
+        kind = message["type"]
+        if kind == "websocket.accept":
+            self._accepted.set_result(True)
+        elif kind == "websocket.send":
+            # The manager serializes once per broadcast, so every subscriber
+            # holds a reference to the same string
+            self.frames.append((time.perf_counter(), message.get("text") or message.get("bytes")))
+        elif kind == "websocket.close" and not self._accepted.done():
+            self._accepted.set_exception(ConnectionError(f"Rejected: {message}"))
+
+    async def close(self):
+        self._inbox.put_nowait({"type": "websocket.disconnect", "code": 1000})
+        if self._task:
+            await self._task
+
+
+class SocketWebSocket:
+    """
+    The same client over a real socket (``--url`` mode).
+    """
+    def __init__(self, url: str):
+        self.url = url
+        self.frames: List[Tuple[float, str]] = []
+        self._connection = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def connect(self):
+        import websockets
+        self._connection = await websockets.connect(self.url, max_queue=None)
+        self._task = asyncio.create_task(self._read())
+
+    async def _read(self):
+        try:
+            async for text in self._connection:
+                self.frames.append((time.perf_counter(), text))
+        except Exception:
+            pass
+
+    async def close(self):
+        await self._connection.close()
+        self._task.cancel()
+
+
+async def _connect_all(make_client: Callable[[int], Any], count: int, batch: int) -> Tuple[List[Any], List[float]]:
+    clients, samples = [], []
+
+    async def one(i):
+        client = make_client(i)
+        start = time.perf_counter()
+        await client.connect()
+        samples.append((time.perf_counter() - start) * 1000.0)
+        return client
+
+    for offset in range(0, count, batch):
+        clients.extend(await asyncio.gather(*(one(i) for i in range(offset, min(count, offset + batch)))))
+    return clients, samples
+
+
+class Driver:
+    """
+    Issues writes at ``rate``/s regardless of how fast they complete (open
+    loop), remembering when each broadcast's cause was sent.
+    """
+    def __init__(self, http, incident_ids: List[str], rng: random.Random, vote_ratio: float, max_in_flight: int):
+        self.http = http
+        self.incident_ids = incident_ids
+        self.rng = rng
+        self.vote_ratio = vote_ratio
+        self.semaphore = asyncio.Semaphore(max_in_flight)
+        # broadcast key -> (send time, incident)
+        self.sent: Dict[Tuple[str, Any], Tuple[float, str]] = {}
+        self.posts: List[Tuple[str, str]] = []
+        self.votes: Dict[str, int] = defaultdict(int)
+        self.voting: set = set()
+        self.errors: List[str] = []
+        self.skipped = 0
+        self.seq = 0
+
+    async def _create_post(self):
+        self.seq += 1
+        incident_id = self.rng.choice(self.incident_ids)
+        content = f"ws-load {self.seq}: water level rising near sector {self.rng.randint(1, 99)}"
+        self.sent[("new_post", content)] = (time.perf_counter(), incident_id)
+        response = await self.http.post("/api/posts", json={"content": content, "author": f"load_{self.seq % 97}",
+                                                            "incidentId": incident_id})
+        if response.status_code >= 400:
+            self.sent.pop(("new_post", content))
+            self.errors.append(f"POST /api/posts {response.status_code}")
+            return
+        self.posts.append((response.json()["id"], incident_id))
+
+    async def _vote(self):
+        # One vote in flight per post keeps (post, totalVotes) unambiguous
+        idle = [p for p in self.rng.sample(self.posts, min(8, len(self.posts))) if p[0] not in self.voting]
+        if not idle:
+            return await self._create_post()
+        post_id, incident_id = idle[0]
+        self.voting.add(post_id)
+        self.votes[post_id] += 1
+        self.sent[("post_voted", (post_id, self.votes[post_id]))] = (time.perf_counter(), incident_id)
+        try:
+            response = await self.http.post(f"/api/posts/{post_id}/vote", json={"isCredible": self.rng.random() < 0.5})
+            if response.status_code >= 400:
+                self.sent.pop(("post_voted", (post_id, self.votes[post_id])))
+                self.votes[post_id] -= 1
+                self.errors.append(f"POST /api/posts/{{id}}/vote {response.status_code}")
+        finally:
+            self.voting.discard(post_id)
+
+    async def _write(self):
+        try:
+            if self.posts and self.rng.random() < self.vote_ratio:
+                await self._vote()
+            else:
+                await self._create_post()
+        except Exception as e:
+            self.errors.append(type(e).__name__)
+        finally:
+            self.semaphore.release()
+
+    async def run(self, rate: float, duration: float) -> float:
+        tasks = []
+        start = time.perf_counter()
+        interval = 1.0 / rate
+        next_at = start
+        while time.perf_counter() - start < duration:
+            if self.semaphore.locked():
+                # Server can't keep up with the offered rate
+                self.skipped += 1
+            else:
+                await self.semaphore.acquire()
+                tasks.append(asyncio.create_task(self._write()))
+            next_at += interval
+            await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+        await asyncio.gather(*tasks)
+        return time.perf_counter() - start
+
+
+def _frame_key(text: str, parsed: Dict[int, Any]) -> Optional[Tuple[str, Any]]:
+    message = parsed.get(id(text))
+    if message is None:
+        message = parsed[id(text)] = json.loads(text)
+    payload = message.get("payload") or {}
+    if message.get("type") == "new_post":
+        return ("new_post", payload.get("content"))
+    if message.get("type") == "post_voted":
+        return ("post_voted", (payload.get("id"), payload.get("totalVotes")))
+    return None
+
+
+def analyze(clients: List[Any], client_incidents: List[str], driver: Driver) -> Dict[str, Any]:
+    subscribers: Dict[str, int] = defaultdict(int)
+    for incident_id in client_incidents:
+        subscribers[incident_id] += 1
+
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    parsed: Dict[int, Any] = {}
+    received = 0
+    for client in clients:
+        for received_at, text in client.frames:
+            key = _frame_key(text, parsed)
+            if key is None or key not in driver.sent:
+                continue
+            received += 1
+            latencies[key[0]].append((received_at - driver.sent[key][0]) * 1000.0)
+
+    expected = sum(subscribers[incident_id] for _, incident_id in driver.sent.values())
+    return {
+        "expected_deliveries": expected,
+        "received_deliveries": received,
+        "dropped": expected - received,
+        "drop_rate": round((expected - received) / expected, 6) if expected else 0.0,
+        "latency": {kind: summarize(samples) for kind, samples in latencies.items()},
+        "latency_all": summarize([s for samples in latencies.values() for s in samples]),
+    }
+
+
+async def run(args) -> Dict[str, Any]:
+    import httpx
+
+    rng = random.Random(args.seed)
+    in_process = args.url is None
+    if in_process:
+        from benchmarks.run_benchmarks import Backend
+        from main import app
+
+        Backend("stub").install_into_routes()
+        http = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+    else:
+        http = httpx.AsyncClient(base_url=args.url, timeout=60)
+
+    async with http:
+        incident_ids = []
+        for i in range(args.incidents):
+            response = await http.post("/api/incidents/", json={
+                "title": f"WebSocket load {i}", "severity": "WARNING", "location": "Benchmark", "status": "ACTIVE",
+            })
+            response.raise_for_status()
+            incident_ids.append(response.json()["id"])
+
+        client_incidents = [incident_ids[i % len(incident_ids)] for i in range(args.clients)]
+        if in_process:
+            def make_client(i):
+                return AsgiWebSocket(app, f"/api/ws/incidents/{client_incidents[i]}", 10000 + i)
+        else:
+            ws_base = args.url.replace("http", "ws", 1).rstrip("/")
+
+            def make_client(i):
+                return SocketWebSocket(f"{ws_base}/api/ws/incidents/{client_incidents[i]}")
+
+        if in_process:
+            tracemalloc.start()
+            before = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        clients, connect_samples = await _connect_all(make_client, args.clients, args.connect_batch)
+        connect_seconds = time.perf_counter() - started
+        memory_per_connection = None
+        if in_process:
+            memory_per_connection = round((tracemalloc.get_traced_memory()[0] - before) / max(1, args.clients))
+            tracemalloc.stop()
+        print(f"Connected {len(clients)} subscribers over {len(incident_ids)} incidents in {connect_seconds:.2f}s")
+
+        driver = Driver(http, incident_ids, rng, args.vote_ratio, args.max_in_flight)
+        elapsed = await driver.run(args.rate, args.duration)
+        await asyncio.sleep(args.drain)
+        writes = len(driver.sent)
+        print(f"Sent {writes} broadcasts in {elapsed:.1f}s ({writes / elapsed:.1f}/s), draining {args.drain}s")
+
+        delivery = analyze(clients, client_incidents, driver)
+        await asyncio.gather(*(client.close() for client in clients), return_exceptions=True)
+
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "git_revision": _git_revision(),
+        "mode": "in-process" if in_process else "socket",
+        "params": vars(args),
+        "connections": {
+            "clients": len(clients),
+            "incidents": len(incident_ids),
+            "connect_seconds": round(connect_seconds, 3),
+            "connect": summarize(connect_samples),
+            "memory_per_connection_bytes": memory_per_connection,
+        },
+        "load": {
+            "writes": writes,
+            "achieved_rate": round(writes / elapsed, 2),
+            "skipped_for_backpressure": driver.skipped,
+            "errors": len(driver.errors),
+            "error_kinds": sorted(set(driver.errors)),
+        },
+        "delivery": delivery,
+    }
+
+
+def compare(current: Dict[str, Any], previous: Dict[str, Any]):
+    rows = [
+        ("latency p50 ms", lambda r: r["delivery"]["latency_all"].get("p50_ms")),
+        ("latency p99 ms", lambda r: r["delivery"]["latency_all"].get("p99_ms")),
+        ("dropped", lambda r: r["delivery"]["dropped"]),
+        ("bytes/connection", lambda r: r["connections"]["memory_per_connection_bytes"]),
+        ("achieved rate", lambda r: r["load"]["achieved_rate"]),
+    ]
+    print(f"{'metric':20} {'previous':>12} {'current':>12}")
+    for label, get in rows:
+        print(f"{label:20} {str(get(previous)):>12} {str(get(current)):>12}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="WebSocket broadcast scale test")
+    parser.add_argument("--url", default=None, help="running server to test over real sockets (default: in-process ASGI)")
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--incidents", type=int, default=10)
+    parser.add_argument("--rate", type=float, default=20.0, help="writes per second (open loop)")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of load")
+    parser.add_argument("--vote-ratio", type=float, default=0.5, help="share of writes that are votes")
+    parser.add_argument("--max-in-flight", type=int, default=64, help="writes outstanding before skipping ticks")
+    parser.add_argument("--connect-batch", type=int, default=500)
+    parser.add_argument("--drain", type=float, default=2.0, help="seconds to wait for stragglers")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default="bench_results_ws.json")
+    parser.add_argument("--compare", default=None, help="previous results file to diff against")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    report = asyncio.run(run(arguments))
+    with open(arguments.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    latency = report["delivery"]["latency_all"]
+    print(f"Delivery p50 {latency.get('p50_ms')} ms, p99 {latency.get('p99_ms')} ms, "
+          f"dropped {report['delivery']['dropped']}/{report['delivery']['expected_deliveries']}, "
+          f"{report['connections']['memory_per_connection_bytes']} bytes/connection")
+    print(f"Wrote WebSocket load results to {arguments.output}")
+    if arguments.compare:
+        with open(arguments.compare, encoding="utf-8") as f:
+            compare(report, json.load(f))
+    if report["delivery"]["dropped"]:
+        sys.exit(1)
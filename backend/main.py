@@ -1,9 +1,79 @@
+import time
+_import_started = time.perf_counter()
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from routes import incident_routes, agent_routes, post_routes, websocket_routes, analysis, demo_routes
+from routes import incident_routes, agent_routes, post_routes, websocket_routes, analysis, demo_routes, metrics_routes, admin_routes, search_routes, export_routes, author_routes, dashboard_routes
+from services import executor, job_queue, startup
 from services.agent_manager import agent_manager
+from services.compression import CompressionMiddleware
+from services.metrics import MetricsMiddleware
+from services.profiler import block_monitor
+from services.serialization import ORJSONResponse
+
+startup.mark("import_start", _import_started)
+startup.mark("import_end")
+startup.record_phase("import", "import_start", "import_end")
+
+# Route-level services, built and connected in the lifespan rather than at import
+SERVICE_FACTORIES = [
+    incident_routes.get_service,
+    post_routes.get_service,
+    demo_routes.get_service,
+    analysis.get_service,
+    search_routes.get_service,
+    export_routes.get_service,
+    author_routes.get_service,
+    job_queue.get_queue,
+]
 
-app = FastAPI(title="FactsAura API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    startup.mark("lifespan_start")
+    executor.start()
+    services = [factory() for factory in SERVICE_FACTORIES]
+    for service in services:
+        await service.connect()
+
+    # Start the autonomous agent loop
+    await agent_manager.start()
+    # Background analysis workers; with JOB_WORKERS=0 they run in separate
+    # processes (python -m services.job_queue) and results are relayed here
+    if job_queue.JOB_WORKERS > 0:
+        await job_queue.get_pool().start()
+    else:
+        await job_queue.get_relay().start()
+    # Pushes dashboard snapshots to /api/ws/dashboard subscribers
+    await dashboard_routes.get_publisher().start()
+    # Optionally watch for event loop stalls from boot
+    if os.getenv("LOOP_BLOCK_THRESHOLD_MS"):
+        await block_monitor.start(float(os.getenv("LOOP_BLOCK_THRESHOLD_MS")))
+    # Optionally move resolved incidents to cold storage in the background
+    archive_task = None
+    if os.getenv("ARCHIVE_INTERVAL_MINUTES"):
+        from services import archive
+        archive_task = asyncio.create_task(archive.run_periodically(float(os.getenv("ARCHIVE_INTERVAL_MINUTES")) * 60))
+    startup.mark("lifespan_end")
+    startup.record_phase("lifespan", "lifespan_start", "lifespan_end")
+
+    yield
+
+    if archive_task:
+        archive_task.cancel()
+        await asyncio.gather(archive_task, return_exceptions=True)
+    await dashboard_routes.get_publisher().stop()
+    await job_queue.get_pool().stop()
+    await job_queue.get_relay().stop()
+    await agent_manager.stop()
+    await block_monitor.stop()
+    for service in services:
+        await service.disconnect()
+    executor.shutdown()
+
+app = FastAPI(title="FactsAura API", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # Configure CORS
 app.add_middleware(
@@ -14,6 +84,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip/brotli for large responses such as incident post listings
+app.add_middleware(CompressionMiddleware, minimum_size=int(os.getenv("COMPRESSION_MIN_SIZE", "1024")))
+
+# Per-route latency metrics and request tracing
+app.add_middleware(MetricsMiddleware)
+
 # Include Routers
 app.include_router(incident_routes.router)
 app.include_router(agent_routes.router)
@@ -21,15 +97,12 @@ app.include_router(post_routes.router)
 app.include_router(websocket_routes.router)
 app.include_router(analysis.router)
 app.include_router(demo_routes.router)
-
-@app.on_event("startup")
-async def startup_event():
-    # Start the autonomous agent loop
-    await agent_manager.start()
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    await agent_manager.stop()
+app.include_router(metrics_routes.router)
+app.include_router(admin_routes.router)
+app.include_router(search_routes.router)
+app.include_router(export_routes.router)
+app.include_router(author_routes.router)
+app.include_router(dashboard_routes.router)
 
 @app.get("/")
 async def root():
@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+from typing import Optional
+
+class AuthorCredibility(BaseModel):
+    name: str
+    postCount: int
+    # Share of classified posts that were FABRICATION
+    fabricationRate: Optional[float] = None
+    # Raw share of credible votes
+    voteCredibility: Optional[float] = None
+    totalVotes: int
+    # Bayesian-smoothed credibility in [0, 1]
+    score: float
@@ -26,6 +26,7 @@ class IncidentResponse(IncidentBase):
     id: str
     createdAt: datetime
     updatedAt: datetime
+    archivedAt: Optional[datetime] = None
 
     class Config:
         from_attributes = True
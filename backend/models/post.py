@@ -0,0 +1,43 @@
+from pydantic import BaseModel
+from typing import List, Optional, Tuple
+from datetime import datetime
+
+class PostResponse(BaseModel):
+    id: str
+    content: str
+    author: str
+    timestamp: datetime
+    incidentId: str
+    parentId: Optional[str] = None
+    # Similarity of an automatically attributed parent; None when given or absent
+    attributionConfidence: Optional[float] = None
+    mutationScore: Optional[float] = None
+    mutationType: Optional[str] = None
+    credibleVotes: int = 0
+    totalVotes: int = 0
+    commentCount: int = 0
+    contentHash: Optional[str] = None
+    createdAt: datetime
+    updatedAt: datetime
+
+    class Config:
+        from_attributes = True
+
+class CommentResponse(BaseModel):
+    id: str
+    postId: str
+    author: str
+    content: str
+    createdAt: datetime
+
+    class Config:
+        from_attributes = True
+
+class PostDiffResponse(BaseModel):
+    post: PostResponse
+    parent: Optional[PostResponse] = None
+    # difflib opcodes: (tag, i1, i2, j1, j2)
+    diff: List[Tuple[str, int, int, int, int]]
+
+    class Config:
+        from_attributes = True
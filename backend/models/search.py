@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+from typing import List, Literal, Optional
+from datetime import datetime
+
+class SearchHit(BaseModel):
+    kind: Literal["post", "comment"]
+    id: str
+    postId: str
+    incidentId: str
+    author: str
+    content: str
+    createdAt: datetime
+    rank: float
+    # HTML-escaped content excerpt with matches wrapped in <mark></mark>
+    highlight: str
+
+class SearchResponse(BaseModel):
+    results: List[SearchHit]
+    nextCursor: Optional[str] = None
@@ -0,0 +1,7 @@
+-- AlterTable
+ALTER TABLE "Post" ADD COLUMN     "commentCount" INTEGER NOT NULL DEFAULT 0;
+
+-- Backfill counts for existing comments
+UPDATE "Post" SET "commentCount" = c."count"
+FROM (SELECT "postId", COUNT(*)::INTEGER AS "count" FROM "Comment" GROUP BY "postId") AS c
+WHERE c."postId" = "Post"."id";
@@ -0,0 +1,25 @@
+-- Generated tsvector columns keep the search index in step with content
+-- without application code or triggers.
+
+-- AlterTable
+ALTER TABLE "Post" ADD COLUMN "searchVector" tsvector
+    GENERATED ALWAYS AS (to_tsvector('english', coalesce("content", ''))) STORED;
+
+-- AlterTable
+ALTER TABLE "Comment" ADD COLUMN "searchVector" tsvector
+    GENERATED ALWAYS AS (to_tsvector('english', coalesce("content", ''))) STORED;
+
+-- CreateIndex
+CREATE INDEX "Post_searchVector_idx" ON "Post" USING GIN ("searchVector");
+
+-- CreateIndex
+CREATE INDEX "Comment_searchVector_idx" ON "Comment" USING GIN ("searchVector");
+
+-- CreateIndex (newest-first search and incident post listings)
+CREATE INDEX "Post_incidentId_timestamp_idx" ON "Post"("incidentId", "timestamp");
+
+-- CreateIndex
+CREATE INDEX "Post_timestamp_idx" ON "Post"("timestamp");
+
+-- CreateIndex (comment search joins back to the post for its incident)
+CREATE INDEX "Comment_postId_idx" ON "Comment"("postId");
@@ -0,0 +1,5 @@
+-- AlterTable
+ALTER TABLE "Incident" ADD COLUMN     "archivedAt" TIMESTAMP(3);
+
+-- CreateIndex
+CREATE INDEX "Incident_status_archivedAt_idx" ON "Incident"("status", "archivedAt");
@@ -0,0 +1,5 @@
+-- AlterTable
+ALTER TABLE "Post" ADD COLUMN     "contentHash" TEXT;
+
+-- CreateIndex
+CREATE INDEX "Post_contentHash_idx" ON "Post"("contentHash");
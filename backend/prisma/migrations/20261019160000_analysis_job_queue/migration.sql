@@ -0,0 +1,26 @@
+-- CreateTable
+CREATE TABLE "AnalysisJob" (
+    "id" TEXT NOT NULL,
+    "kind" TEXT NOT NULL,
+    "payload" TEXT NOT NULL,
+    "result" TEXT,
+    "status" TEXT NOT NULL DEFAULT 'QUEUED',
+    "priority" INTEGER NOT NULL DEFAULT 0,
+    "attempts" INTEGER NOT NULL DEFAULT 0,
+    "maxAttempts" INTEGER NOT NULL DEFAULT 5,
+    "runAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "lockedUntil" TIMESTAMP(3),
+    "lockedBy" TEXT,
+    "lastError" TEXT,
+    "incidentId" TEXT,
+    "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "updatedAt" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "AnalysisJob_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateIndex
+CREATE INDEX "AnalysisJob_status_priority_runAt_idx" ON "AnalysisJob"("status", "priority", "runAt");
+
+-- CreateIndex
+CREATE INDEX "AnalysisJob_status_lockedUntil_idx" ON "AnalysisJob"("status", "lockedUntil");
@@ -0,0 +1,28 @@
+-- CreateTable
+-- score mirrors services/credibility.py (prior weight 10, credibility prior
+-- 0.5, fabrication prior 0.1); change both together.
+CREATE TABLE "Author" (
+    "name" TEXT NOT NULL,
+    "postCount" INTEGER NOT NULL DEFAULT 0,
+    "classifiedCount" INTEGER NOT NULL DEFAULT 0,
+    "fabricationCount" INTEGER NOT NULL DEFAULT 0,
+    "credibleVotes" INTEGER NOT NULL DEFAULT 0,
+    "totalVotes" INTEGER NOT NULL DEFAULT 0,
+    "score" DOUBLE PRECISION GENERATED ALWAYS AS (
+        ("credibleVotes" + 5.0) / ("totalVotes" + 10.0)
+        * (1.0 - ("fabricationCount" + 1.0) / ("classifiedCount" + 10.0))
+    ) STORED,
+    "updatedAt" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "Author_pkey" PRIMARY KEY ("name")
+);
+
+-- CreateIndex
+CREATE INDEX "Author_score_idx" ON "Author"("score");
+
+-- Backfill from existing posts
+INSERT INTO "Author" ("name", "postCount", "classifiedCount", "fabricationCount", "credibleVotes", "totalVotes", "updatedAt")
+SELECT "author", COUNT(*), COUNT("mutationType"),
+       COUNT(*) FILTER (WHERE "mutationType" = 'FABRICATION'),
+       COALESCE(SUM("credibleVotes"), 0), COALESCE(SUM("totalVotes"), 0), now()
+FROM "Post" GROUP BY "author";
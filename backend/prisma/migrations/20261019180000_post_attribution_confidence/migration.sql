@@ -0,0 +1,2 @@
+-- AlterTable
+ALTER TABLE "Post" ADD COLUMN     "attributionConfidence" DOUBLE PRECISION;
@@ -0,0 +1,10 @@
+-- CreateTable
+CREATE TABLE "IngestShard" (
+    "id" TEXT NOT NULL,
+    "position" INTEGER NOT NULL DEFAULT 0,
+    "lockedBy" TEXT,
+    "lockedUntil" TIMESTAMP(3),
+    "updatedAt" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "IngestShard_pkey" PRIMARY KEY ("id")
+);
@@ -1,3 +1,3 @@
-from . import incident_routes, agent_routes, post_routes, websocket_routes, analysis, demo_routes
+from . import incident_routes, agent_routes, post_routes, websocket_routes, analysis, demo_routes, metrics_routes, admin_routes, search_routes, export_routes, author_routes, dashboard_routes
 
-__all__ = ["incident_routes", "agent_routes", "post_routes", "websocket_routes", "analysis", "demo_routes"]
+__all__ = ["incident_routes", "agent_routes", "post_routes", "websocket_routes", "analysis", "demo_routes", "metrics_routes", "admin_routes", "search_routes", "export_routes", "author_routes", "dashboard_routes"]
@@ -0,0 +1,121 @@
+import hmac
+import os
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+from services.archive import ArchiveService
+from services.profiler import ProfilerBusyError, block_monitor, profiler
+
+def require_admin(x_admin_token: str | None = Header(None)):
+    """
+    Guards admin endpoints with the ADMIN_TOKEN shared secret.
+    Admin endpoints are disabled entirely when ADMIN_TOKEN is unset.
+    """
+    expected = os.getenv("ADMIN_TOKEN")
+    if not expected:
+        raise HTTPException(status_code=403, detail="Admin API disabled (ADMIN_TOKEN not set)")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, expected):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+router = APIRouter(prefix="/api/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+class BlockMonitorStart(BaseModel):
+    threshold_ms: float = 100.0
+
+@router.post("/profile", response_class=PlainTextResponse)
+async def profile_event_loop(
+    seconds: float = Query(10.0, gt=0),
+    interval_ms: float = Query(5.0, gt=0),
+    include_idle: bool = Query(False),
+    focus: str | None = Query(None, description="Keep only stacks containing this substring, e.g. get_post_diff"),
+):
+    """
+    Samples the event loop thread and returns collapsed stacks for flame graphs.
+    """
+    try:
+        result = await profiler.profile(seconds, interval_ms, include_idle, focus)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return PlainTextResponse(
+        result["collapsed"],
+        headers={
+            "Content-Disposition": 'attachment; filename="profile.folded"',
+            "X-Profile-Samples": str(result["samples"]),
+            "X-Profile-Idle-Samples": str(result["idle_samples"]),
+        },
+    )
+
+@router.get("/loop-blocks")
+async def get_loop_blocks(limit: int = Query(50, ge=1, le=100)):
+    """
+    Event loop stalls recorded by the block monitor, newest first.
+    """
+    return block_monitor.report(limit)
+
+@router.post("/loop-blocks/start")
+async def start_loop_block_monitor(data: BlockMonitorStart):
+    if data.threshold_ms <= 0:
+        raise HTTPException(status_code=400, detail="threshold_ms must be positive")
+    await block_monitor.start(data.threshold_ms)
+    return {"status": "started", "threshold_ms": data.threshold_ms}
+
+@router.post("/loop-blocks/stop")
+async def stop_loop_block_monitor():
+    await block_monitor.stop()
+    return {"status": "stopped"}
+
+_archive_service: ArchiveService | None = None
+
+def get_archive_service() -> ArchiveService:
+    global _archive_service
+    if _archive_service is None:
+        _archive_service = ArchiveService()
+    return _archive_service
+
+@router.get("/archive")
+async def get_archive_status(service: ArchiveService = Depends(get_archive_service)):
+    """
+    Archived incidents with row counts and file sizes.
+    """
+    return service.status()
+
+@router.post("/archive")
+async def archive_resolved_incidents(
+    older_than_days: float = Query(7.0, ge=0),
+    service: ArchiveService = Depends(get_archive_service),
+):
+    """
+    Moves posts and comments of resolved incidents untouched for
+    ``older_than_days`` into compressed cold storage.
+    """
+    return {"archived": await service.archive_resolved(older_than_days)}
+
+@router.post("/archive/{incident_id}")
+async def archive_incident(incident_id: str, service: ArchiveService = Depends(get_archive_service)):
+    entry = await service.archive_incident(incident_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Incident not found")
+    return entry
+
+@router.post("/archive/{incident_id}/restore")
+async def restore_incident(incident_id: str, service: ArchiveService = Depends(get_archive_service)):
+    restored = await service.restore_incident(incident_id)
+    if restored is None:
+        raise HTTPException(status_code=404, detail="Incident is not archived")
+    return restored
+
+@router.post("/content-hash/backfill")
+async def backfill_content_hashes():
+    """
+    Computes contentHash for posts stored before deduplication existed.
+    """
+    from routes.post_routes import get_service
+    return {"updated": await get_service().backfill_content_hashes()}
+
+@router.post("/authors/rebuild")
+async def rebuild_authors():
+    """
+    Recomputes the Author aggregates from every post (backfill or repair).
+    """
+    from routes.author_routes import get_service
+    return {"authors": await get_service().rebuild()}
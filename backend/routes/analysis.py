@@ -1,18 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-from typing import List, Optional
-from prisma import Prisma
+from typing import Any, List, Literal, Optional
+from services import admission, job_queue
 from services.analysis_service import AnalysisService
 
 router = APIRouter()
 
 class AnalysisRequest(BaseModel):
     content: str
+    # Ties a queued analysis to an incident: sets its priority and also
+    # pushes the result on that incident's WebSocket channel
+    incidentId: Optional[str] = None
 
 class RelatedPost(BaseModel):
     id: str
     title: str
     similarity: float
+    author: Optional[str] = None
+    # Bayesian-smoothed source credibility (services/credibility.py)
+    authorCredibility: Optional[float] = None
 
 class TruthScorecard(BaseModel):
     match_percentage: int
@@ -20,23 +27,63 @@ class TruthScorecard(BaseModel):
     related_posts: List[RelatedPost]
     analysis: str
 
-async def get_db():
-    db = Prisma()
-    await db.connect()
-    try:
-        yield db
-    finally:
-        await db.disconnect()
-
-@router.post("/api/analyze", response_model=TruthScorecard)
-async def analyze_content(request: AnalysisRequest):
-    db = Prisma()
-    await db.connect()
+class AnalysisJobResponse(BaseModel):
+    jobId: str
+    status: str
+    priority: int
+    attempts: int
+    incidentId: Optional[str] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
+
+_service: Optional[AnalysisService] = None
+
+def get_service() -> AnalysisService:
+    """
+    Lazily builds the shared AnalysisService and its DB client.
+    One shared client is reused across requests instead of one per call.
+    """
+    global _service
+    if _service is None:
+        from prisma import Prisma
+        from services.metrics import instrument_prisma
+        _service = AnalysisService(instrument_prisma(Prisma()))
+    return _service
+
+def _job_response(job) -> AnalysisJobResponse:
+    return AnalysisJobResponse(
+        jobId=job.id,
+        status=job.status,
+        priority=job.priority,
+        attempts=job.attempts,
+        incidentId=job.incidentId,
+        result=job_queue.decode(job.result),
+        error=job.lastError,
+    )
+
+@router.post("/api/analyze", response_model=TruthScorecard, dependencies=[Depends(admission.limit("analyze"))])
+async def analyze_content(
+    request: AnalysisRequest,
+    mode: Literal["sync", "async"] = Query("sync", description="async queues the analysis and returns a job id"),
+    service: AnalysisService = Depends(get_service),
+):
+    if mode == "async":
+        job = await job_queue.get_queue().enqueue(
+            "analyze", {"content": request.content, "incidentId": request.incidentId}, incident_id=request.incidentId
+        )
+        body = _job_response(job).model_dump()
+        body["websocket"] = f"/api/ws/jobs/{job.id}"
+        return JSONResponse(status_code=202, content=body)
     try:
-        service = AnalysisService(db)
-        result = await service.generate_truth_scorecard(request.content)
+        await service.connect()
+        result = await service.generate_truth_scorecard(request.content, request.incidentId)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        await db.disconnect()
+
+@router.get("/api/analyze/jobs/{job_id}", response_model=AnalysisJobResponse)
+async def get_analysis_job(job_id: str):
+    job = await job_queue.get_queue().get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_response(job)
@@ -0,0 +1,33 @@
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from models.author import AuthorCredibility
+from services.credibility import AuthorService
+
+router = APIRouter(prefix="/api/authors", tags=["authors"])
+_service: Optional[AuthorService] = None
+
+def get_service() -> AuthorService:
+    """
+    Lazily builds the shared AuthorService; the app lifespan connects it.
+    """
+    global _service
+    if _service is None:
+        _service = AuthorService()
+    return _service
+
+@router.get("/top", response_model=List[AuthorCredibility])
+async def top_authors(
+    k: int = Query(20, ge=1, le=500),
+    min_posts: int = Query(1, ge=1, description="Ignore authors with fewer posts"),
+    order: Literal["most", "least"] = Query("most", description="most or least credible first"),
+    service: AuthorService = Depends(get_service),
+):
+    return await service.top_authors(k, min_posts, ascending=order == "least")
+
+@router.get("/{name}", response_model=AuthorCredibility)
+async def get_author(name: str, service: AuthorService = Depends(get_service)):
+    author = await service.get_author(name)
+    if not author:
+        raise HTTPException(status_code=404, detail="Author not found")
+    return author
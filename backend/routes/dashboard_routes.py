@@ -0,0 +1,43 @@
+from fastapi import APIRouter, Depends, Query, Request, Response
+from typing import Optional
+from routes import demo_routes, incident_routes
+from services import http_cache
+from services.dashboard import Dashboard, DashboardPublisher, KEYS, version
+
+router = APIRouter(prefix="/api/dashboard", tags=["dashboard"])
+_dashboard: Optional[Dashboard] = None
+_publisher: Optional[DashboardPublisher] = None
+
+def get_dashboard() -> Dashboard:
+    """
+    Lazily builds the shared Dashboard on top of the demo and incident services.
+    """
+    global _dashboard
+    if _dashboard is None:
+        _dashboard = Dashboard(demo_routes.get_service(), incident_routes.get_service())
+    return _dashboard
+
+def get_publisher() -> DashboardPublisher:
+    global _publisher
+    if _publisher is None:
+        _publisher = DashboardPublisher(get_dashboard())
+    return _publisher
+
+@router.get("")
+async def get_dashboard_snapshot(
+    request: Request,
+    response: Response,
+    cursor: int = Query(0, ge=0, description="seq of the newest agent log already received"),
+    since: Optional[str] = Query(None, alias="version", description="version of the snapshot already held"),
+    dashboard: Dashboard = Depends(get_dashboard),
+):
+    """
+    Demo state, incidents and agent logs newer than ``cursor`` in one response.
+    """
+    # Versions only track this process's writes; see services.dashboard
+    if http_cache.HTTP_CACHE_ENABLED and since is not None and since == version():
+        return {"version": since, "unchanged": True, "cursor": dashboard.agents.log_seq}
+    cached = http_cache.not_modified(request, response, *KEYS)
+    if cached:
+        return cached
+    return await dashboard.snapshot(cursor)
@@ -1,20 +1,42 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from pydantic import BaseModel
+from typing import Optional
+from services import http_cache
+from services.agent_manager import agent_manager
 from services.demo_service import DemoService
 
 router = APIRouter(prefix="/api/demo", tags=["demo"])
-service = DemoService()
+_service: DemoService | None = None
+
+def get_service() -> DemoService:
+    """
+    Lazily builds the shared DemoService; the app lifespan connects it.
+    """
+    global _service
+    if _service is None:
+        _service = DemoService()
+    return _service
 
 class SpeedUpdate(BaseModel):
     speed: float
 
-@router.on_event("startup")
-async def startup():
-    await service.connect()
+class SeekRequest(BaseModel):
+    position: int
+
+class FastForwardRequest(BaseModel):
+    count: Optional[int] = None
+
+def get_replay():
+    if agent_manager.replay is None:
+        raise HTTPException(status_code=503, detail="Agent loop is not set up")
+    return agent_manager.replay
 
 @router.get("/state")
-async def get_demo_state():
+async def get_demo_state(request: Request, response: Response, service: DemoService = Depends(get_service)):
     """Get current demo state"""
+    cached = http_cache.not_modified(request, response, http_cache.DEMO)
+    if cached:
+        return cached
     try:
         state = await service.get_state()
         return state
@@ -22,7 +44,7 @@ async def get_demo_state():
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.patch("/speed")
-async def update_speed(data: SpeedUpdate):
+async def update_speed(data: SpeedUpdate, service: DemoService = Depends(get_service)):
     """Update demo playback speed"""
     try:
         if data.speed < 0.5 or data.speed > 5.0:
@@ -36,7 +58,7 @@ async def update_speed(data: SpeedUpdate):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/pause")
-async def pause_demo():
+async def pause_demo(service: DemoService = Depends(get_service)):
     """Pause the demo simulation"""
     try:
         await service.pause()
@@ -45,7 +67,7 @@ async def pause_demo():
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/resume")
-async def resume_demo():
+async def resume_demo(service: DemoService = Depends(get_service)):
     """Resume the demo simulation"""
     try:
         await service.resume()
@@ -54,10 +76,39 @@ async def resume_demo():
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/reset")
-async def reset_demo():
+async def reset_demo(service: DemoService = Depends(get_service)):
     """Reset demo - flush DB and re-seed with simulation data"""
     try:
         await service.reset()
         return {"message": "Demo reset successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/replay")
+async def get_replay_status():
+    """Replay cursor, virtual clock and available snapshots"""
+    return get_replay().status()
+
+@router.post("/seek")
+async def seek_demo(data: SeekRequest):
+    """Jump the replay to a position (posts emitted), restoring the nearest snapshot when going back"""
+    engine = get_replay()
+    if agent_manager.shards is not None:
+        raise HTTPException(status_code=409, detail="Seek is not available with sharded ingest (INGEST_SHARDS > 1)")
+    try:
+        return await engine.seek(agent_manager.run_pipeline, data.position)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/fast-forward")
+async def fast_forward_demo(data: FastForwardRequest):
+    """Ingest the next posts (all remaining by default) without pacing"""
+    engine = get_replay()
+    if agent_manager.shards is not None:
+        if data.count is not None:
+            raise HTTPException(status_code=400, detail="Sharded ingest fast-forwards every shard to the end; omit count")
+        return await agent_manager.shards.fast_forward()
+    try:
+        return await engine.fast_forward(agent_manager.run_pipeline, data.count)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
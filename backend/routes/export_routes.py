@@ -0,0 +1,41 @@
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from services import admission
+from services.export import FORMATS, ExportFormatUnavailable, ExportService
+
+router = APIRouter(prefix="/api/export", tags=["export"])
+_service: Optional[ExportService] = None
+
+def get_service() -> ExportService:
+    """
+    Lazily builds the shared ExportService; the app lifespan connects it.
+    """
+    global _service
+    if _service is None:
+        _service = ExportService()
+    return _service
+
+@router.get("/{table}", dependencies=[Depends(admission.limit("export"))])
+async def export_table(
+    table: Literal["posts", "edges", "votes", "comments"],
+    incidentId: List[str] = Query(..., description="Repeat to export several incidents"),
+    format: Literal["csv", "arrow", "parquet"] = "csv",
+    service: ExportService = Depends(get_service),
+):
+    """
+    Streams one table of the given incidents as CSV.gz, Arrow IPC or Parquet,
+    reading the database page by page.
+    """
+    try:
+        stream = service.stream(incidentId, table, format)
+    except ExportFormatUnavailable as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    media_type, extension = FORMATS[format]
+    filename = f"{incidentId[0] if len(incidentId) == 1 else 'incidents'}_{table}{extension}"
+    return StreamingResponse(
+        stream,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
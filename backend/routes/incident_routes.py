@@ -1,36 +1,82 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from typing import List, Optional
+from services import http_cache, narratives, velocity
 from services.incident_service import IncidentService
 from models.incident import IncidentCreate, IncidentUpdate, IncidentResponse
 
 router = APIRouter(prefix="/api/incidents", tags=["incidents"])
-service = IncidentService()
+_service: Optional[IncidentService] = None
 
-@router.on_event("startup")
-async def startup():
-    await service.connect()
-
-@router.on_event("shutdown")
-async def shutdown():
-    await service.disconnect()
+def get_service() -> IncidentService:
+    """
+    Lazily builds the shared IncidentService; the app lifespan connects it.
+    """
+    global _service
+    if _service is None:
+        _service = IncidentService()
+    return _service
 
 @router.get("/", response_model=List[IncidentResponse])
-async def get_incidents(severity: Optional[str] = Query(None)):
+async def get_incidents(request: Request, response: Response, severity: Optional[str] = Query(None), service: IncidentService = Depends(get_service)):
+    cached = http_cache.not_modified(request, response, http_cache.INCIDENTS)
+    if cached:
+        return cached
     return await service.get_all_incidents(severity_filter=severity)
 
 @router.get("/{incident_id}", response_model=IncidentResponse)
-async def get_incident(incident_id: str):
+async def get_incident(incident_id: str, request: Request, response: Response, service: IncidentService = Depends(get_service)):
+    cached = http_cache.not_modified(request, response, http_cache.INCIDENTS)
+    if cached:
+        return cached
     incident = await service.get_incident_by_id(incident_id)
     if not incident:
         raise HTTPException(status_code=404, detail="Incident not found")
     return incident
 
+@router.get("/{incident_id}/velocity")
+async def get_incident_velocity(incident_id: str):
+    """
+    Propagation velocity over the last 1m / 15m / 1h, from in-memory ring
+    buffers fed by the ingest path (no DB query).
+    """
+    return velocity.tracker.snapshot(incident_id)
+
+@router.get("/{incident_id}/narratives")
+async def get_incident_narratives(incident_id: str):
+    """
+    Narrative clusters of the incident's posts and analyses, largest first,
+    with each cluster's verdict reuse hit rate (in memory, no DB query).
+    """
+    return narratives.engine.narratives(incident_id)
+
+@router.get("/{incident_id}/layout")
+async def get_incident_layout(
+    incident_id: str,
+    request: Request,
+    response: Response,
+    x0: Optional[float] = Query(None),
+    y0: Optional[float] = Query(None),
+    x1: Optional[float] = Query(None),
+    y1: Optional[float] = Query(None),
+    posts: bool = Query(False, description="include each node's post"),
+    service: IncidentService = Depends(get_service),
+):
+    """
+    Positioned nodes and edges of the incident's post tree inside the
+    viewport (x0, y0)-(x1, y1), or the whole tree without one. The layout is
+    cached and extended as posts arrive; existing nodes never move.
+    """
+    cached = http_cache.not_modified(request, response, http_cache.incident_posts(incident_id))
+    if cached:
+        return cached
+    return await service.get_layout(incident_id, x0, y0, x1, y1, include_posts=posts)
+
 @router.post("/", response_model=IncidentResponse)
-async def create_incident(incident: IncidentCreate):
+async def create_incident(incident: IncidentCreate, service: IncidentService = Depends(get_service)):
     return await service.create_incident(incident)
 
 @router.patch("/{incident_id}", response_model=IncidentResponse)
-async def update_incident(incident_id: str, incident: IncidentUpdate):
+async def update_incident(incident_id: str, incident: IncidentUpdate, service: IncidentService = Depends(get_service)):
     updated = await service.update_incident(incident_id, incident)
     if not updated:
         raise HTTPException(status_code=404, detail="Incident not found")
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from services import tracing
+from services.metrics import render_latest
+
+router = APIRouter(tags=["metrics"])
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Prometheus text exposition of all backend metrics.
+    """
+    return PlainTextResponse(render_latest(), media_type="text/plain; version=0.0.4")
+
+@router.get("/api/traces")
+async def get_traces(limit: int = Query(50, ge=1, le=500)):
+    """
+    Most recent request traces (requires TRACING_ENABLED).
+    """
+    return {"enabled": tracing.is_enabled(), "traces": tracing.get_traces(limit)}
+
+@router.get("/api/traces/{trace_id}")
+async def get_trace(trace_id: str):
+    trace = tracing.get_trace(trace_id)
+    if not trace:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return trace
@@ -1,10 +1,21 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from typing import List, Dict, Any
+from services import admission, http_cache
 from services.post_service import PostService
+from models.post import CommentResponse, PostDiffResponse, PostResponse
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/api", tags=["posts"])
-service = PostService()
+_service: PostService | None = None
+
+def get_service() -> PostService:
+    """
+    Lazily builds the shared PostService; the app lifespan connects it.
+    """
+    global _service
+    if _service is None:
+        _service = PostService()
+    return _service
 
 class PostCreate(BaseModel):
     content: str
@@ -19,38 +30,62 @@ class CommentCreate(BaseModel):
     author: str
     content: str
 
-@router.on_event("startup")
-async def startup():
-    await service.connect()
-
-@router.on_event("shutdown")
-async def shutdown():
-    await service.disconnect()
-
-@router.get("/incidents/{incident_id}/posts")
-async def get_incident_posts(incident_id: str):
+@router.get("/incidents/{incident_id}/posts", response_model=List[PostResponse])
+async def get_incident_posts(incident_id: str, request: Request, response: Response, service: PostService = Depends(get_service)):
+    cached = http_cache.not_modified(request, response, http_cache.incident_posts(incident_id))
+    if cached:
+        return cached
     return await service.get_posts_by_incident(incident_id)
 
-@router.post("/posts")
-async def create_post(post: PostCreate):
+@router.post("/posts", response_model=PostResponse, dependencies=[Depends(admission.limit("create_post"))])
+async def create_post(post: PostCreate, service: PostService = Depends(get_service)):
     return await service.create_post(post.dict())
 
-@router.get("/posts/{post_id}")
-async def get_post(post_id: str):
+@router.get("/posts/copies", response_model=List[PostResponse])
+async def get_copies_of_text(content: str = Query(..., min_length=1), service: PostService = Depends(get_service)):
+    """
+    All posts whose normalized text matches ``content`` exactly, oldest first.
+    """
+    return await service.get_copies(content=content)
+
+@router.get("/posts/parent-suggestion")
+async def suggest_parent(
+    incidentId: str,
+    content: str = Query(..., min_length=1),
+    service: PostService = Depends(get_service),
+):
+    """
+    Most likely parent of ``content`` among the incident's recent posts, with
+    a confidence score; null when nothing is similar enough.
+    """
+    return await service.suggest_parent(incidentId, content)
+
+@router.get("/posts/{post_id}", response_model=PostResponse)
+async def get_post(post_id: str, service: PostService = Depends(get_service)):
     post = await service.get_post_by_id(post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     return post
 
-@router.get("/posts/{post_id}/diff")
-async def get_post_diff(post_id: str):
+@router.get("/posts/{post_id}/copies", response_model=List[PostResponse])
+async def get_post_copies(post_id: str, service: PostService = Depends(get_service)):
+    """
+    All copies of a post's text (including the post itself), oldest first.
+    """
+    copies = await service.get_copies(post_id=post_id)
+    if copies is None:
+        raise HTTPException(status_code=404, detail="Post not found")
+    return copies
+
+@router.get("/posts/{post_id}/diff", response_model=PostDiffResponse)
+async def get_post_diff(post_id: str, service: PostService = Depends(get_service)):
     diff_data = await service.get_post_diff(post_id)
     if not diff_data:
         raise HTTPException(status_code=404, detail="Post not found")
     return diff_data
 
-@router.post("/posts/{post_id}/vote")
-async def vote_on_post(post_id: str, vote: VoteRequest):
+@router.post("/posts/{post_id}/vote", response_model=PostResponse)
+async def vote_on_post(post_id: str, vote: VoteRequest, service: PostService = Depends(get_service)):
     """
     Vote on a post's credibility.
     isCredible: true = credible vote, false = not credible vote
@@ -60,22 +95,19 @@ async def vote_on_post(post_id: str, vote: VoteRequest):
         raise HTTPException(status_code=404, detail="Post not found")
     return updated_post
 
-@router.get("/posts/{post_id}/comments")
-async def get_post_comments(post_id: str):
+@router.get("/posts/{post_id}/comments", response_model=List[CommentResponse])
+async def get_post_comments(post_id: str, service: PostService = Depends(get_service)):
     """
     Get all comments for a post.
     """
     return await service.get_comments(post_id)
 
-@router.post("/posts/{post_id}/comments")
-async def create_comment(post_id: str, comment: CommentCreate):
+@router.post("/posts/{post_id}/comments", response_model=CommentResponse)
+async def create_comment(post_id: str, comment: CommentCreate, service: PostService = Depends(get_service)):
     """
     Create a new comment on a post.
     """
-    # Verify post exists
-    post = await service.get_post_by_id(post_id)
-    if not post:
-        raise HTTPException(status_code=404, detail="Post not found")
-    
     new_comment = await service.create_comment(post_id, comment.dict())
+    if not new_comment:
+        raise HTTPException(status_code=404, detail="Post not found")
     return new_comment
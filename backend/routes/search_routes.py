@@ -0,0 +1,39 @@
+from datetime import datetime
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from models.search import SearchResponse
+from services.search_service import SearchService
+
+router = APIRouter(prefix="/api", tags=["search"])
+_service: Optional[SearchService] = None
+
+def get_service() -> SearchService:
+    """
+    Lazily builds the shared SearchService; the app lifespan connects it.
+    """
+    global _service
+    if _service is None:
+        _service = SearchService()
+    return _service
+
+@router.get("/search", response_model=SearchResponse)
+async def search(
+    q: str = Query(..., min_length=1, max_length=256, description="Web-search syntax: words, \"phrases\", -exclusions, or"),
+    incidentId: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    type: Literal["all", "posts", "comments"] = "all",
+    sort: Literal["rank", "recent"] = "rank",
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    service: SearchService = Depends(get_service),
+):
+    """
+    Full-text search over posts and comments, by relevance or newest first.
+    Pass the returned nextCursor to fetch the following page.
+    """
+    try:
+        return await service.search(q, incidentId, since, until, type, sort, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
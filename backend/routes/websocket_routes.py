@@ -1,4 +1,6 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from routes import dashboard_routes
+from services import dashboard, job_queue
 from services.connection_manager import manager
 
 router = APIRouter(prefix="/api/ws", tags=["websockets"])
@@ -15,3 +17,35 @@ async def websocket_endpoint(websocket: WebSocket, incident_id: str):
     except Exception as e:
         print(f"WebSocket error: {e}")
         manager.disconnect(websocket, incident_id)
+
+@router.websocket("/jobs/{job_id}")
+async def job_websocket(websocket: WebSocket, job_id: str):
+    channel = f"job:{job_id}"
+    await manager.connect(websocket, channel)
+    try:
+        # The job may have finished before the client subscribed
+        job = await job_queue.get_queue().get(job_id)
+        if job and job.status in job_queue.FINISHED:
+            await websocket.send_json(job_queue.job_message(job))
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        manager.disconnect(websocket, channel)
+    except Exception as e:
+        print(f"WebSocket error: {e}")
+        manager.disconnect(websocket, channel)
+
+@router.websocket("/dashboard")
+async def dashboard_websocket(websocket: WebSocket, cursor: int = 0):
+    await manager.connect(websocket, dashboard.CHANNEL)
+    try:
+        # Full snapshot first; pushes follow whenever its version changes
+        snapshot = await dashboard_routes.get_dashboard().snapshot(cursor)
+        await websocket.send_json({"type": "dashboard", **snapshot})
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        manager.disconnect(websocket, dashboard.CHANNEL)
+    except Exception as e:
+        print(f"WebSocket error: {e}")
+        manager.disconnect(websocket, dashboard.CHANNEL)
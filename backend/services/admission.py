@@ -0,0 +1,285 @@
+"""
+Admission control for expensive endpoints.
+
+Each limited route gets a ``RouteLimiter`` combining:
+  - a per-client token bucket (``rate`` requests/second, ``burst`` capacity),
+    answered with 429 + Retry-After when empty;
+  - a global concurrency cap (``concurrency``) with a bounded FIFO wait queue
+    (``queue``, ``max_wait`` seconds), answered with 503 + Retry-After when
+    the queue is full, the wait times out, or the route's recent latency
+    says the wait would be longer than ``max_wait`` anyway.
+
+Defaults live in ``ROUTE_DEFAULTS`` and can be overridden per route from the
+environment, e.g. ``ADMISSION_ANALYZE_RATE=0.5`` or
+``ADMISSION_CREATE_POST_CONCURRENCY=16``. ``ADMISSION_ENABLED=false`` turns
+every limiter into a no-op.
+"""
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Optional
+
+from fastapi import HTTPException, Request
+
+from services.metrics import registry
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() in ("1", "true", "yes")
+# Honour the first X-Forwarded-For hop when running behind a trusted proxy
+TRUST_FORWARDED_FOR = os.getenv("ADMISSION_TRUST_FORWARDED_FOR", "false").lower() in ("1", "true", "yes")
+# Client buckets kept per route; the least recently seen are evicted first
+MAX_TRACKED_CLIENTS = int(os.getenv("ADMISSION_MAX_CLIENTS", "10000"))
+
+ROUTE_DEFAULTS: Dict[str, Dict[str, float]] = {
+    # Full-table similarity scan plus a Gemini call per request
+    "analyze": {"rate": 0.2, "burst": 5, "concurrency": 4, "queue": 16, "max_wait": 10.0},
+    # Mutation score against the parent plus a broadcast
+    "create_post": {"rate": 2.0, "burst": 20, "concurrency": 32, "queue": 128, "max_wait": 5.0},
+    # Bulk export streams whole incidents
+    "export": {"rate": 0.1, "burst": 4, "concurrency": 2, "queue": 4, "max_wait": 30.0},
+}
+
+ADMISSION_DECISIONS = registry.counter(
+    "factsaura_admission_decisions_total",
+    "Admission decisions by route and outcome (admitted, rate_limited, queue_full, overloaded, timeout).",
+    ["route", "outcome"],
+)
+ADMISSION_IN_FLIGHT = registry.gauge(
+    "factsaura_admission_in_flight",
+    "Requests currently holding a concurrency slot.",
+    ["route"],
+)
+ADMISSION_QUEUED = registry.gauge(
+    "factsaura_admission_queued",
+    "Requests waiting for a concurrency slot.",
+    ["route"],
+)
+ADMISSION_LIMITS = registry.gauge(
+    "factsaura_admission_limit",
+    "Configured admission limits per route (rate, burst, concurrency, queue, max_wait).",
+    ["route", "limit"],
+)
+ADMISSION_WAIT = registry.histogram(
+    "factsaura_admission_wait_seconds",
+    "Time admitted requests spent queued for a concurrency slot.",
+    ["route"],
+)
+
+
+class Rejected(Exception):
+    def __init__(self, status_code: int, outcome: str, retry_after: float):
+        super().__init__(outcome)
+        self.status_code = status_code
+        self.outcome = outcome
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, now: Optional[float] = None) -> float:
+        """
+        Takes one token; returns 0 on success, otherwise the seconds until
+        a token will be available.
+        """
+        self._refill(time.monotonic() if now is None else now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        if self.rate <= 0:
+            return math.inf
+        return (1 - self.tokens) / self.rate
+
+
+class ConcurrencyLimiter:
+    """
+    Semaphore with a bounded FIFO queue. A released slot is handed straight
+    to the oldest waiter so late arrivals cannot overtake the queue.
+    """
+    def __init__(self, limit: int, max_queue: int, max_wait: float):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def must_wait(self) -> bool:
+        return self.active >= self.limit or bool(self._waiters)
+
+    async def acquire(self):
+        if not self.must_wait():
+            self.active += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            raise Rejected(503, "queue_full", self.max_wait)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.max_wait)
+        except asyncio.TimeoutError:
+            self._discard(waiter)
+            raise Rejected(503, "timeout", self.max_wait)
+        except asyncio.CancelledError:
+            # The slot may have been handed over just before the cancellation
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                self._discard(waiter)
+            raise
+
+    def _discard(self, waiter: asyncio.Future):
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # Slot passes to the waiter; ``active`` is unchanged
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+
+class RouteLimiter:
+    def __init__(self, route: str, rate: float, burst: float, concurrency: int, queue: int, max_wait: float):
+        self.route = route
+        self.rate = rate
+        self.burst = burst
+        self.slots = ConcurrencyLimiter(concurrency, queue, max_wait)
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        # Exponentially weighted handler latency, used to shed before queueing
+        self.latency_ewma = 0.0
+        for name, value in (("rate", rate), ("burst", burst), ("concurrency", concurrency),
+                            ("queue", queue), ("max_wait", max_wait)):
+            ADMISSION_LIMITS.set(value, route=route, limit=name)
+
+    @classmethod
+    def from_env(cls, route: str) -> "RouteLimiter":
+        config = dict(ROUTE_DEFAULTS.get(route, ROUTE_DEFAULTS["create_post"]))
+        prefix = f"ADMISSION_{route.upper()}_"
+        for key in config:
+            value = os.getenv(prefix + key.upper())
+            if value is not None:
+                config[key] = float(value)
+        return cls(
+            route,
+            rate=float(config["rate"]),
+            burst=float(config["burst"]),
+            concurrency=int(config["concurrency"]),
+            queue=int(config["queue"]),
+            max_wait=float(config["max_wait"]),
+        )
+
+    def _bucket(self, client: str) -> TokenBucket:
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = TokenBucket(self.rate, self.burst)
+            if len(self._buckets) > MAX_TRACKED_CLIENTS:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+        return bucket
+
+    def estimated_wait(self) -> float:
+        """
+        Expected queueing delay for a new arrival from recent handler latency.
+        """
+        if not self.slots.must_wait():
+            return 0.0
+        return self.latency_ewma * (self.slots.queued + 1) / max(1, self.slots.limit)
+
+    def _record(self, outcome: str):
+        ADMISSION_DECISIONS.inc(route=self.route, outcome=outcome)
+        ADMISSION_IN_FLIGHT.set(self.slots.active, route=self.route)
+        ADMISSION_QUEUED.set(self.slots.queued, route=self.route)
+
+    async def acquire(self, client: str):
+        retry_after = self._bucket(client).try_acquire()
+        if retry_after:
+            self._record("rate_limited")
+            raise Rejected(429, "rate_limited", retry_after)
+
+        expected = self.estimated_wait()
+        if expected > self.slots.max_wait:
+            self._record("overloaded")
+            raise Rejected(503, "overloaded", expected)
+
+        queued_at = time.perf_counter()
+        if self.slots.must_wait():
+            ADMISSION_QUEUED.set(self.slots.queued + 1, route=self.route)
+        try:
+            await self.slots.acquire()
+        except Rejected as rejection:
+            self._record(rejection.outcome)
+            raise
+        ADMISSION_WAIT.observe(time.perf_counter() - queued_at, route=self.route)
+        self._record("admitted")
+
+    def release(self, elapsed: float):
+        self.latency_ewma = elapsed if not self.latency_ewma else 0.8 * self.latency_ewma + 0.2 * elapsed
+        self.slots.release()
+        ADMISSION_IN_FLIGHT.set(self.slots.active, route=self.route)
+        ADMISSION_QUEUED.set(self.slots.queued, route=self.route)
+
+
+_limiters: Dict[str, RouteLimiter] = {}
+
+
+def get_limiter(route: str) -> RouteLimiter:
+    limiter = _limiters.get(route)
+    if limiter is None:
+        limiter = _limiters[route] = RouteLimiter.from_env(route)
+    return limiter
+
+
+def client_key(request: Request) -> str:
+    if TRUST_FORWARDED_FOR:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def limit(route: str):
+    """
+    FastAPI dependency holding an admission slot for the request's duration:
+
+        @router.post("/api/analyze", dependencies=[Depends(admission.limit("analyze"))])
+    """
+    async def dependency(request: Request):
+        if not ADMISSION_ENABLED:
+            yield
+            return
+        limiter = get_limiter(route)
+        try:
+            await limiter.acquire(client_key(request))
+        except Rejected as rejection:
+            raise HTTPException(
+                status_code=rejection.status_code,
+                detail="Rate limit exceeded" if rejection.status_code == 429 else "Server busy, retry later",
+                headers={"Retry-After": str(max(1, math.ceil(min(rejection.retry_after, 3600))))},
+            )
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            limiter.release(time.perf_counter() - started)
+
+    return dependency
@@ -1,24 +1,54 @@
 import asyncio
-from typing import List, Dict, Any
+from typing import Any, Callable, Dict, List, Optional
 from datetime import datetime
-from prisma import Prisma
+from services import http_cache, ingest_shards, replay
+from services.metrics import AGENT_POSTS_PROCESSED, AGENT_STAGE_DURATION, instrument_prisma
 from services.agents.scanner_agent import ScannerAgent
 from services.agents.verifier_agent import VerifierAgent
 from services.agents.publisher_agent import PublisherAgent
 
 class AgentManager:
     def __init__(self):
-        self.scanner = ScannerAgent()
-        self.verifier = VerifierAgent()
-        self.publisher = PublisherAgent()
+        # Agents and the DB client are built by setup() (called from the app
+        # lifespan) so importing this module does no I/O.
+        self.scanner: Optional[ScannerAgent] = None
+        self.verifier: Optional[VerifierAgent] = None
+        self.publisher: Optional[PublisherAgent] = None
+        self.replay: Optional[replay.ReplayEngine] = None
+        # Per-incident-shard workers replacing the single cursor (INGEST_SHARDS > 1)
+        self.shards: Optional[ingest_shards.ShardedIngest] = None
+        self.db = None
         self.is_running = False
         self.logs: List[Dict[str, Any]] = []
         self.MAX_LOGS = 50
+        # Sequence number of the latest log entry (cursor for /api/dashboard)
+        self.log_seq = 0
         self._task = None
-        self.db = Prisma()
+
+    def setup(self, client_factory: Optional[Callable[[], Any]] = None):
+        """
+        Builds the agents (the scanner loads the simulation file) and DB clients.
+        ``client_factory`` overrides how DB clients are created (benchmarks).
+        """
+        if self.scanner is not None:
+            return
+        if client_factory is None:
+            from prisma import Prisma
+            client_factory = lambda: instrument_prisma(Prisma())
+        self.scanner = ScannerAgent(db=client_factory())
+        self.verifier = VerifierAgent()
+        self.publisher = PublisherAgent(db=client_factory())
+        self.replay = replay.ReplayEngine(self.scanner)
+        if ingest_shards.INGEST_SHARDS > 1:
+            self.shards = ingest_shards.ShardedIngest(
+                self.scanner, self.run_pipeline, clock=self.replay.clock, offsets=self.replay.offsets
+            )
+        self.db = client_factory()
 
     def add_log(self, agent: str, action: str, details: str):
+        self.log_seq += 1
         log_entry = {
+            "seq": self.log_seq,
             "id": datetime.now().isoformat(),
             "agent": agent,
             "action": action,
@@ -28,11 +58,18 @@ class AgentManager:
         self.logs.insert(0, log_entry)
         if len(self.logs) > self.MAX_LOGS:
             self.logs.pop()
+        http_cache.bump(http_cache.AGENT_LOGS)
         print(f"[{agent}] {action}: {details}")
 
     async def start(self):
         if self.is_running:
             return
+        self.setup()
+        # Resume the replay where the last run checkpointed it
+        await self.scanner.restore_position()
+        self.replay.align()
+        if self.shards is not None:
+            await self.shards.start()
         self.is_running = True
         self._task = asyncio.create_task(self._run_loop())
         self.add_log("SYSTEM", "Started", "Autonomous Agent Loop started.")
@@ -45,6 +82,13 @@ class AgentManager:
                 await self._task
             except asyncio.CancelledError:
                 pass
+        if self.shards is not None:
+            await self.shards.stop()
+        if self.scanner is not None:
+            try:
+                await self.scanner.checkpoint()
+            except Exception as e:
+                print(f"[SYSTEM] Could not checkpoint the scanner: {e}")
         self.add_log("SYSTEM", "Stopped", "Autonomous Agent Loop stopped.")
 
     async def _run_loop(self):
@@ -55,41 +99,71 @@ class AgentManager:
                     await self.db.connect()
                 
                 demo_state = await self.db.demostate.find_first()
+                # Picks up a demo reset (fresh state row) without a restart,
+                # and the speed / pause settings that drive the virtual clock
+                await self.replay.sync(demo_state)
+                if self.shards is not None:
+                    # Shard workers pace themselves on the replay clock
+                    await self.shards.sync(demo_state)
+                    await asyncio.sleep(1)
+                    continue
                 if demo_state and demo_state.isPaused:
                     # Demo is paused, wait and check again
                     await asyncio.sleep(1)
                     continue
-                
-                # Get speed multiplier (default to 1.0 if no state)
-                speed = demo_state.speed if demo_state else 1.0
-                delay = 1.0 / speed  # Faster speed = shorter delay
-                
-                # 1. Scan
-                post = self.scanner.get_next_post()
-                if post:
-                    self.add_log("SCANNER", "Detected", f"New content: {post.get('id')}")
-                    
-                    # Ensure incident and post exist in DB (ScannerAgent logic update needed)
-                    await self.scanner.process_post_db(post) 
 
-                    # 2. Verify
-                    self.add_log("VERIFIER", "Analyzing", f"Verifying {post.get('id')}...")
-                    verification_result = await self.verifier.verify(post)
-                    
-                    # 3. Publish
-                    self.add_log("PUBLISHER", "Publishing", f"Result for {post.get('id')}: {verification_result.get('truth_status')}")
-                    await self.publisher.publish(verification_result)
+                # 1. Scan: emit the next post once the clock reaches its
+                # recorded time; re-read the demo state at least every second
+                wait = self.replay.time_until_next()
+                if wait is None:
+                    # Feed exhausted, wait for a reset or seek
+                    await asyncio.sleep(2)
+                elif wait > 0:
+                    await asyncio.sleep(min(wait, 1.0))
                 else:
-                    # No new posts, wait a bit
-                    await asyncio.sleep(2 * delay)
-                
-                await asyncio.sleep(delay) # Pace the loop based on speed
+                    await self.replay.step(self.run_pipeline)
             except Exception as e:
                 self.add_log("SYSTEM", "Error", str(e))
                 await asyncio.sleep(5)
 
+    async def run_pipeline(self, post: Dict[str, Any], checkpoint=None):
+        """
+        Runs a single post through the scan -> verify -> publish stages.
+        ``checkpoint`` advances the cursor that owns the post (see
+        ``ScannerAgent.process_post_db``).
+        """
+        self.add_log("SCANNER", "Detected", f"New content: {post.get('id')}")
+
+        try:
+            # Ensure incident and post exist in DB (ScannerAgent logic update needed)
+            with AGENT_STAGE_DURATION.time(stage="scan"):
+                await self.scanner.process_post_db(post, checkpoint)
+
+            # 2. Verify
+            self.add_log("VERIFIER", "Analyzing", f"Verifying {post.get('id')}...")
+            with AGENT_STAGE_DURATION.time(stage="verify"):
+                verification_result = await self.verifier.verify(post)
+
+            # 3. Publish
+            self.add_log("PUBLISHER", "Publishing", f"Result for {post.get('id')}: {verification_result.get('truth_status')}")
+            with AGENT_STAGE_DURATION.time(stage="publish"):
+                await self.publisher.publish(verification_result)
+        except Exception:
+            AGENT_POSTS_PROCESSED.inc(outcome="error")
+            raise
+        AGENT_POSTS_PROCESSED.inc(outcome="ok")
+
     def get_logs(self) -> List[Dict[str, Any]]:
         return self.logs
 
+    def logs_since(self, cursor: int) -> List[Dict[str, Any]]:
+        """
+        Entries newer than ``cursor`` (a ``seq``), newest first. A cursor from
+        a previous process (ahead of ours) gets everything we still hold.
+        """
+        if cursor > self.log_seq:
+            cursor = 0
+        return [entry for entry in self.logs if entry["seq"] > cursor]
+
 # Global instance
 agent_manager = AgentManager()
@@ -1,9 +1,13 @@
 from typing import Dict, Any
-from prisma import Prisma
+from services import credibility, entity_cache, http_cache, velocity
+from services.metrics import instrument_prisma
 
 class PublisherAgent:
-    def __init__(self):
-        self.db = Prisma()
+    def __init__(self, db=None):
+        if db is None:
+            from prisma import Prisma
+            db = instrument_prisma(Prisma())
+        self.db = db
 
     async def publish(self, result: Dict[str, Any]):
         """
@@ -23,7 +27,11 @@ class PublisherAgent:
 
         # Update the post with verification results
         try:
-            await self.db.post.update(
+            # The verdict delta must come from the row itself: a cached copy
+            # may predate another process's classification
+            previous = await self.db.post.find_unique(where={"id": post_id})
+            previous_type = previous.mutationType if previous else None
+            post = await self.db.post.update(
                 where={"id": post_id},
                 data={
                     "mutationScore": mutation_score,
@@ -32,5 +40,12 @@ class PublisherAgent:
                     # to indicate verification status to the frontend.
                 }
             )
+            if post:
+                entity_cache.posts.put(post)
+                http_cache.bump(http_cache.incident_posts(post.incidentId))
+                velocity.post_classified(post.incidentId, mutation_type)
+                await credibility.record_classification(
+                    self.db, post.author, previous_type, mutation_type
+                )
         except Exception as e:
             print(f"[PublisherAgent] Error updating DB for post {post_id}: {e}")
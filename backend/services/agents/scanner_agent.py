@@ -1,19 +1,31 @@
 import json
 import os
-from typing import List, Optional, Dict, Any
-from prisma import Prisma
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from services import archive, attribution, credibility, entity_cache, http_cache, narratives, tree_layout, velocity
+from services.content_hash import content_hash
+from services.metrics import instrument_prisma
 from services.incident_service import IncidentService
 from models.incident import IncidentCreate
 
+# Posts between cursor checkpoints; a crash replays at most this many
+CHECKPOINT_EVERY = int(os.getenv("SCANNER_CHECKPOINT_EVERY", "1"))
+
 class ScannerAgent:
-    def __init__(self, data_path: str = "data/simulation_data.json"):
+    def __init__(self, data_path: str = "data/simulation_data.json", db=None):
         self.data_path = data_path
         self.incidents: List[Dict[str, Any]] = []
         self.posts: List[Dict[str, Any]] = []
         self.current_post_index = 0
         self.MAX_POSTS_LIMIT = 100
-        self.db = Prisma()
-        self.incident_service = IncidentService()
+        # DemoState row holding the cursor, and the last position written to it
+        self._state_id: Optional[str] = None
+        self._checkpointed = 0
+        self._known_incidents = set()
+        if db is None:
+            from prisma import Prisma
+            db = instrument_prisma(Prisma())
+        self.db = db
+        self.incident_service = IncidentService(db)
         self._load_data()
 
     def _load_data(self):
@@ -32,56 +44,132 @@ class ScannerAgent:
             self.incidents = []
             self.posts = []
 
-    async def process_post_db(self, post_data: Dict[str, Any]):
+    async def restore_position(self, state=None):
+        """
+        Resumes from the checkpointed ``DemoState.currentPosition``. A state
+        row with a new id (demo reset) rewinds the cursor to its position.
+        """
+        if state is None:
+            if not self.db.is_connected():
+                await self.db.connect()
+            state = await self.db.demostate.find_first()
+        if state is None or state.id == self._state_id:
+            return
+        self._state_id = state.id
+        self._known_incidents.clear()
+        self.current_post_index = min(state.currentPosition, len(self.posts))
+        self._checkpointed = self.current_post_index
+        print(f"[ScannerAgent] Resuming at post {self.current_post_index}/{len(self.posts)}")
+
+    async def _ensure_incident(self, incident_id: str):
+        if incident_id in self._known_incidents:
+            return
+        incident_data = next((inc for inc in self.incidents if inc["id"] == incident_id), None)
+        if incident_data:
+            created = await self.db.incident.create_many(
+                data=[{
+                    "id": incident_data["id"],
+                    "title": incident_data["title"],
+                    "severity": incident_data["severity"],
+                    "location": incident_data["location"],
+                    "status": incident_data["status"]
+                }],
+                skip_duplicates=True,
+            )
+            if created:
+                http_cache.bump(http_cache.INCIDENTS)
+        self._known_incidents.add(incident_id)
+
+    async def process_post_db(self, post_data: Dict[str, Any], checkpoint: Optional[Callable[[Any], Awaitable[Any]]] = None):
         """
         Ensures the incident and post exist in the database.
+
+        Idempotent: the insert skips existing ids (ON CONFLICT DO NOTHING), so
+        posts replayed after a crash between checkpoints are not duplicated
+        or counted twice. The cursor is checkpointed in the same transaction
+        every ``CHECKPOINT_EVERY`` posts; ``checkpoint`` replaces it (called
+        with the transaction) when another cursor owns the post, e.g. an
+        ingest shard.
         """
+        checkpoint = checkpoint or self._checkpoint
         if not self.db.is_connected():
             await self.db.connect()
 
         # 1. Check/Create Incident
-        incident_id = post_data.get("incident_id")
+        incident_id = post_data.get("incidentId")
         if incident_id:
-            incident_data = next((inc for inc in self.incidents if inc["id"] == incident_id), None)
-            if incident_data:
-                existing_incident = await self.db.incident.find_unique(where={"id": incident_id})
-                if not existing_incident:
-                    # Create incident
-                    await self.db.incident.create(
-                        data={
-                            "id": incident_data["id"],
-                            "title": incident_data["title"],
-                            "severity": incident_data["severity"],
-                            "location": incident_data["location"],
-                            "status": incident_data["status"]
-                        }
-                    )
-
-        # 2. Check/Create Post
+            await self._ensure_incident(incident_id)
+
+        # 2. Create Post unless already ingested
         post_id = post_data.get("id")
-        existing_post = await self.db.post.find_unique(where={"id": post_id})
-        if not existing_post:
-            # Handle parent relationship
-            parent_id = post_data.get("parent_id")
-            
-            # Ensure parent exists if specified (simple check, assuming order is correct in json)
-            if parent_id:
-                parent_exists = await self.db.post.find_unique(where={"id": parent_id})
-                if not parent_exists:
+        # Posts of archived incidents must not be re-ingested into the hot table
+        if archive.store.incident_for_post(post_id):
+            await checkpoint(self.db)
+            return
+        parent_id = post_data.get("parentId")
+
+        # Ensure parent exists if specified (simple check, assuming order is correct in json)
+        confidence = None
+        if parent_id:
+            parent_exists = await entity_cache.get_post(self.db, parent_id)
+            if not parent_exists:
+                # Recorded roots stay roots; only broken links are re-attributed
+                proposal = None
+                if attribution.ATTRIBUTION_ENABLED:
+                    proposal = await attribution.index.propose(self.db, incident_id, post_data["content"])
+                if proposal:
+                    print(f"Parent {parent_id} not found for post {post_id}; attributed to "
+                          f"{proposal['parentId']} ({proposal['confidence']:.2f}).")
+                    parent_id, confidence = proposal["parentId"], proposal["confidence"]
+                else:
                     print(f"Warning: Parent {parent_id} not found for post {post_id}. Skipping parent link.")
                     parent_id = None
 
-            await self.db.post.create(
-                data={
+        async with self.db.tx() as tx:
+            created = await tx.post.create_many(
+                data=[{
                     "id": post_id,
                     "content": post_data["content"],
                     "author": post_data["author"],
                     "incidentId": incident_id,
                     "parentId": parent_id,
-                    "timestamp": post_data["timestamp"]
+                    "attributionConfidence": confidence,
+                    "timestamp": post_data["timestamp"],
+                    "contentHash": content_hash(post_data["content"])
                     # mutationScore/Type will be updated by Publisher/Verifier later
-                }
+                }],
+                skip_duplicates=True,
             )
+            await checkpoint(tx)
+        if created:
+            attribution.index.add(incident_id, post_id, post_data["content"])
+            tree_layout.post_created(incident_id, post_id, parent_id)
+            http_cache.bump(http_cache.incident_posts(incident_id), http_cache.DEMO)
+            await velocity.post_created(incident_id, bool(parent_id))
+            await narratives.post_created(incident_id, post_id, post_data["content"])
+            await credibility.record_post(self.db, post_data["author"])
+
+    async def _checkpoint(self, client, force: bool = False):
+        position = self.current_post_index
+        if position == self._checkpointed:
+            return
+        if not force and position - self._checkpointed < CHECKPOINT_EVERY:
+            return
+        if self._state_id is None:
+            state = await client.demostate.find_first()
+            if state is None:
+                state = await client.demostate.create(data={"speed": 1.0, "isPaused": False, "currentPosition": 0})
+            self._state_id = state.id
+        await client.demostate.update(where={"id": self._state_id}, data={"currentPosition": position})
+        self._checkpointed = position
+
+    async def checkpoint(self):
+        """
+        Writes the cursor now (e.g. on shutdown) regardless of CHECKPOINT_EVERY.
+        """
+        if not self.db.is_connected():
+            await self.db.connect()
+        await self._checkpoint(self.db, force=True)
 
     def get_incidents(self) -> List[Dict[str, Any]]:
         return self.incidents
@@ -97,5 +185,16 @@ class ScannerAgent:
         self.current_post_index += 1
         return post
 
+    def rewind(self, position: int):
+        """
+        Moves the cursor (e.g. after a replay snapshot restore); the next
+        ``checkpoint`` records it.
+        """
+        self.current_post_index = min(max(position, 0), len(self.posts))
+        self._known_incidents.clear()
+
     def reset(self):
         self.current_post_index = 0
+        self._checkpointed = 0
+        self._state_id = None
+        self._known_incidents.clear()
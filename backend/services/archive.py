@@ -0,0 +1,381 @@
+"""
+Cold storage for the posts and comments of resolved incidents.
+
+``ArchiveService.archive_incident`` writes an incident's posts and comments
+to ``<ARCHIVE_DIR>/<incident id>.jsonl.gz`` (one ``{"type", "record"}`` line
+per row), deletes those rows from the hot tables and stamps
+``Incident.archivedAt`` in one transaction, then records the incident in
+``manifest.json``. The Incident row itself stays, so listings and the
+incident page keep working.
+
+Reads go through ``store`` (an ``ArchiveStore``): PostService falls back to
+it for archived incidents and unknown post ids. Archive files are loaded
+lazily on first access, off the event loop, and the most recently used
+``ARCHIVE_CACHE_INCIDENTS`` are kept decoded in memory. Only the manifest
+(post id -> incident id) is resident otherwise. Archived content is read-only.
+
+The manifest is cached per process. With several workers, another worker's
+archival shows up on the next lookup miss, which re-reads the file if it
+changed. A read of an incident restored elsewhere fails once (its
+file is gone) and refreshes the manifest, so the next one goes to the hot
+tables.
+"""
+import asyncio
+import gzip
+import json
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from models.post import CommentResponse, PostResponse
+from services import entity_cache, http_cache
+from services.metrics import instrument_prisma, record_cache, registry
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", os.path.join(_BACKEND_DIR, "data", "archive"))
+ARCHIVE_STATUSES = [s.strip() for s in os.getenv("ARCHIVE_STATUSES", "RESOLVED").split(",") if s.strip()]
+ARCHIVE_AFTER_DAYS = float(os.getenv("ARCHIVE_AFTER_DAYS", "7"))
+ARCHIVE_CACHE_INCIDENTS = int(os.getenv("ARCHIVE_CACHE_INCIDENTS", "8"))
+
+ARCHIVED_ROWS = registry.counter(
+    "factsaura_archived_rows_total",
+    "Rows moved from the hot tables into cold storage.",
+    ["table"],
+)
+
+_DATETIME_FIELDS = {"timestamp", "createdAt", "updatedAt"}
+
+
+def _encode(record: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v.isoformat() if isinstance(v, datetime) else v for k, v in record.items()}
+
+
+def _decode(record: Dict[str, Any]) -> SimpleNamespace:
+    # Attribute access, like the Prisma models the services usually handle
+    return SimpleNamespace(**{
+        k: datetime.fromisoformat(v) if k in _DATETIME_FIELDS and isinstance(v, str) else v
+        for k, v in record.items()
+    })
+
+
+def _write_archive(path: str, posts: List[Dict[str, Any]], comments: List[Dict[str, Any]]):
+    tmp = path + ".tmp"
+    with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=9) as f:
+        for post in posts:
+            f.write(json.dumps({"type": "post", "record": _encode(post)}) + "\n")
+        for comment in comments:
+            f.write(json.dumps({"type": "comment", "record": _encode(comment)}) + "\n")
+    # Atomic replace: readers never see a half-written archive
+    os.replace(tmp, path)
+
+
+def _read_archive(path: str) -> Dict[str, Any]:
+    posts: List[SimpleNamespace] = []
+    comments: Dict[str, List[SimpleNamespace]] = {}
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line)
+            record = _decode(entry["record"])
+            if entry["type"] == "post":
+                posts.append(record)
+            else:
+                comments.setdefault(record.postId, []).append(record)
+    posts.sort(key=lambda p: p.timestamp)
+    for thread in comments.values():
+        thread.sort(key=lambda c: c.createdAt, reverse=True)
+    return {"posts": posts, "by_id": {p.id: p for p in posts}, "comments": comments}
+
+
+class ArchiveStore:
+    def __init__(self, directory: str = ARCHIVE_DIR, cache_size: int = ARCHIVE_CACHE_INCIDENTS):
+        self.directory = directory
+        self.cache_size = cache_size
+        self._manifest: Optional[Dict[str, Dict[str, Any]]] = None
+        self._version: Optional[tuple] = None
+        self._post_index: Dict[str, str] = {}
+        self._loaded: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.directory, "manifest.json")
+
+    def path_for(self, incident_id: str) -> str:
+        return os.path.join(self.directory, f"{incident_id}.jsonl.gz")
+
+    def _manifest_version(self) -> Optional[tuple]:
+        # The manifest is replaced, never edited in place: a new inode per write
+        try:
+            stat = os.stat(self.manifest_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def manifest(self, refresh: bool = False) -> Dict[str, Dict[str, Any]]:
+        """
+        The manifest is cached per process; ``refresh`` re-reads it if the
+        file changed since (another worker archived or restored an incident).
+        """
+        if self._manifest is not None and refresh and self._manifest_version() != self._version:
+            self._manifest = None
+            self._loaded.clear()
+        if self._manifest is None:
+            self._version = self._manifest_version()
+            try:
+                with open(self.manifest_path, encoding="utf-8") as f:
+                    self._manifest = json.load(f)
+            except FileNotFoundError:
+                self._manifest = {}
+            self._post_index = {
+                post_id: incident_id
+                for incident_id, entry in self._manifest.items()
+                for post_id in entry.get("postIds", [])
+            }
+        return self._manifest
+
+    def _save_manifest(self):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._manifest, f)
+        os.replace(tmp, self.manifest_path)
+        self._version = self._manifest_version()
+
+    def add(self, incident_id: str, entry: Dict[str, Any]):
+        self.manifest()[incident_id] = entry
+        self._post_index.update({post_id: incident_id for post_id in entry["postIds"]})
+        self._loaded.pop(incident_id, None)
+        self._save_manifest()
+
+    def remove(self, incident_id: str):
+        entry = self.manifest().pop(incident_id, None)
+        if entry:
+            for post_id in entry["postIds"]:
+                self._post_index.pop(post_id, None)
+        self._loaded.pop(incident_id, None)
+        self._save_manifest()
+
+    def discard(self, incident_id: str):
+        """
+        Forgets an incident's archive and deletes its file (its rows were
+        replaced, e.g. by a replay restore).
+        """
+        self.remove(incident_id)
+        try:
+            os.remove(self.path_for(incident_id))
+        except FileNotFoundError:
+            pass
+
+    def clear(self):
+        """
+        Deletes every archive file and the manifest (demo reset).
+        """
+        for incident_id in list(self.manifest()):
+            try:
+                os.remove(self.path_for(incident_id))
+            except FileNotFoundError:
+                pass
+        self._manifest = {}
+        self._post_index = {}
+        self._loaded.clear()
+        if os.path.exists(self.manifest_path):
+            os.remove(self.manifest_path)
+        self._version = None
+
+    def is_archived(self, incident_id: str) -> bool:
+        # A miss re-checks the file (one stat) in case another worker archived it
+        return incident_id in self.manifest() or incident_id in self.manifest(refresh=True)
+
+    def incident_for_post(self, post_id: str) -> Optional[str]:
+        self.manifest()
+        if post_id not in self._post_index:
+            self.manifest(refresh=True)
+        return self._post_index.get(post_id)
+
+    async def load(self, incident_id: str) -> Dict[str, Any]:
+        data = self._loaded.get(incident_id)
+        record_cache("archive", data is not None)
+        if data is None:
+            try:
+                data = await asyncio.to_thread(_read_archive, self.path_for(incident_id))
+            except FileNotFoundError:
+                # Restored by another worker: pick up its manifest for the next lookup
+                self.manifest(refresh=True)
+                raise
+            self._loaded[incident_id] = data
+            if len(self._loaded) > self.cache_size:
+                self._loaded.popitem(last=False)
+        else:
+            self._loaded.move_to_end(incident_id)
+        return data
+
+    async def posts(self, incident_id: str) -> List[SimpleNamespace]:
+        if not self.is_archived(incident_id):
+            return []
+        return list((await self.load(incident_id))["posts"])
+
+    async def post(self, post_id: str) -> Optional[SimpleNamespace]:
+        incident_id = self.incident_for_post(post_id)
+        if incident_id is None:
+            return None
+        return (await self.load(incident_id))["by_id"].get(post_id)
+
+    async def comments(self, post_id: str) -> List[SimpleNamespace]:
+        incident_id = self.incident_for_post(post_id)
+        if incident_id is None:
+            return []
+        return list((await self.load(incident_id))["comments"].get(post_id, []))
+
+
+store = ArchiveStore()
+
+
+class ArchiveService:
+    def __init__(self, db=None, archive: ArchiveStore = None):
+        if db is None:
+            from prisma import Prisma
+            db = instrument_prisma(Prisma())
+        self.db = db
+        self.store = archive or store
+
+    async def connect(self):
+        if not self.db.is_connected():
+            await self.db.connect()
+
+    async def disconnect(self):
+        if self.db.is_connected():
+            await self.db.disconnect()
+
+    async def archive_incident(self, incident_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Moves an incident's posts and comments to cold storage.
+        Returns the manifest entry, or None if the incident doesn't exist.
+        """
+        await self.connect()
+        incident = await self.db.incident.find_unique(where={"id": incident_id})
+        if not incident:
+            return None
+
+        posts = await self.db.post.find_many(where={"incidentId": incident_id}, order={"timestamp": "asc"})
+        post_ids = [p.id for p in posts]
+        comments = await self.db.comment.find_many(where={"postId": {"in": post_ids}}) if post_ids else []
+
+        post_rows = [PostResponse.model_validate(p).model_dump() for p in posts]
+        comment_rows = [CommentResponse.model_validate(c).model_dump() for c in comments]
+        if self.store.is_archived(incident_id):
+            # Rows written after a previous archival join the existing archive
+            previous = await self.store.load(incident_id)
+            known = set(post_ids)
+            post_rows = [PostResponse.model_validate(p).model_dump() for p in previous["posts"] if p.id not in known] + post_rows
+            comment_rows = [
+                CommentResponse.model_validate(c).model_dump()
+                for thread in previous["comments"].values() for c in thread
+            ] + comment_rows
+
+        os.makedirs(self.store.directory, exist_ok=True)
+        path = self.store.path_for(incident_id)
+        # The file is durable before any hot row is deleted
+        await asyncio.to_thread(_write_archive, path, post_rows, comment_rows)
+
+        archived_at = datetime.now(timezone.utc)
+        entry = {
+            "file": os.path.basename(path),
+            "archivedAt": archived_at.isoformat(),
+            "posts": len(post_rows),
+            "comments": len(comment_rows),
+            "bytes": os.path.getsize(path),
+            "postIds": [p["id"] for p in post_rows],
+        }
+
+        # Only the rows that were read (and written to the file) are deleted:
+        # posts added since stay hot for the next run. A comment added since
+        # blocks its post's delete (restrict), rolling the transaction back.
+        async with self.db.tx() as tx:
+            if post_ids:
+                await tx.comment.delete_many(where={"id": {"in": [c.id for c in comments]}})
+                await tx.post.delete_many(where={"id": {"in": post_ids}})
+            await tx.incident.update(where={"id": incident_id}, data={"archivedAt": archived_at})
+        # Readers follow the manifest, so it only changes once the hot rows are gone
+        self.store.add(incident_id, entry)
+        entity_cache.posts.invalidate(*post_ids)
+        entity_cache.incidents.invalidate(incident_id)
+
+        ARCHIVED_ROWS.inc(len(posts), table="post")
+        ARCHIVED_ROWS.inc(len(comments), table="comment")
+        http_cache.bump(http_cache.INCIDENTS, http_cache.incident_posts(incident_id))
+        print(f"[Archive] {incident_id}: {len(posts)} posts, {len(comments)} comments -> {path}")
+        return {k: v for k, v in entry.items() if k != "postIds"}
+
+    async def archive_resolved(self, older_than_days: float = ARCHIVE_AFTER_DAYS) -> List[Dict[str, Any]]:
+        """
+        Archives every unarchived incident in ARCHIVE_STATUSES that hasn't
+        changed for ``older_than_days``.
+        """
+        await self.connect()
+        cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+        incidents = await self.db.incident.find_many(
+            where={"status": {"in": ARCHIVE_STATUSES}, "archivedAt": None, "updatedAt": {"lt": cutoff}}
+        )
+        archived = []
+        for incident in incidents:
+            entry = await self.archive_incident(incident.id)
+            if entry:
+                archived.append({"incidentId": incident.id, **entry})
+        return archived
+
+    async def restore_incident(self, incident_id: str) -> Optional[Dict[str, int]]:
+        """
+        Moves an archived incident back into the hot tables.
+        """
+        if not self.store.is_archived(incident_id):
+            return None
+        await self.connect()
+        data = await self.store.load(incident_id)
+        posts = [PostResponse.model_validate(p).model_dump() for p in data["posts"]]
+        comments = [
+            CommentResponse.model_validate(c).model_dump()
+            for thread in data["comments"].values() for c in thread
+        ]
+        async with self.db.tx() as tx:
+            # Posts are in timestamp order, so parents precede their children
+            if posts:
+                await tx.post.create_many(data=posts, skip_duplicates=True)
+            if comments:
+                await tx.comment.create_many(data=comments, skip_duplicates=True)
+            await tx.incident.update(where={"id": incident_id}, data={"archivedAt": None})
+        entity_cache.incidents.invalidate(incident_id)
+
+        self.store.remove(incident_id)
+        os.remove(self.store.path_for(incident_id))
+        http_cache.bump(http_cache.INCIDENTS, http_cache.incident_posts(incident_id))
+        return {"posts": len(posts), "comments": len(comments)}
+
+    def status(self) -> Dict[str, Any]:
+        manifest = self.store.manifest()
+        return {
+            "directory": self.store.directory,
+            "incidents": {
+                incident_id: {k: v for k, v in entry.items() if k != "postIds"}
+                for incident_id, entry in manifest.items()
+            },
+            "loaded": list(self.store._loaded.keys()),
+        }
+
+
+async def run_periodically(interval_seconds: float):
+    """
+    Background archival loop started from the app lifespan when
+    ARCHIVE_INTERVAL_MINUTES is set.
+    """
+    service = ArchiveService()
+    while True:
+        try:
+            started = time.perf_counter()
+            archived = await service.archive_resolved()
+            if archived:
+                print(f"[Archive] Archived {len(archived)} incidents in {time.perf_counter() - started:.1f}s")
+        except Exception as e:
+            print(f"[Archive] Error: {e}")
+        await asyncio.sleep(interval_seconds)
@@ -0,0 +1,151 @@
+"""
+Automatic parent attribution for posts that arrive without lineage.
+
+Each incident keeps a sliding window of its ``ATTRIBUTION_WINDOW`` most
+recent posts in an inverted index (normalized word -> posts containing it).
+To propose a parent for a new text:
+
+  1. candidates are the window posts sharing words with it, ranked by
+     IDF-weighted overlap; words present in most of the window carry no
+     signal and are skipped, so only short posting lists are walked;
+  2. the top ``ATTRIBUTION_CANDIDATES`` are compared by Levenshtein ratio;
+  3. the best one at or above ``ATTRIBUTION_MIN_CONFIDENCE`` is proposed,
+     with the ratio as its confidence.
+
+The cost per insert depends on the window and candidate limits, not on the
+size of the incident. A window is filled from the database the first time an
+incident is seen in this process, and from then on by the ingest hooks.
+"""
+import math
+import os
+import re
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from services import text_compare
+from services.content_hash import normalize
+from services.metrics import registry
+
+ATTRIBUTION_ENABLED = os.getenv("ATTRIBUTION_ENABLED", "true").lower() in ("1", "true", "yes")
+WINDOW = int(os.getenv("ATTRIBUTION_WINDOW", "500"))
+CANDIDATES = int(os.getenv("ATTRIBUTION_CANDIDATES", "20"))
+MIN_CONFIDENCE = float(os.getenv("ATTRIBUTION_MIN_CONFIDENCE", "0.55"))
+MAX_INCIDENTS = int(os.getenv("ATTRIBUTION_MAX_INCIDENTS", "1000"))
+# Words in more than this share of a window (of at least STOP_MIN_POSTS
+# posts) are ignored when gathering candidates
+STOP_SHARE = 0.5
+STOP_MIN_POSTS = 20
+
+_WORD = re.compile(r"\w{3,}")
+
+ATTRIBUTIONS = registry.counter(
+    "factsaura_parent_attributions_total",
+    "Parent proposals for posts without resolvable lineage (attributed or none).",
+    ["outcome"],
+)
+
+
+def tokens(content: str) -> Set[str]:
+    return set(_WORD.findall(normalize(content)))
+
+
+class IncidentWindow:
+    def __init__(self, size: int = WINDOW):
+        self.size = size
+        # post id -> (content, tokens, arrival number), oldest first
+        self.posts: "OrderedDict[str, Tuple[str, Set[str], int]]" = OrderedDict()
+        self.postings: Dict[str, Set[str]] = defaultdict(set)
+        self.arrivals = 0
+
+    def add(self, post_id: str, content: str):
+        if post_id in self.posts:
+            return
+        words = tokens(content)
+        self.arrivals += 1
+        self.posts[post_id] = (content, words, self.arrivals)
+        for word in words:
+            self.postings[word].add(post_id)
+        if len(self.posts) > self.size:
+            old_id, (_, old_words, _) = self.posts.popitem(last=False)
+            for word in old_words:
+                ids = self.postings[word]
+                ids.discard(old_id)
+                if not ids:
+                    del self.postings[word]
+
+    def candidates(self, words: Set[str], limit: int) -> List[str]:
+        total = len(self.posts)
+        if not total:
+            return []
+        scores: Dict[str, float] = defaultdict(float)
+        for word in words:
+            ids = self.postings.get(word)
+            if not ids or (total >= STOP_MIN_POSTS and len(ids) > total * STOP_SHARE):
+                continue
+            weight = math.log(1 + total / len(ids))
+            for post_id in ids:
+                scores[post_id] += weight
+        # Highest overlap first; among equals the most recent post
+        return sorted(scores, key=lambda p: (scores[p], self.posts[p][2]), reverse=True)[:limit]
+
+
+class AttributionIndex:
+    def __init__(self, window: int = WINDOW, max_incidents: int = MAX_INCIDENTS):
+        self.window = window
+        self.max_incidents = max_incidents
+        self._incidents: "OrderedDict[str, IncidentWindow]" = OrderedDict()
+
+    def _window(self, incident_id: str) -> IncidentWindow:
+        window = self._incidents.get(incident_id)
+        if window is None:
+            window = self._incidents[incident_id] = IncidentWindow(self.window)
+            if len(self._incidents) > self.max_incidents:
+                self._incidents.popitem(last=False)
+        self._incidents.move_to_end(incident_id)
+        return window
+
+    async def _warm(self, db, incident_id: str) -> IncidentWindow:
+        if incident_id in self._incidents or db is None:
+            return self._window(incident_id)
+        recent = await db.post.find_many(
+            where={"incidentId": incident_id}, order={"timestamp": "desc"}, take=self.window
+        )
+        window = self._window(incident_id)
+        for post in reversed(recent):
+            window.add(post.id, post.content)
+        return window
+
+    def add(self, incident_id: str, post_id: str, content: str):
+        self._window(incident_id).add(post_id, content)
+
+    async def propose(self, db, incident_id: str, content: str,
+                      min_confidence: float = MIN_CONFIDENCE) -> Optional[Dict[str, Any]]:
+        """
+        {"parentId", "confidence", "candidates"} for the most likely parent of
+        ``content`` among the incident's recent posts, or None.
+        """
+        window = await self._warm(db, incident_id)
+        ids = window.candidates(tokens(content), CANDIDATES)
+        if not ids:
+            ATTRIBUTIONS.inc(outcome="none")
+            return None
+        texts = [window.posts[post_id][0] for post_id in ids]
+        scored = sorted(
+            ((ids[i], ratio) for i, ratio in await text_compare.find_similar(content, texts, 0.0)),
+            key=lambda item: item[1], reverse=True,
+        )
+        if not scored or scored[0][1] < min_confidence:
+            ATTRIBUTIONS.inc(outcome="none")
+            return None
+        ATTRIBUTIONS.inc(outcome="attributed")
+        return {
+            "parentId": scored[0][0],
+            "confidence": round(scored[0][1], 4),
+            "candidates": [{"id": post_id, "similarity": round(ratio, 4)} for post_id, ratio in scored[:5]],
+        }
+
+    def reset(self):
+        self._incidents.clear()
+
+
+index = AttributionIndex()
@@ -1,5 +1,8 @@
+import time
 from fastapi import WebSocket
 from typing import List, Dict
+from services.metrics import BROADCAST_DURATION, BROADCAST_RECIPIENTS, WEBSOCKET_CONNECTIONS
+from services.serialization import dumps
 
 class ConnectionManager:
     def __init__(self):
@@ -11,21 +14,29 @@ class ConnectionManager:
         if incident_id not in self.active_connections:
             self.active_connections[incident_id] = []
         self.active_connections[incident_id].append(websocket)
+        WEBSOCKET_CONNECTIONS.inc()
 
     def disconnect(self, websocket: WebSocket, incident_id: str):
         if incident_id in self.active_connections:
             if websocket in self.active_connections[incident_id]:
                 self.active_connections[incident_id].remove(websocket)
+                WEBSOCKET_CONNECTIONS.dec()
             if not self.active_connections[incident_id]:
                 del self.active_connections[incident_id]
 
     async def broadcast(self, message: dict, incident_id: str):
         if incident_id in self.active_connections:
-            for connection in self.active_connections[incident_id]:
+            start = time.perf_counter()
+            # Serialize once and reuse the same frame for every subscriber
+            text = dumps(message).decode("utf-8")
+            for connection in list(self.active_connections[incident_id]):
                 try:
-                    await connection.send_json(message)
+                    await connection.send_text(text)
+                    BROADCAST_RECIPIENTS.inc(outcome="sent")
                 except Exception as e:
+                    BROADCAST_RECIPIENTS.inc(outcome="error")
                     print(f"Error broadcasting to {incident_id}: {e}")
                     # Cleanup might be needed here in a robust system
+            BROADCAST_DURATION.observe(time.perf_counter() - start)
 
 manager = ConnectionManager()
@@ -0,0 +1,57 @@
+"""
+Normalized content hashes for exact-duplicate detection.
+
+Two posts are copies when their text matches after normalization:
+Unicode NFKC, case folding, leading retweet markers ("RT @user:")
+removed and whitespace collapsed. The hash is stored in
+``Post.contentHash`` (indexed), so finding every copy of a text is one
+index lookup instead of a similarity scan.
+"""
+import hashlib
+import re
+import unicodedata
+from collections import OrderedDict
+from typing import Generic, Optional, TypeVar
+
+from services.metrics import record_cache
+
+_RETWEET_PREFIX = re.compile(r"^(?:rt\s+@\w+\s*:?\s*)+", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+T = TypeVar("T")
+
+
+def normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text or "").casefold().strip()
+    text = _RETWEET_PREFIX.sub("", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def content_hash(text: str) -> str:
+    return hashlib.blake2b(normalize(text).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class VerdictCache(Generic[T]):
+    """
+    Bounded LRU of results keyed by content hash (or a tuple including it).
+    """
+    def __init__(self, name: str, max_entries: int = 10000):
+        self.name = name
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, T]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[T]:
+        value = self._entries.get(key)
+        record_cache(self.name, value is not None)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: T):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
@@ -0,0 +1,201 @@
+"""
+Materialized per-author credibility.
+
+The ``Author`` table aggregates, per ``Post.author``: posts, classified posts,
+fabrications and credibility votes. It is kept current incrementally by
+``PostService.create_post`` / ``vote_on_post``, the scanner and the
+publisher (atomic ``increment`` upserts, never a scan over posts).
+
+``score`` is a Postgres generated column, so it is always consistent with the
+counters and indexed for top-k queries. It is Bayesian-smoothed so authors
+with a handful of posts or votes sit near the prior instead of the extremes:
+
+    credibility = (credibleVotes + W * PRIOR_CREDIBILITY) / (totalVotes + W)
+    fabrication = (fabricationCount + W * PRIOR_FABRICATION) / (classifiedCount + W)
+    score       = credibility * (1 - fabrication)
+
+The priors are fixed in the migration that defines the column; ``smoothed``
+below mirrors it for rows that haven't been read back from Postgres.
+
+Lookups for scorecards go through a bounded in-process TTL cache, refreshed
+by the writes this process makes.
+"""
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+from services.metrics import instrument_prisma, record_cache
+
+PRIOR_WEIGHT = 10.0
+PRIOR_CREDIBILITY = 0.5
+PRIOR_FABRICATION = 0.1
+
+CACHE_SIZE = int(os.getenv("AUTHOR_CACHE_SIZE", "10000"))
+CACHE_TTL = float(os.getenv("AUTHOR_CACHE_TTL", "60"))
+
+def smoothed(row) -> float:
+    credibility = (row.credibleVotes + PRIOR_WEIGHT * PRIOR_CREDIBILITY) / (row.totalVotes + PRIOR_WEIGHT)
+    fabrication = (row.fabricationCount + PRIOR_WEIGHT * PRIOR_FABRICATION) / (row.classifiedCount + PRIOR_WEIGHT)
+    return credibility * (1.0 - fabrication)
+
+
+def summary(row) -> Dict[str, Any]:
+    return {
+        "name": row.name,
+        "postCount": row.postCount,
+        "fabricationRate": round(row.fabricationCount / row.classifiedCount, 4) if row.classifiedCount else None,
+        "voteCredibility": round(row.credibleVotes / row.totalVotes, 4) if row.totalVotes else None,
+        "totalVotes": row.totalVotes,
+        "score": round(smoothed(row), 4),
+    }
+
+
+class _AuthorCache:
+    def __init__(self, max_entries: int = CACHE_SIZE, ttl: float = CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # name -> (expires_at, summary or None for unknown authors)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, name: str):
+        entry = self._entries.get(name)
+        hit = entry is not None and entry[0] > time.monotonic()
+        record_cache("author_credibility", hit)
+        if not hit:
+            return False, None
+        self._entries.move_to_end(name)
+        return True, entry[1]
+
+    def put(self, name: str, value: Optional[Dict[str, Any]]):
+        self._entries[name] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(name)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+cache = _AuthorCache()
+
+
+async def _bump(db, author: Optional[str], **deltas: int):
+    deltas = {k: v for k, v in deltas.items() if v}
+    if not author or not deltas:
+        return
+    row = await db.author.upsert(
+        where={"name": author},
+        data={
+            "create": {"name": author, **deltas},
+            "update": {k: {"increment": v} for k, v in deltas.items()},
+        },
+    )
+    cache.put(author, summary(row))
+
+
+async def record_post(db, author: str, mutation_type: Optional[str] = None):
+    await _bump(
+        db, author,
+        postCount=1,
+        classifiedCount=1 if mutation_type else 0,
+        fabricationCount=1 if mutation_type == "FABRICATION" else 0,
+    )
+
+
+async def record_classification(db, author: str, old_type: Optional[str], new_type: Optional[str]):
+    """
+    Applies a (re)classification as a delta, so re-publishing a post is a no-op.
+    """
+    await _bump(
+        db, author,
+        classifiedCount=int(bool(new_type)) - int(bool(old_type)),
+        fabricationCount=int(new_type == "FABRICATION") - int(old_type == "FABRICATION"),
+    )
+
+
+async def record_vote(db, author: str, is_credible: bool):
+    await _bump(db, author, totalVotes=1, credibleVotes=1 if is_credible else 0)
+
+
+async def lookup_many(db, names: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    Credibility summaries by author, from the cache; misses are fetched in
+    one query. Authors without a row map to None.
+    """
+    found: Dict[str, Optional[Dict[str, Any]]] = {}
+    missing = []
+    for name in dict.fromkeys(names):
+        hit, value = cache.get(name)
+        if hit:
+            found[name] = value
+        else:
+            missing.append(name)
+    if missing:
+        rows = {row.name: summary(row) for row in await db.author.find_many(where={"name": {"in": missing}})}
+        for name in missing:
+            found[name] = rows.get(name)
+            cache.put(name, found[name])
+    return found
+
+
+async def top(db, k: int = 20, min_posts: int = 1, ascending: bool = False) -> List[Dict[str, Any]]:
+    rows = await db.author.find_many(
+        where={"postCount": {"gte": min_posts}},
+        order={"score": "asc" if ascending else "desc"},
+        take=k,
+    )
+    return [summary(row) for row in rows]
+
+
+async def rebuild(db) -> int:
+    """
+    Recomputes every author from the Post table (backfill or repair).
+    """
+    count = await db.execute_raw(
+        """
+        INSERT INTO "Author" ("name", "postCount", "classifiedCount", "fabricationCount",
+                              "credibleVotes", "totalVotes", "updatedAt")
+        SELECT "author", COUNT(*), COUNT("mutationType"),
+               COUNT(*) FILTER (WHERE "mutationType" = 'FABRICATION'),
+               COALESCE(SUM("credibleVotes"), 0), COALESCE(SUM("totalVotes"), 0), now()
+        FROM "Post" GROUP BY "author"
+        ON CONFLICT ("name") DO UPDATE SET
+            "postCount" = EXCLUDED."postCount",
+            "classifiedCount" = EXCLUDED."classifiedCount",
+            "fabricationCount" = EXCLUDED."fabricationCount",
+            "credibleVotes" = EXCLUDED."credibleVotes",
+            "totalVotes" = EXCLUDED."totalVotes",
+            "updatedAt" = now()
+        """
+    )
+    cache.clear()
+    return count
+
+
+class AuthorService:
+    def __init__(self, db=None):
+        if db is None:
+            from prisma import Prisma
+            db = instrument_prisma(Prisma())
+        self.db = db
+
+    async def connect(self):
+        if not self.db.is_connected():
+            await self.db.connect()
+
+    async def disconnect(self):
+        if self.db.is_connected():
+            await self.db.disconnect()
+
+    async def get_author(self, name: str) -> Optional[Dict[str, Any]]:
+        await self.connect()
+        return (await lookup_many(self.db, [name]))[name]
+
+    async def top_authors(self, k: int, min_posts: int, ascending: bool) -> List[Dict[str, Any]]:
+        await self.connect()
+        return await top(self.db, k, min_posts, ascending)
+
+    async def rebuild(self) -> int:
+        await self.connect()
+        return await rebuild(self.db)
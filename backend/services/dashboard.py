@@ -0,0 +1,145 @@
+"""
+One snapshot for the dashboard: demo state, incident summaries and the agent
+log entries a client hasn't seen yet.
+
+Each part is rebuilt only when its ``http_cache`` resource version moves:
+demo state (a query plus a post count) on ``DEMO`` bumps, the incident list
+on ``INCIDENTS`` bumps. Agent logs are read from ``agent_manager`` memory by
+``seq`` cursor. The snapshot ``version`` is the validator of all three
+resources, so a client that sends back the version it holds is answered
+without touching the database.
+
+``DashboardPublisher`` pushes the snapshot to ``/api/ws/dashboard``
+subscribers whenever the version changes, checking every
+``DASHBOARD_PUSH_INTERVAL`` seconds (bursts of writes coalesce into one
+push).
+
+The counters only see this process's writes. With ``HTTP_CACHE_ENABLED=false``
+(several workers) nothing is trusted to them: every snapshot rebuilds its
+parts, the ``version`` shortcut is skipped, and the publisher compares
+snapshot contents instead of versions.
+"""
+import asyncio
+import hashlib
+import os
+from typing import Any, Dict, List, Optional
+
+from models.incident import IncidentResponse
+from services import http_cache
+from services.agent_manager import agent_manager
+from services.metrics import record_cache
+from services.serialization import dumps
+
+DASHBOARD_PUSH_INTERVAL = float(os.getenv("DASHBOARD_PUSH_INTERVAL", "1.0"))
+
+CHANNEL = "dashboard"
+KEYS = (http_cache.DEMO, http_cache.INCIDENTS, http_cache.AGENT_LOGS)
+
+
+def version() -> str:
+    etag, _ = http_cache.versions.validators(KEYS)
+    return etag[3:-1]
+
+
+class Dashboard:
+    def __init__(self, demo_service, incident_service, agents=agent_manager):
+        self.demo_service = demo_service
+        self.incident_service = incident_service
+        self.agents = agents
+        # part -> (validator it was built at, value)
+        self._parts: Dict[str, tuple] = {}
+        self._lock = asyncio.Lock()
+
+    async def _part(self, key: str, build) -> Any:
+        if not http_cache.HTTP_CACHE_ENABLED:
+            return await build()
+        token, _ = http_cache.versions.validators([key])
+        cached = self._parts.get(key)
+        hit = cached is not None and cached[0] == token
+        record_cache(f"dashboard_{key}", hit)
+        if hit:
+            return cached[1]
+        # The token is taken before the rebuild: a write landing meanwhile
+        # leaves the part stale for one call, never stuck
+        value = await build()
+        self._parts[key] = (token, value)
+        return value
+
+    async def _incidents(self) -> List[Dict[str, Any]]:
+        incidents = await self.incident_service.get_all_incidents()
+        return [IncidentResponse.model_validate(incident).model_dump(mode="json") for incident in incidents]
+
+    async def snapshot(self, cursor: int = 0) -> Dict[str, Any]:
+        current = version()
+        # Concurrent pollers after a change share one rebuild
+        async with self._lock:
+            demo = await self._part(http_cache.DEMO, self.demo_service.get_state)
+            incidents = await self._part(http_cache.INCIDENTS, self._incidents)
+        return {
+            "version": current,
+            "demo": demo,
+            "incidents": incidents,
+            "agentRunning": self.agents.is_running,
+            "logs": self.agents.logs_since(cursor),
+            "cursor": self.agents.log_seq,
+        }
+
+    def reset(self):
+        self._parts.clear()
+
+
+class DashboardPublisher:
+    def __init__(self, dashboard: Dashboard, interval: float = DASHBOARD_PUSH_INTERVAL):
+        self.dashboard = dashboard
+        self.interval = interval
+        self._version: Optional[str] = None
+        # Content digest of the last push (HTTP_CACHE_ENABLED=false)
+        self._digest: Optional[str] = None
+        self._cursor = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def publish(self) -> bool:
+        """
+        Broadcasts the snapshot if it changed since the last push; the logs
+        it carries are those added since then.
+        """
+        from services.connection_manager import manager
+
+        if CHANNEL not in manager.active_connections:
+            return False
+        if http_cache.HTTP_CACHE_ENABLED:
+            if version() == self._version:
+                return False
+            snapshot = await self.dashboard.snapshot(self._cursor)
+        else:
+            snapshot = await self.dashboard.snapshot(self._cursor)
+            digest = hashlib.blake2b(
+                dumps([snapshot["demo"], snapshot["incidents"], snapshot["agentRunning"]]), digest_size=16
+            ).hexdigest()
+            if digest == self._digest and not snapshot["logs"]:
+                return False
+            self._digest = digest
+        self._version, self._cursor = snapshot["version"], snapshot["cursor"]
+        await manager.broadcast({"type": "dashboard", **snapshot}, CHANNEL)
+        return True
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.publish()
+            except Exception as e:
+                print(f"[Dashboard] Push failed: {e}")
@@ -1,17 +1,25 @@
 import json
 from typing import Dict, Any
-from prisma import Prisma
+from services import analysis_service, archive, attribution, credibility, entity_cache, http_cache, narratives, replay, tree_layout, velocity
+from services.metrics import instrument_prisma
 from pathlib import Path
 
 class DemoService:
-    def __init__(self):
-        self.db = Prisma()
+    def __init__(self, db=None):
+        if db is None:
+            from prisma import Prisma
+            db = instrument_prisma(Prisma())
+        self.db = db
         self.simulation_data_path = Path(__file__).parent.parent / "data" / "simulation_data.json"
 
     async def connect(self):
         if not self.db.is_connected():
             await self.db.connect()
 
+    async def disconnect(self):
+        if self.db.is_connected():
+            await self.db.disconnect()
+
     async def get_state(self) -> Dict[str, Any]:
         """Get current demo state"""
         await self.connect()
@@ -60,6 +68,8 @@ class DemoService:
                 }
             )
 
+        http_cache.bump(http_cache.DEMO)
+
     async def pause(self):
         """Pause the demo simulation"""
         await self.connect()
@@ -80,6 +90,8 @@ class DemoService:
                 }
             )
 
+        http_cache.bump(http_cache.DEMO)
+
     async def resume(self):
         """Resume the demo simulation"""
         await self.connect()
@@ -100,6 +112,8 @@ class DemoService:
                 }
             )
 
+        http_cache.bump(http_cache.DEMO)
+
     async def reset(self):
         """Reset demo - flush DB and re-seed with simulation data"""
         await self.connect()
@@ -108,7 +122,9 @@ class DemoService:
         await self.db.comment.delete_many()
         await self.db.post.delete_many()
         await self.db.incident.delete_many()
+        await self.db.author.delete_many()
         await self.db.demostate.delete_many()
+        await self.db.ingestshard.delete_many()
         
         # Re-seed with simulation data
         await self._seed_simulation_data()
@@ -121,6 +137,16 @@ class DemoService:
                 "currentPosition": 0
             }
         )
+        http_cache.bump_all()
+        velocity.tracker.reset()
+        narratives.engine.reset()
+        credibility.cache.clear()
+        entity_cache.clear()
+        attribution.index.reset()
+        archive.store.clear()
+        replay.snapshots.clear()
+        tree_layout.layouts.reset()
+        analysis_service.clear_verdicts()
 
     async def _seed_simulation_data(self):
         """Seed database with simulation data"""
@@ -0,0 +1,153 @@
+"""
+Read-through cache for Post and Incident rows by id.
+
+Single-row lookups (post detail, parent fetches while scoring mutations and
+building diffs, incident detail) go through ``posts`` / ``incidents``:
+
+  - bounded LRU (``ENTITY_CACHE_SIZE`` rows per cache), each entry expiring
+    after ``ENTITY_CACHE_TTL`` seconds so other workers' writes show up;
+  - concurrent misses for the same id share one query, run in a task of
+    its own so a cancelled caller doesn't fail the others;
+  - ``get_many`` answers what it can from memory and fetches the rest in a
+    single ``id in`` query;
+  - writers in this process ``put`` the row the write returned, or
+    ``invalidate`` ids whose rows they don't have; a load that was already
+    in flight when that happened doesn't cache its (older) row.
+
+Post content never changes, so parent lookups are almost always hits; the
+mutable counters (votes, comments, verdicts) are refreshed by the writes.
+Missing rows are not cached. Hits and misses are exported as
+``factsaura_cache_requests_total{cache="post"|"incident"}``.
+"""
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from services.metrics import record_cache
+
+ENTITY_CACHE_SIZE = int(os.getenv("ENTITY_CACHE_SIZE", "20000"))
+ENTITY_CACHE_TTL = float(os.getenv("ENTITY_CACHE_TTL", "30"))
+
+
+def _retrieve(task: asyncio.Task):
+    # Every caller may have been cancelled: mark the error as seen
+    if not task.cancelled():
+        task.exception()
+
+
+class EntityCache:
+    def __init__(self, name: str, max_entries: int = ENTITY_CACHE_SIZE, ttl: float = ENTITY_CACHE_TTL):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # id -> (expires_at, row)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._loading: Dict[str, asyncio.Task] = {}
+        # Per-key generation, bumped by put / invalidate / clear while a load
+        # of the key is in flight; the load only caches its row if it's unchanged
+        self._generations: Dict[str, int] = {}
+
+    def _lookup(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    async def get(self, key: str, load: Callable[[str], Awaitable[Optional[Any]]]) -> Optional[Any]:
+        row = self._lookup(key)
+        record_cache(self.name, row is not None)
+        if row is not None:
+            return row
+        # The query runs in its own task, so cancelling one caller (a client
+        # disconnect) doesn't cancel it for the others sharing it
+        task = self._loading.get(key)
+        if task is None:
+            self._generations[key] = 0
+            task = asyncio.ensure_future(self._load(key, load))
+            task.add_done_callback(_retrieve)
+            self._loading[key] = task
+        return await asyncio.shield(task)
+
+    async def _load(self, key: str, load: Callable[[str], Awaitable[Optional[Any]]]) -> Optional[Any]:
+        try:
+            row = await load(key)
+        finally:
+            self._loading.pop(key, None)
+            written = self._generations.pop(key, 0)
+        if row is not None and not written:
+            self.put(row, key)
+        return row
+
+    def _bump(self, key: str):
+        if key in self._generations:
+            self._generations[key] += 1
+
+    async def get_many(self, keys: Iterable[str],
+                       load_many: Callable[[List[str]], Awaitable[List[Any]]]) -> Dict[str, Any]:
+        """
+        Rows by id for every key that exists; misses are loaded in one call.
+        """
+        found: Dict[str, Any] = {}
+        missing = []
+        for key in dict.fromkeys(keys):
+            row = self._lookup(key)
+            record_cache(self.name, row is not None)
+            if row is not None:
+                found[key] = row
+            else:
+                missing.append(key)
+        if missing:
+            for row in await load_many(missing):
+                self.put(row)
+                found[row.id] = row
+        return found
+
+    def put(self, row: Any, key: Optional[str] = None):
+        if row is None:
+            return
+        key = key or row.id
+        self._bump(key)
+        self._entries[key] = (time.monotonic() + self.ttl, row)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, *keys: str):
+        for key in keys:
+            self._bump(key)
+            self._entries.pop(key, None)
+
+    def clear(self):
+        for key in self._generations:
+            self._generations[key] += 1
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+posts = EntityCache("post")
+incidents = EntityCache("incident")
+
+
+async def get_post(db, post_id: str):
+    return await posts.get(post_id, lambda key: db.post.find_unique(where={"id": key}))
+
+
+async def get_posts(db, post_ids: Iterable[str]) -> Dict[str, Any]:
+    return await posts.get_many(post_ids, lambda keys: db.post.find_many(where={"id": {"in": keys}}))
+
+
+async def get_incident(db, incident_id: str):
+    return await incidents.get(incident_id, lambda key: db.incident.find_unique(where={"id": key}))
+
+
+def clear():
+    posts.clear()
+    incidents.clear()
@@ -0,0 +1,102 @@
+"""
+Shared executor for CPU-bound work that must not run on the event loop.
+
+``CPU_EXECUTOR`` picks the backend:
+  process (default) - ProcessPoolExecutor, true parallelism for pure-Python
+                      work such as difflib;
+  thread            - ThreadPoolExecutor, enough for C code that releases
+                      the GIL and cheaper to hand data to;
+  inline            - run on the loop (tests, tiny deployments).
+
+``CPU_WORKERS`` sizes the pool. Callers decide per call whether the work is
+big enough to be worth the hand-off (see ``services.text_compare``).
+"""
+import asyncio
+import functools
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Sequence, TypeVar
+
+from services.metrics import registry
+
+CPU_EXECUTOR = os.getenv("CPU_EXECUTOR", "process").lower()
+CPU_WORKERS = int(os.getenv("CPU_WORKERS", str(max(1, min(4, os.cpu_count() or 1)))))
+
+CPU_TASKS = registry.counter(
+    "factsaura_cpu_tasks_total",
+    "CPU-bound operations by where they ran.",
+    ["operation", "mode"],
+)
+
+T = TypeVar("T")
+
+_executor: Optional[Executor] = None
+
+
+def get_executor() -> Optional[Executor]:
+    """
+    Returns the shared pool, creating it on first use (None in inline mode).
+    """
+    global _executor
+    if CPU_EXECUTOR == "inline":
+        return None
+    if _executor is None:
+        if CPU_EXECUTOR == "thread":
+            _executor = ThreadPoolExecutor(max_workers=CPU_WORKERS, thread_name_prefix="cpu")
+        else:
+            # forkserver/spawn avoid forking a process that already runs the
+            # event loop, Prisma engine pipes and helper threads
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            _executor = ProcessPoolExecutor(max_workers=CPU_WORKERS, mp_context=context)
+    return _executor
+
+
+def start():
+    """
+    Creates the pool eagerly (from the app lifespan) so the first big
+    request doesn't pay for worker start-up.
+    """
+    executor = get_executor()
+    if isinstance(executor, ProcessPoolExecutor):
+        # Submitting a no-op forces the workers to spawn now
+        for _ in range(CPU_WORKERS):
+            executor.submit(int)
+
+
+def shutdown():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def run_cpu(operation: str, fn: Callable[..., T], *args: Any, offload: bool = True) -> T:
+    """
+    Runs ``fn(*args)`` on the shared executor, or inline when ``offload`` is
+    False or no executor is configured. ``fn`` must be picklable (module-level)
+    for the process backend.
+    """
+    executor = get_executor() if offload else None
+    if executor is None:
+        CPU_TASKS.inc(operation=operation, mode="inline")
+        return fn(*args)
+    CPU_TASKS.inc(operation=operation, mode=CPU_EXECUTOR)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(fn, *args))
+
+
+async def map_chunks(
+    operation: str,
+    fn: Callable[..., List[T]],
+    items: Sequence[Any],
+    chunk_size: int,
+    *args: Any,
+) -> List[List[T]]:
+    """
+    Splits ``items`` into chunks and runs ``fn(chunk, *args)`` for each chunk
+    concurrently on the executor. Results come back in chunk order.
+    """
+    chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+    return await asyncio.gather(*(run_cpu(operation, fn, chunk, *args) for chunk in chunks))
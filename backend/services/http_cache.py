@@ -0,0 +1,116 @@
+"""
+Resource version counters backing ETag / Last-Modified on polled endpoints.
+
+Every write bumps the counters of the resources it changes (``bump``); a GET
+computes its validator from those counters *before* touching the database,
+so an unchanged poll is answered with 304 without a query or serialization.
+
+Counters live in process memory and assume the single-worker deployment the
+agent loop already requires; set ``HTTP_CACHE_ENABLED=false`` when running
+several workers behind one URL.
+"""
+import hashlib
+import os
+import time
+import uuid
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from fastapi import Request, Response
+
+HTTP_CACHE_ENABLED = os.getenv("HTTP_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+
+INCIDENTS = "incidents"
+DEMO = "demo"
+AGENT_LOGS = "agent_logs"
+
+
+def incident_posts(incident_id: str) -> str:
+    return f"posts:{incident_id}"
+
+
+class ResourceVersions:
+    def __init__(self):
+        # A fresh boot id keeps validators from a previous process from matching
+        self.boot_id = uuid.uuid4().hex[:8]
+        self._versions: Dict[str, int] = {}
+        self._modified: Dict[str, float] = {}
+        self._epoch = 0
+        self._epoch_modified = time.time()
+
+    def bump(self, *keys: str):
+        now = time.time()
+        for key in keys:
+            self._versions[key] = self._versions.get(key, 0) + 1
+            self._modified[key] = now
+
+    def bump_all(self):
+        """
+        Invalidates every resource at once (e.g. after a demo reset).
+        """
+        self._epoch += 1
+        self._epoch_modified = time.time()
+
+    def version(self, key: str) -> int:
+        return self._versions.get(key, 0)
+
+    def validators(self, keys: Iterable[str]) -> Tuple[str, float]:
+        keys = list(keys)
+        token = f"{self.boot_id}:{self._epoch}:" + ",".join(f"{k}={self.version(k)}" for k in keys)
+        etag = 'W/"' + hashlib.blake2b(token.encode(), digest_size=8).hexdigest() + '"'
+        # Process start counts as the last modification of untouched resources
+        modified = max([self._epoch_modified] + [self._modified.get(k, 0.0) for k in keys])
+        return etag, modified
+
+
+versions = ResourceVersions()
+
+
+def bump(*keys: str):
+    versions.bump(*keys)
+
+
+def bump_all():
+    versions.bump_all()
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    candidates = [c.strip() for c in header.split(",")]
+    # Weak comparison: W/"x" and "x" are equivalent for GET
+    bare = etag[2:] if etag.startswith("W/") else etag
+    return any(c == etag or c == bare or c.removeprefix("W/") == bare for c in candidates)
+
+
+def not_modified(request: Request, response: Response, *keys: str) -> Optional[Response]:
+    """
+    Sets ETag/Last-Modified on ``response`` and returns a 304 response when
+    the client's validators are current; returns None if the body is needed.
+    """
+    if not HTTP_CACHE_ENABLED:
+        return None
+
+    etag, modified = versions.validators(keys)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(modified, usegmt=True),
+        "Cache-Control": "no-cache",
+    }
+    response.headers.update(headers)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+        return None
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return None
+        if int(modified) <= since:
+            return Response(status_code=304, headers=headers)
+    return None
@@ -1,10 +1,15 @@
-from prisma import Prisma
-from typing import List, Optional
+from services import archive, entity_cache, http_cache, tree_layout
+from services.metrics import instrument_prisma
+from typing import Any, Dict, List, Optional
 from models.incident import IncidentCreate, IncidentUpdate
+from models.post import PostResponse
 
 class IncidentService:
-    def __init__(self):
-        self.db = Prisma()
+    def __init__(self, db=None):
+        if db is None:
+            from prisma import Prisma
+            db = instrument_prisma(Prisma())
+        self.db = db
 
     async def connect(self):
         if not self.db.is_connected():
@@ -44,11 +49,11 @@ class IncidentService:
 
     async def get_incident_by_id(self, incident_id: str) -> Optional[dict]:
         await self.connect()
-        return await self.db.incident.find_unique(where={"id": incident_id})
+        return await entity_cache.get_incident(self.db, incident_id)
 
     async def create_incident(self, data: IncidentCreate) -> dict:
         await self.connect()
-        return await self.db.incident.create(
+        incident = await self.db.incident.create(
             data={
                 "title": data.title,
                 "severity": data.severity,
@@ -56,6 +61,9 @@ class IncidentService:
                 "status": data.status
             }
         )
+        entity_cache.incidents.put(incident)
+        http_cache.bump(http_cache.INCIDENTS)
+        return incident
 
     async def update_incident(self, incident_id: str, data: IncidentUpdate) -> Optional[dict]:
         await self.connect()
@@ -63,7 +71,27 @@ class IncidentService:
         if not update_data:
             return await self.get_incident_by_id(incident_id)
             
-        return await self.db.incident.update(
+        incident = await self.db.incident.update(
             where={"id": incident_id},
             data=update_data
         )
+        entity_cache.incidents.put(incident)
+        http_cache.bump(http_cache.INCIDENTS)
+        return incident
+
+    async def get_layout(self, incident_id: str, x0: Optional[float] = None, y0: Optional[float] = None,
+                         x1: Optional[float] = None, y1: Optional[float] = None,
+                         include_posts: bool = False) -> Dict[str, Any]:
+        await self.connect()
+        layout = await tree_layout.layouts.get(self.db, incident_id)
+        result = tree_layout.view(layout, x0, y0, x1, y1)
+        if include_posts:
+            ids = [node["id"] for node in result["nodes"]]
+            if archive.store.is_archived(incident_id):
+                rows = {post.id: post for post in await archive.store.posts(incident_id)}
+            else:
+                rows = await entity_cache.get_posts(self.db, ids)
+            for node in result["nodes"]:
+                row = rows.get(node["id"])
+                node["post"] = PostResponse.model_validate(row).model_dump() if row else None
+        return {"incidentId": incident_id, **result}
@@ -0,0 +1,344 @@
+"""
+Simulation ingest sharded by incident.
+
+Posts are partitioned over ``INGEST_SHARDS`` shards by a stable hash of
+their incident id, so every post of an incident lands in the same shard and
+each shard replays its posts in feed order: ordering holds within an
+incident, and incidents in different shards proceed in parallel.
+
+Each shard has its own cursor, an ``IngestShard`` row (id
+``<shard count>:<index>``) written in the same transaction as the post it
+advances past, like the single scanner cursor. A worker owns a shard through
+a lease on that row (``lockedBy`` / ``lockedUntil``, renewed by every
+checkpoint), so any mix of async workers and processes can run against one
+database without two of them replaying the same shard; a crashed owner's
+shard is picked up once its lease passes. Post inserts skip existing ids, so
+the posts replayed after a takeover are not duplicated.
+
+With ``INGEST_SHARDS > 1`` the agent loop runs one async worker per shard,
+paced by the replay clock. Async workers share one core; to spread a load
+test over cores run the shards in processes:
+
+    python -m services.ingest_shards --shards 8 --processes 4 --data data/bench.json
+"""
+import asyncio
+import hashlib
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from services.metrics import registry
+
+INGEST_SHARDS = int(os.getenv("INGEST_SHARDS", "1"))
+INGEST_LEASE_SECONDS = float(os.getenv("INGEST_LEASE_SECONDS", "30"))
+
+SHARD_POSTS = registry.counter(
+    "factsaura_ingest_shard_posts_total",
+    "Posts ingested by sharded workers.",
+    ["shard"],
+)
+
+Runner = Callable[..., Awaitable[Any]]
+
+
+class LeaseLost(Exception):
+    pass
+
+
+def shard_of(incident_id: Optional[str], shards: int) -> int:
+    digest = hashlib.blake2b((incident_id or "").encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % shards
+
+
+def partition(posts: List[Dict[str, Any]], shards: int) -> List[List[int]]:
+    """
+    Feed indexes of each shard's posts, in feed order.
+    """
+    parts: List[List[int]] = [[] for _ in range(shards)]
+    for index, post in enumerate(posts):
+        parts[shard_of(post.get("incidentId"), shards)].append(index)
+    return parts
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class ShardCursor:
+    def __init__(self, db, shard_id: str, owner: str, lease: float = INGEST_LEASE_SECONDS):
+        self.db = db
+        self.id = shard_id
+        self.owner = owner
+        self.lease = lease
+        self.position = 0
+        self.checkpointed = 0
+        self.held = False
+        self._expires = 0.0
+
+    async def claim(self) -> bool:
+        """
+        Takes the shard if it is free, ours, or its lease has passed.
+        """
+        await self.db.ingestshard.create_many(data=[{"id": self.id}], skip_duplicates=True)
+        now = _now()
+        claimed = await self.db.ingestshard.update_many(
+            where={"id": self.id, "OR": [{"lockedBy": None}, {"lockedBy": self.owner}, {"lockedUntil": {"lt": now}}]},
+            data={"lockedBy": self.owner, "lockedUntil": now + timedelta(seconds=self.lease)},
+        )
+        if not claimed:
+            return False
+        row = await self.db.ingestshard.find_unique(where={"id": self.id})
+        self.position = self.checkpointed = row.position
+        self.held = True
+        self._expires = time.monotonic() + self.lease
+        return True
+
+    async def save(self, client):
+        """
+        Records the position and renews the lease; raises LeaseLost (rolling
+        back the caller's transaction) if another owner took the shard.
+        """
+        saved = await client.ingestshard.update_many(
+            where={"id": self.id, "lockedBy": self.owner},
+            data={"position": self.position, "lockedUntil": _now() + timedelta(seconds=self.lease)},
+        )
+        if not saved:
+            self.held = False
+            raise LeaseLost(self.id)
+        self.checkpointed = self.position
+        self._expires = time.monotonic() + self.lease
+
+    async def keep_alive(self):
+        # Idle shards (waiting on the clock) renew halfway through the lease
+        if self.held and self._expires - time.monotonic() < self.lease / 2:
+            await self.save(self.db)
+
+    async def release(self):
+        if self.held:
+            await self.db.ingestshard.update_many(
+                where={"id": self.id, "lockedBy": self.owner},
+                data={"lockedBy": None, "lockedUntil": None},
+            )
+            self.held = False
+
+
+class ShardedIngest:
+    def __init__(self, scanner, run: Runner, shards: int = INGEST_SHARDS, clock=None,
+                 offsets: Optional[List[float]] = None, only: Optional[Iterable[int]] = None,
+                 owner: Optional[str] = None, lease: float = INGEST_LEASE_SECONDS):
+        self.scanner = scanner
+        self.db = scanner.db
+        self.run = run
+        self.shards = shards
+        self.clock = clock
+        self.offsets = offsets
+        self.paced = clock is not None
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.lease = lease
+        self.parts = partition(scanner.posts[:scanner.MAX_POSTS_LIMIT], shards)
+        indexes = range(shards) if only is None else only
+        self.cursors = {i: ShardCursor(self.db, f"{shards}:{i}", self.owner, lease) for i in indexes}
+        self._state_id: Optional[str] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def done(self, index: int) -> bool:
+        return self.cursors[index].position >= len(self.parts[index])
+
+    async def _emit(self, index: int):
+        cursor = self.cursors[index]
+        post = self.scanner.posts[self.parts[index][cursor.position]]
+        cursor.position += 1
+        try:
+            await self.run(post, checkpoint=cursor.save)
+        except BaseException:
+            # Unless the post's transaction committed, it is replayed
+            cursor.position = cursor.checkpointed
+            raise
+        SHARD_POSTS.inc(shard=str(index))
+
+    def _wait(self, index: int) -> float:
+        """
+        Wall seconds until the shard's next post is due on the replay clock.
+        """
+        if not self.paced:
+            return 0.0
+        if self.clock.paused:
+            return 1.0
+        due = self.offsets[self.parts[index][self.cursors[index].position]]
+        return max(self.clock.wall_seconds(due - self.clock.now()), 0.0)
+
+    async def _worker(self, index: int):
+        cursor = self.cursors[index]
+        while True:
+            try:
+                if not cursor.held and not await cursor.claim():
+                    # Another worker owns the shard; take over if it stops renewing
+                    await asyncio.sleep(self.lease / 2)
+                    continue
+                wait = 1.0 if self.done(index) else self._wait(index)
+                if wait > 0:
+                    await asyncio.sleep(min(wait, 1.0))
+                    await cursor.keep_alive()
+                    continue
+                await self._emit(index)
+            except asyncio.CancelledError:
+                raise
+            except LeaseLost:
+                print(f"[Ingest] Lost shard {cursor.id} to another worker")
+            except Exception as e:
+                print(f"[Ingest] Shard {cursor.id} failed: {e}")
+                await asyncio.sleep(5)
+
+    async def start(self):
+        if self._tasks:
+            return
+        if not self.db.is_connected():
+            await self.db.connect()
+        for cursor in self.cursors.values():
+            await cursor.claim()
+        self.align()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in self.cursors]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        for cursor in self.cursors.values():
+            try:
+                await cursor.release()
+            except Exception as e:
+                print(f"[Ingest] Could not release shard {cursor.id}: {e}")
+
+    def align(self):
+        """
+        Moves the replay clock to the latest post any held shard has ingested.
+        """
+        if self.clock is None or not self.offsets:
+            return
+        ingested = [self.offsets[self.parts[i][c.position - 1]] for i, c in self.cursors.items() if c.position]
+        self.clock.jump(max(ingested, default=self.offsets[0]))
+
+    async def sync(self, state):
+        """
+        A demo reset (new DemoState row) deletes the shard rows: start over.
+        """
+        if state is None or state.id == self._state_id:
+            return
+        first = self._state_id is None
+        self._state_id = state.id
+        if not first and self._tasks:
+            await self.stop()
+            await self.start()
+
+    async def fast_forward(self) -> Dict[str, Any]:
+        """
+        Lets the running workers ingest the rest of their shards unpaced.
+        """
+        start = time.perf_counter()
+        before = sum(c.position for c in self.cursors.values())
+        self.paced = False
+        try:
+            while self._tasks and not all(self.done(i) for i, c in self.cursors.items() if c.held):
+                await asyncio.sleep(0.05)
+        finally:
+            self.paced = self.clock is not None
+        self.align()
+        return _stats(sum(c.position for c in self.cursors.values()) - before, time.perf_counter() - start)
+
+    async def drain(self) -> Dict[str, Any]:
+        """
+        Claims this instance's shards and ingests all of them unpaced, the
+        shards concurrently (load testing). Shards held elsewhere are skipped.
+        """
+        if not self.db.is_connected():
+            await self.db.connect()
+        start = time.perf_counter()
+
+        async def drain_shard(index: int) -> int:
+            cursor = self.cursors[index]
+            if not await cursor.claim():
+                print(f"[Ingest] Shard {cursor.id} is held by another worker; skipped")
+                return 0
+            emitted = 0
+            try:
+                while not self.done(index):
+                    await self._emit(index)
+                    emitted += 1
+            finally:
+                await cursor.release()
+            return emitted
+
+        counts = await asyncio.gather(*(drain_shard(i) for i in self.cursors))
+        return _stats(sum(counts), time.perf_counter() - start)
+
+
+def _stats(ingested: int, elapsed: float) -> Dict[str, Any]:
+    return {
+        "ingested": ingested,
+        "seconds": round(elapsed, 3),
+        "postsPerSecond": round(ingested / elapsed, 1) if elapsed > 0 else None,
+    }
+
+
+async def _drain_process(data: str, shards: int, indexes: List[int]) -> Dict[str, Any]:
+    from services.agent_manager import AgentManager
+    from services.agents.scanner_agent import ScannerAgent
+
+    manager = AgentManager()
+    manager.setup()
+    manager.scanner = ScannerAgent(data_path=data, db=manager.scanner.db)
+    manager.scanner.MAX_POSTS_LIMIT = len(manager.scanner.posts)
+    await manager.publisher.db.connect()
+    ingest = ShardedIngest(manager.scanner, manager.run_pipeline, shards, only=indexes)
+    try:
+        return await ingest.drain()
+    finally:
+        await manager.scanner.db.disconnect()
+        await manager.publisher.db.disconnect()
+
+
+def _process_entry(data: str, shards: int, indexes: List[int], results):
+    results.put(asyncio.run(_drain_process(data, shards, indexes)))
+
+
+def main(argv=None):
+    import argparse
+    import json
+    import multiprocessing
+
+    parser = argparse.ArgumentParser(description="Ingest a simulation feed sharded by incident (load testing).")
+    parser.add_argument("--data", default="data/simulation_data.json", help="simulation file (incidents + posts)")
+    parser.add_argument("--shards", type=int, default=max(INGEST_SHARDS, 1))
+    parser.add_argument("--processes", type=int, default=1, help="OS processes; shards are dealt round-robin")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.processes <= 1:
+        results = [asyncio.run(_drain_process(args.data, args.shards, list(range(args.shards))))]
+    else:
+        context = multiprocessing.get_context("spawn")
+        queue = context.Queue()
+        processes = [
+            context.Process(target=_process_entry,
+                            args=(args.data, args.shards, list(range(p, args.shards, args.processes)), queue))
+            for p in range(args.processes)
+        ]
+        for process in processes:
+            process.start()
+        results = [queue.get() for _ in processes]
+        for process in processes:
+            process.join()
+    total = _stats(sum(r["ingested"] for r in results), time.perf_counter() - start)
+    print(json.dumps({**total, "shards": args.shards, "processes": args.processes, "perProcess": results}))
+
+
+if __name__ == "__main__":
+    main()
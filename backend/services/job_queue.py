@@ -0,0 +1,424 @@
+"""
+Durable background job queue on the ``AnalysisJob`` table.
+
+Jobs survive restarts because they live in Postgres. Workers claim them with
+``SELECT ... FOR UPDATE SKIP LOCKED``, so any number of workers, in this
+process or in others (``python -m services.job_queue``), can poll the same
+table without handing out a job twice:
+
+  - a claim marks the job RUNNING and leases it until ``lockedUntil``
+    (the visibility timeout); a worker that dies mid-job simply lets the
+    lease expire and the job is claimed again;
+  - failures are retried with exponential backoff plus jitter until
+    ``maxAttempts``, then the job is marked FAILED with its last error;
+  - higher ``priority`` is claimed first; analyses attached to CRITICAL
+    incidents outrank WARNING ones, which outrank unattached submissions.
+
+Finished jobs are pushed to WebSocket subscribers on ``job:<id>`` (see
+``/api/ws/jobs/{job_id}``) and, when attached, on the incident's channel.
+When the workers run in another process, ``ResultRelay`` in the web process
+polls finished jobs that have local subscribers and pushes them instead.
+"""
+import asyncio
+import json
+import os
+import random
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from services.metrics import instrument_prisma, registry
+from services.serialization import dumps
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "0.5"))
+JOB_VISIBILITY_TIMEOUT = float(os.getenv("JOB_VISIBILITY_TIMEOUT", "120"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_BACKOFF_BASE = float(os.getenv("JOB_BACKOFF_BASE", "2"))
+JOB_BACKOFF_MAX = float(os.getenv("JOB_BACKOFF_MAX", "300"))
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "QUEUED", "RUNNING", "SUCCEEDED", "FAILED"
+FINISHED = (SUCCEEDED, FAILED)
+
+SEVERITY_PRIORITY = {"CRITICAL": 100, "WARNING": 50}
+DEFAULT_PRIORITY = 10
+
+JOBS = registry.counter(
+    "factsaura_jobs_total",
+    "Background jobs by kind and outcome (enqueued, succeeded, retried, failed).",
+    ["kind", "outcome"],
+)
+JOB_DURATION = registry.histogram(
+    "factsaura_job_duration_seconds",
+    "Handler run time of background jobs.",
+    ["kind"],
+)
+JOB_QUEUE_LATENCY = registry.histogram(
+    "factsaura_job_queue_latency_seconds",
+    "Time from a job becoming runnable to a worker claiming it.",
+    ["kind"],
+)
+
+# Claims the highest-priority runnable jobs: queued and due, or running with
+# an expired lease (its worker died) and attempts left. SKIP LOCKED lets
+# concurrent claimers pass over rows another transaction is already taking.
+_CLAIM_SQL = """
+UPDATE "AnalysisJob" AS job
+SET "status" = 'RUNNING',
+    "lockedBy" = $1,
+    "lockedUntil" = now() + make_interval(secs => $2::double precision),
+    "attempts" = job."attempts" + 1,
+    "updatedAt" = now()
+WHERE job."id" IN (
+    SELECT "id" FROM "AnalysisJob"
+    WHERE ("status" = 'QUEUED' AND "runAt" <= now())
+       OR ("status" = 'RUNNING' AND "lockedUntil" < now() AND "attempts" < "maxAttempts")
+    ORDER BY "priority" DESC, "runAt" ASC
+    LIMIT $3
+    FOR UPDATE SKIP LOCKED
+)
+RETURNING job.*
+"""
+
+# A job whose last attempt crashed or hung its worker never reaches fail():
+# once that lease expires the job is FAILED here instead of retried forever.
+_EXPIRE_SQL = """
+UPDATE "AnalysisJob"
+SET "status" = 'FAILED',
+    "lockedBy" = NULL,
+    "lockedUntil" = NULL,
+    "lastError" = 'Lease expired on the last attempt (' || "attempts" || ' of ' || "maxAttempts" || ')',
+    "updatedAt" = now()
+WHERE "status" = 'RUNNING' AND "lockedUntil" < now() AND "attempts" >= "maxAttempts"
+RETURNING "id", "kind"
+"""
+
+Handler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+def backoff_delay(attempts: int, base: float = JOB_BACKOFF_BASE, cap: float = JOB_BACKOFF_MAX) -> float:
+    """
+    Seconds before retry number ``attempts``: base * 2^(attempts-1), capped,
+    with "full jitter" so failed jobs don't retry in lockstep.
+    """
+    ceiling = min(cap, base * (2 ** max(0, attempts - 1)))
+    return random.uniform(ceiling / 2, ceiling)
+
+
+def decode(value: Optional[str]) -> Any:
+    # payload / result are stored as JSON text
+    return json.loads(value) if value else None
+
+
+def job_message(job) -> Dict[str, Any]:
+    return {
+        "type": "analysis_result",
+        "payload": {
+            "jobId": job.id,
+            "status": job.status,
+            "result": decode(job.result),
+            "error": job.lastError,
+            "attempts": job.attempts,
+        },
+    }
+
+
+class JobQueue:
+    def __init__(self, db=None):
+        if db is None:
+            from prisma import Prisma
+            db = instrument_prisma(Prisma())
+        self.db = db
+
+    async def connect(self):
+        if not self.db.is_connected():
+            await self.db.connect()
+
+    async def disconnect(self):
+        if self.db.is_connected():
+            await self.db.disconnect()
+
+    async def priority_for(self, incident_id: Optional[str]) -> int:
+        if not incident_id:
+            return DEFAULT_PRIORITY
+        incident = await self.db.incident.find_unique(where={"id": incident_id})
+        return SEVERITY_PRIORITY.get(getattr(incident, "severity", None), DEFAULT_PRIORITY)
+
+    async def enqueue(
+        self,
+        kind: str,
+        payload: Dict[str, Any],
+        incident_id: Optional[str] = None,
+        priority: Optional[int] = None,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+    ):
+        await self.connect()
+        if priority is None:
+            priority = await self.priority_for(incident_id)
+        job = await self.db.analysisjob.create(
+            data={
+                "kind": kind,
+                "payload": dumps(payload).decode("utf-8"),
+                "incidentId": incident_id,
+                "priority": priority,
+                "maxAttempts": max_attempts,
+                "status": QUEUED,
+            }
+        )
+        JOBS.inc(kind=kind, outcome="enqueued")
+        return job
+
+    async def get(self, job_id: str):
+        await self.connect()
+        return await self.db.analysisjob.find_unique(where={"id": job_id})
+
+    async def claim(self, worker_id: str, limit: int = 1, visibility_timeout: float = JOB_VISIBILITY_TIMEOUT) -> List[Any]:
+        await self.connect()
+        for expired in await self.db.query_raw(_EXPIRE_SQL):
+            JOBS.inc(kind=expired["kind"], outcome="failed")
+            print(f"[Jobs] {expired['kind']} {expired['id']} failed: lease expired on its last attempt")
+        rows = await self.db.query_raw(_CLAIM_SQL, worker_id, visibility_timeout, limit)
+        jobs = [SimpleNamespace(**row) for row in rows]
+        now = datetime.now(timezone.utc)
+        for job in jobs:
+            run_at = job.runAt if isinstance(job.runAt, datetime) else datetime.fromisoformat(str(job.runAt))
+            if run_at.tzinfo is None:
+                run_at = run_at.replace(tzinfo=timezone.utc)
+            JOB_QUEUE_LATENCY.observe(max(0.0, (now - run_at).total_seconds()), kind=job.kind)
+        return jobs
+
+    async def complete(self, job, result: Any) -> bool:
+        """
+        Records the result; False if the job was taken over meanwhile.
+        """
+        # Guarded on lockedBy: a worker whose lease expired must not
+        # overwrite the outcome of the worker that took the job over
+        updated = await self.db.analysisjob.update_many(
+            where={"id": job.id, "lockedBy": job.lockedBy},
+            data={"status": SUCCEEDED, "result": dumps(result).decode("utf-8"), "lockedUntil": None, "lastError": None},
+        )
+        if not updated:
+            return False
+        JOBS.inc(kind=job.kind, outcome="succeeded")
+        return True
+
+    async def fail(self, job, error: str) -> Optional[str]:
+        """
+        Schedules a retry with backoff, or marks the job FAILED once its
+        attempts are used up. Returns the new status, or None if the job was
+        taken over meanwhile.
+        """
+        if job.attempts >= job.maxAttempts:
+            status, data = FAILED, {"status": FAILED}
+        else:
+            run_at = datetime.now(timezone.utc) + timedelta(seconds=backoff_delay(job.attempts))
+            status, data = QUEUED, {"status": QUEUED, "runAt": run_at}
+        data.update({"lockedUntil": None, "lockedBy": None, "lastError": error[:2000]})
+        updated = await self.db.analysisjob.update_many(where={"id": job.id, "lockedBy": job.lockedBy}, data=data)
+        if not updated:
+            return None
+        JOBS.inc(kind=job.kind, outcome="failed" if status == FAILED else "retried")
+        return status
+
+
+class WorkerPool:
+    """
+    ``concurrency`` async workers claiming and running jobs from ``queue``.
+    """
+    def __init__(self, queue: JobQueue, handlers: Dict[str, Handler], concurrency: int = JOB_WORKERS,
+                 poll_interval: float = JOB_POLL_INTERVAL, publish: bool = True):
+        self.queue = queue
+        self.handlers = handlers
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        # Push results over WebSockets from this process
+        self.publish = publish
+        self.worker_prefix = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self):
+        if self._tasks:
+            return
+        await self.queue.connect()
+        self._tasks = [
+            asyncio.create_task(self._worker(f"{self.worker_prefix}:{i}"))
+            for i in range(self.concurrency)
+        ]
+        print(f"[Jobs] Started {self.concurrency} workers ({self.worker_prefix})")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+    async def _worker(self, worker_id: str):
+        idle = self.poll_interval
+        while True:
+            try:
+                jobs = await self.queue.claim(worker_id)
+            except Exception as e:
+                print(f"[Jobs] Claim failed: {e}")
+                await asyncio.sleep(5)
+                continue
+            if not jobs:
+                # Back off while the queue is empty, up to 10x the interval
+                await asyncio.sleep(idle)
+                idle = min(idle * 1.5, self.poll_interval * 10)
+                continue
+            idle = self.poll_interval
+            for job in jobs:
+                await self.run(job)
+
+    async def run(self, job):
+        handler = self.handlers.get(job.kind)
+        start = time.perf_counter()
+        try:
+            if handler is None:
+                raise LookupError(f"No handler for job kind {job.kind!r}")
+            # Finish well inside the lease so no other worker picks it up
+            result = await asyncio.wait_for(handler(decode(job.payload)), timeout=JOB_VISIBILITY_TIMEOUT * 0.9)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            status = await self.queue.fail(job, f"{type(e).__name__}: {e}")
+            if status is None:
+                print(f"[Jobs] {job.kind} {job.id} was taken over by another worker; dropping its failure")
+                return
+            print(f"[Jobs] {job.kind} {job.id} attempt {job.attempts} failed ({status}): {e}")
+            if status == FAILED:
+                await self._publish(job.id)
+            return
+        finally:
+            JOB_DURATION.observe(time.perf_counter() - start, kind=job.kind)
+        if not await self.queue.complete(job, result):
+            # The lease ran out and another worker owns the job now
+            print(f"[Jobs] {job.kind} {job.id} was taken over by another worker; dropping its result")
+            return
+        await self._publish(job.id)
+
+    async def _publish(self, job_id: str):
+        if not self.publish:
+            return
+        job = await self.queue.get(job_id)
+        if job:
+            await publish_result(job)
+
+
+async def publish_result(job):
+    from services.connection_manager import manager
+
+    message = job_message(job)
+    await manager.broadcast(message, f"job:{job.id}")
+    if job.incidentId:
+        await manager.broadcast(message, job.incidentId)
+
+
+class ResultRelay:
+    """
+    Pushes finished jobs to this process's WebSocket subscribers when the
+    workers run elsewhere: polls the jobs that have ``job:<id>`` listeners.
+    """
+    def __init__(self, queue: JobQueue, interval: float = JOB_POLL_INTERVAL):
+        self.queue = queue
+        self.interval = interval
+        self._delivered: set = set()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        from services.connection_manager import manager
+
+        while True:
+            await asyncio.sleep(self.interval)
+            waiting = [key[4:] for key in list(manager.active_connections) if key.startswith("job:")]
+            if not waiting:
+                continue
+            try:
+                done = await self.queue.db.analysisjob.find_many(
+                    where={"id": {"in": waiting}, "status": {"in": list(FINISHED)}}
+                )
+            except Exception as e:
+                print(f"[Jobs] Relay poll failed: {e}")
+                continue
+            # Each result is relayed once; later subscribers get it on connect
+            self._delivered &= set(waiting)
+            for job in done:
+                if job.id not in self._delivered:
+                    self._delivered.add(job.id)
+                    await publish_result(job)
+
+
+async def analyze_handler(payload: Dict[str, Any]) -> Dict[str, Any]:
+    from routes.analysis import get_service
+
+    service = get_service()
+    await service.connect()
+    return await service.generate_truth_scorecard(payload["content"], payload.get("incidentId"))
+
+
+HANDLERS: Dict[str, Handler] = {"analyze": analyze_handler}
+
+_queue: Optional[JobQueue] = None
+_pool: Optional[WorkerPool] = None
+_relay: Optional[ResultRelay] = None
+
+
+def get_queue() -> JobQueue:
+    global _queue
+    if _queue is None:
+        _queue = JobQueue()
+    return _queue
+
+
+def get_pool() -> WorkerPool:
+    global _pool
+    if _pool is None:
+        _pool = WorkerPool(get_queue(), HANDLERS)
+    return _pool
+
+
+def get_relay() -> ResultRelay:
+    global _relay
+    if _relay is None:
+        _relay = ResultRelay(get_queue())
+    return _relay
+
+
+async def _main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run background job workers")
+    parser.add_argument("--workers", type=int, default=JOB_WORKERS)
+    args = parser.parse_args(argv)
+
+    # Results reach WebSocket clients through the web process's relay
+    worker_pool = WorkerPool(JobQueue(), HANDLERS, concurrency=args.workers, publish=False)
+    await worker_pool.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await worker_pool.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,325 @@
+"""
+In-process metrics registry rendered in the Prometheus text format.
+
+Metrics are plain counters, gauges and histograms keyed by label values.
+Everything is updated from the event loop thread, so no locking is needed.
+"""
+import functools
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+from services import tracing
+
+INF_BUCKET = 'le="+Inf"'
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[Any], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0.0) + amount
+
+    def get(self, **labels) -> float:
+        return self.values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+            for key, value in self.values.items()
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        self.values[self._key(labels)] = value
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [bucket counts..., sum, count]
+        self.values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        state = self.values.get(key)
+        if state is None:
+            state = self.values[key] = [0.0] * (len(self.buckets) + 2)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                state[i] += 1
+        state[-2] += value
+        state[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> float:
+        state = self.values.get(self._key(labels))
+        return state[-1] if state else 0.0
+
+    def render(self) -> List[str]:
+        lines = []
+        for key, state in self.values.items():
+            for bound, cumulative in zip(self.buckets, state):
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, INF_BUCKET)} {state[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {state[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {state[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> Any:
+        existing = self.metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self.metrics.values():
+            lines.extend(metric.header())
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+HTTP_REQUEST_DURATION = registry.histogram(
+    "factsaura_http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ["method", "route", "status"],
+)
+DB_QUERY_DURATION = registry.histogram(
+    "factsaura_db_query_duration_seconds",
+    "Prisma query latency by model and operation.",
+    ["model", "operation"],
+)
+DB_QUERY_ERRORS = registry.counter(
+    "factsaura_db_query_errors_total",
+    "Prisma queries that raised.",
+    ["model", "operation"],
+)
+GEMINI_REQUEST_DURATION = registry.histogram(
+    "factsaura_gemini_request_duration_seconds",
+    "Gemini generate_content latency.",
+    ["outcome"],
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0),
+)
+GEMINI_ERRORS = registry.counter(
+    "factsaura_gemini_errors_total",
+    "Gemini calls that failed.",
+    ["error"],
+)
+AGENT_STAGE_DURATION = registry.histogram(
+    "factsaura_agent_stage_duration_seconds",
+    "Agent pipeline stage durations.",
+    ["stage"],
+)
+AGENT_POSTS_PROCESSED = registry.counter(
+    "factsaura_agent_posts_processed_total",
+    "Posts that went through the agent pipeline.",
+    ["outcome"],
+)
+WEBSOCKET_CONNECTIONS = registry.gauge(
+    "factsaura_websocket_connections",
+    "Open WebSocket connections.",
+)
+BROADCAST_DURATION = registry.histogram(
+    "factsaura_broadcast_duration_seconds",
+    "Time to fan one message out to every subscriber of an incident.",
+)
+BROADCAST_RECIPIENTS = registry.counter(
+    "factsaura_broadcast_messages_total",
+    "WebSocket messages delivered by broadcasts.",
+    ["outcome"],
+)
+CACHE_REQUESTS = registry.counter(
+    "factsaura_cache_requests_total",
+    "Cache lookups by cache and result (hit/miss).",
+    ["cache", "result"],
+)
+CACHE_HIT_RATIO = registry.gauge(
+    "factsaura_cache_hit_ratio",
+    "Lifetime hit ratio per cache.",
+    ["cache"],
+)
+
+
+def record_cache(cache: str, hit: bool):
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+    hits = CACHE_REQUESTS.get(cache=cache, result="hit")
+    misses = CACHE_REQUESTS.get(cache=cache, result="miss")
+    CACHE_HIT_RATIO.set(hits / (hits + misses), cache=cache)
+
+
+def _timed_query(model: str, operation: str, method: Callable) -> Callable:
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        with tracing.span(f"prisma {model}.{operation}"):
+            try:
+                return await method(*args, **kwargs)
+            except Exception:
+                DB_QUERY_ERRORS.inc(model=model, operation=operation)
+                raise
+            finally:
+                DB_QUERY_DURATION.observe(time.perf_counter() - start, model=model, operation=operation)
+    return wrapper
+
+
+QUERY_OPERATIONS = (
+    "find_many", "find_first", "find_unique", "find_unique_or_raise", "find_first_or_raise",
+    "create", "create_many", "update", "update_many", "upsert", "delete", "delete_many",
+    "count", "group_by",
+)
+RAW_OPERATIONS = ("query_raw", "query_first", "execute_raw")
+
+
+class _InstrumentedTransaction:
+    def __init__(self, manager):
+        self._manager = manager
+
+    async def __aenter__(self):
+        return instrument_prisma(await self._manager.__aenter__())
+
+    async def __aexit__(self, *exc_info):
+        return await self._manager.__aexit__(*exc_info)
+
+
+def instrument_prisma(client):
+    """
+    Wraps a Prisma client's query methods so each call is timed and traced.
+
+    Returns the same client; safe to call more than once.
+    """
+    if getattr(client, "_factsaura_instrumented", False):
+        return client
+    for model, actions in list(vars(client).items()):
+        if model.startswith("_") or not hasattr(actions, "find_many"):
+            continue
+        for operation in QUERY_OPERATIONS:
+            method = getattr(actions, operation, None)
+            if method is not None:
+                setattr(actions, operation, _timed_query(model, operation, method))
+    for operation in RAW_OPERATIONS:
+        method = getattr(client, operation, None)
+        if method is not None:
+            setattr(client, operation, _timed_query("raw", operation, method))
+    tx = getattr(client, "tx", None)
+    if tx is not None:
+        client.tx = lambda *args, **kwargs: _InstrumentedTransaction(tx(*args, **kwargs))
+    client._factsaura_instrumented = True
+    return client
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording per-route latency and opening a trace per request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+        start = time.perf_counter()
+        method = scope.get("method", "GET")
+
+        with tracing.start_trace(f"{method} {scope.get('path', '')}") as root:
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    status["code"] = message["status"]
+                    if root is not None:
+                        headers = list(message.get("headers", []))
+                        headers.append((b"x-trace-id", root.trace_id.encode()))
+                        message = {**message, "headers": headers}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = scope.get("route")
+                template = getattr(route, "path", None) or "unmatched"
+                if root is not None:
+                    root.name = f"{method} {template}"
+                    root.attributes["status"] = status["code"]
+                HTTP_REQUEST_DURATION.observe(
+                    time.perf_counter() - start,
+                    method=method,
+                    route=template,
+                    status=status["code"],
+                )
+
+
+def render_latest() -> str:
+    return registry.render()
+
@@ -0,0 +1,231 @@
+"""
+Online narrative clustering per incident.
+
+Most posts in an incident are small mutations of a few rumours. Each new
+text is compared (Levenshtein ratio, ``text_compare``) against the leader of
+every narrative cluster in its incident and joins the closest one at or above
+``NARRATIVE_JOIN_THRESHOLD``; otherwise it becomes the leader of a new
+cluster (leader / threshold clustering, one pass, no re-clustering).
+
+Each cluster keeps one representative verdict, from the model's analysis of
+a text close to its leader. An analysis reuses it when the text is within
+``NARRATIVE_REUSE_THRESHOLD`` of the leader; a text that starts a cluster, or
+joins one but has drifted further than that, still goes to the model.
+
+A cluster's ``size`` counts distinct texts (by ``content_hash``): the same
+text seen again (a re-analysis, or a post analysed after its ingest hook)
+returns its earlier assignment without inflating the cluster. Only the
+``NARRATIVE_MAX_MEMBERS`` most recently seen hashes are remembered per
+cluster; a text older than that is counted again if it comes back.
+
+Clusters live in memory: at most ``NARRATIVE_MAX_CLUSTERS`` per incident
+(the least recently matched are dropped), ``NARRATIVE_MAX_MEMBERS`` hashes per
+cluster and ``NARRATIVE_MAX_INCIDENTS`` incidents. Submissions without an incident share one pool.
+"""
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from services import text_compare
+from services.content_hash import content_hash
+from services.metrics import record_cache, registry
+
+JOIN_THRESHOLD = float(os.getenv("NARRATIVE_JOIN_THRESHOLD", "0.6"))
+REUSE_THRESHOLD = float(os.getenv("NARRATIVE_REUSE_THRESHOLD", "0.8"))
+MAX_CLUSTERS = int(os.getenv("NARRATIVE_MAX_CLUSTERS", "500"))
+MAX_INCIDENTS = int(os.getenv("NARRATIVE_MAX_INCIDENTS", "1000"))
+MAX_MEMBERS = int(os.getenv("NARRATIVE_MAX_MEMBERS", "1000"))
+
+# Pool for analyses that aren't tied to an incident
+UNATTACHED = "_unattached"
+
+NARRATIVE_ASSIGNMENTS = registry.counter(
+    "factsaura_narrative_assignments_total",
+    "Texts assigned to narrative clusters (joined, new_cluster or repeated).",
+    ["outcome"],
+)
+NARRATIVE_CLUSTERS = registry.gauge(
+    "factsaura_narrative_clusters",
+    "Narrative clusters held in memory.",
+)
+
+
+@dataclass
+class NarrativeCluster:
+    id: str
+    incident_id: str
+    leader: str
+    leader_post_id: Optional[str] = None
+    size: int = 1
+    verdict: Optional[Dict[str, Any]] = None
+    # Analyses answered from / missing the representative verdict
+    hits: int = 0
+    misses: int = 0
+    created_at: float = field(default_factory=time.time)
+    last_seen: float = field(default_factory=time.time)
+    # content hash -> similarity to the leader, most recently seen last
+    members: "OrderedDict[str, float]" = field(default_factory=OrderedDict, repr=False)
+
+    def remember(self, key: str, similarity: float, max_members: int = MAX_MEMBERS):
+        self.members[key] = similarity
+        self.members.move_to_end(key)
+        if len(self.members) > max_members:
+            self.members.popitem(last=False)
+
+    def summary(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "id": self.id,
+            "incidentId": self.incident_id,
+            "leader": self.leader,
+            "leaderPostId": self.leader_post_id,
+            "size": self.size,
+            "riskLevel": (self.verdict or {}).get("risk_level"),
+            "verdict": self.verdict,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / lookups, 4) if lookups else None,
+            "createdAt": self.created_at,
+            "lastSeen": self.last_seen,
+        }
+
+
+@dataclass
+class Assignment:
+    cluster: NarrativeCluster
+    similarity: float
+    created: bool
+
+    @property
+    def reusable(self) -> bool:
+        return self.cluster.verdict is not None and self.similarity >= REUSE_THRESHOLD
+
+
+class NarrativeEngine:
+    def __init__(self, max_clusters: int = MAX_CLUSTERS, max_incidents: int = MAX_INCIDENTS,
+                 max_members: int = MAX_MEMBERS):
+        self.max_clusters = max_clusters
+        self.max_incidents = max_incidents
+        self.max_members = max_members
+        # incident -> cluster id -> cluster, least recently matched first
+        self._incidents: "OrderedDict[str, OrderedDict[str, NarrativeCluster]]" = OrderedDict()
+        self._locks: Dict[str, asyncio.Lock] = {}
+        # Callers holding or waiting on each incident's lock
+        self._lock_users: Dict[str, int] = {}
+
+    def _clusters(self, incident_id: str) -> "OrderedDict[str, NarrativeCluster]":
+        clusters = self._incidents.get(incident_id)
+        if clusters is None:
+            clusters = self._incidents[incident_id] = OrderedDict()
+            if len(self._incidents) > self.max_incidents:
+                evicted, _ = self._incidents.popitem(last=False)
+                # A lock still in use stays, or a newcomer would get a second one
+                if evicted not in self._lock_users:
+                    self._locks.pop(evicted, None)
+                self._update_gauge()
+        self._incidents.move_to_end(incident_id)
+        return clusters
+
+    async def assign(self, incident_id: Optional[str], content: str, post_id: Optional[str] = None) -> Assignment:
+        """
+        Puts ``content`` in the closest cluster of its incident, or starts one.
+        """
+        incident_id = incident_id or UNATTACHED
+        # Serialized per incident so near-identical texts arriving together
+        # don't each start their own cluster
+        lock = self._locks.setdefault(incident_id, asyncio.Lock())
+        self._lock_users[incident_id] = self._lock_users.get(incident_id, 0) + 1
+        try:
+            async with lock:
+                return await self._assign(incident_id, content, post_id)
+        finally:
+            self._lock_users[incident_id] -= 1
+            if not self._lock_users[incident_id]:
+                del self._lock_users[incident_id]
+                if incident_id not in self._incidents:
+                    self._locks.pop(incident_id, None)
+
+    async def _assign(self, incident_id: str, content: str, post_id: Optional[str]) -> Assignment:
+        clusters = self._clusters(incident_id)
+        key = content_hash(content)
+        now = time.time()
+        for cluster in clusters.values():
+            if key in cluster.members:
+                cluster.members.move_to_end(key)
+                cluster.last_seen = now
+                clusters.move_to_end(cluster.id)
+                NARRATIVE_ASSIGNMENTS.inc(outcome="repeated")
+                return Assignment(cluster, cluster.members[key], created=False)
+
+        candidates = list(clusters.values())
+        scores = await text_compare.find_similar(content, [c.leader for c in candidates], JOIN_THRESHOLD)
+        if scores:
+            index, similarity = max(scores, key=lambda s: s[1])
+            cluster = candidates[index]
+            cluster.remember(key, similarity, self.max_members)
+            cluster.size += 1
+            cluster.last_seen = now
+            clusters.move_to_end(cluster.id)
+            NARRATIVE_ASSIGNMENTS.inc(outcome="joined")
+            return Assignment(cluster, similarity, created=False)
+
+        cluster = NarrativeCluster(id=uuid.uuid4().hex[:12], incident_id=incident_id, leader=content,
+                                   leader_post_id=post_id, members=OrderedDict({key: 1.0}))
+        clusters[cluster.id] = cluster
+        if len(clusters) > self.max_clusters:
+            clusters.popitem(last=False)
+        NARRATIVE_ASSIGNMENTS.inc(outcome="new_cluster")
+        self._update_gauge()
+        return Assignment(cluster, 1.0, created=True)
+
+    def cached_verdict(self, assignment: Assignment) -> Optional[Dict[str, Any]]:
+        """
+        The cluster's representative verdict if ``assignment`` may reuse it;
+        counts the lookup towards the cluster's hit rate.
+        """
+        hit = assignment.reusable
+        record_cache("narrative_verdict", hit)
+        if hit:
+            assignment.cluster.hits += 1
+            return assignment.cluster.verdict
+        assignment.cluster.misses += 1
+        return None
+
+    def set_verdict(self, assignment: Assignment, verdict: Dict[str, Any]):
+        # Only a text close to the leader speaks for the whole cluster
+        if assignment.cluster.verdict is None and assignment.similarity >= REUSE_THRESHOLD:
+            assignment.cluster.verdict = verdict
+
+    def narratives(self, incident_id: str) -> Dict[str, Any]:
+        clusters = sorted(self._incidents.get(incident_id, {}).values(), key=lambda c: c.size, reverse=True)
+        hits = sum(c.hits for c in clusters)
+        lookups = hits + sum(c.misses for c in clusters)
+        return {
+            "incidentId": incident_id,
+            "clusters": [c.summary() for c in clusters],
+            "posts": sum(c.size for c in clusters),
+            "hitRate": round(hits / lookups, 4) if lookups else None,
+        }
+
+    def _update_gauge(self):
+        NARRATIVE_CLUSTERS.set(sum(len(c) for c in self._incidents.values()))
+
+    def reset(self):
+        self._incidents.clear()
+        # Locks in use are kept for their holders and waiters
+        self._locks = {k: v for k, v in self._locks.items() if k in self._lock_users}
+        NARRATIVE_CLUSTERS.set(0)
+
+
+engine = NarrativeEngine()
+
+
+async def post_created(incident_id: str, post_id: str, content: str):
+    """
+    Ingest hook: files a stored post under its incident's narratives.
+    """
+    await engine.assign(incident_id, content, post_id=post_id)
@@ -1,10 +1,16 @@
 from typing import Dict, Any, Optional, List
-from prisma import Prisma
+from services.metrics import instrument_prisma
+from services import archive, attribution, credibility, entity_cache, http_cache, narratives, text_compare, tree_layout, velocity
+from services.content_hash import content_hash
 from services.connection_manager import manager
+from models.post import CommentResponse, PostResponse
 
 class PostService:
-    def __init__(self):
-        self.db = Prisma()
+    def __init__(self, db=None):
+        if db is None:
+            from prisma import Prisma
+            db = instrument_prisma(Prisma())
+        self.db = db
 
     async def connect(self):
         if not self.db.is_connected():
@@ -20,11 +26,7 @@ class PostService:
         Score = (1 - ratio) * 100.
         0 = Identical, 100 = Completely different.
         """
-        if not parent_content or not child_content:
-            return 100.0
-        
-        similarity = ratio(parent_content, child_content)
-        return (1.0 - similarity) * 100.0
+        return text_compare.mutation_score(parent_content, child_content)
 
     async def create_post(self, data: Dict[str, Any]) -> dict:
         await self.connect()
@@ -32,18 +34,20 @@ class PostService:
         # Calculate mutation score if parent exists
         mutation_score = 0.0
         mutation_type = None
+        digest = content_hash(data["content"])
         
+        parent = None
         if data.get("parentId"):
-            parent = await self.db.post.find_unique(where={"id": data["parentId"]})
-            if parent:
-                mutation_score = self.calculate_mutation_score(parent.content, data["content"])
-                # Simple heuristic for mutation type
-                if mutation_score < 10:
-                    mutation_type = "FACTUAL" # Minor changes
-                elif mutation_score < 40:
-                    mutation_type = "EMOTIONAL" # Moderate changes
-                else:
-                    mutation_type = "FABRICATION" # Major changes
+            parent = await entity_cache.get_post(self.db, data["parentId"])
+        # No lineage given, or the given parent doesn't exist: infer one
+        confidence = None
+        if parent is None and attribution.ATTRIBUTION_ENABLED:
+            proposal = await attribution.index.propose(self.db, data["incidentId"], data["content"])
+            if proposal:
+                parent = await entity_cache.get_post(self.db, proposal["parentId"])
+                confidence = proposal["confidence"] if parent else None
+        if parent:
+            mutation_score, mutation_type = await self._score_against_parent(parent, data["content"], digest)
         
         # Create post
         post = await self.db.post.create(
@@ -52,25 +56,102 @@ class PostService:
                 "content": data["content"],
                 "author": data["author"],
                 "incidentId": data["incidentId"],
-                "parentId": data.get("parentId"),
+                "parentId": parent.id if parent else None,
+                "attributionConfidence": confidence,
                 "timestamp": data.get("timestamp"), # Optional
                 "mutationScore": mutation_score,
-                "mutationType": mutation_type
+                "mutationType": mutation_type,
+                "contentHash": digest
             }
         )
 
+        entity_cache.posts.put(post)
+        attribution.index.add(post.incidentId, post.id, post.content)
+        tree_layout.post_created(post.incidentId, post.id, post.parentId)
+        http_cache.bump(http_cache.incident_posts(post.incidentId), http_cache.DEMO)
+
         # Broadcast update via WebSocket
         await manager.broadcast(
             {
                 "type": "new_post",
-                "payload": post.dict()
+                "payload": PostResponse.model_validate(post)
             },
             data["incidentId"]
         )
+        await velocity.post_created(post.incidentId, bool(post.parentId), mutation_type)
+        await narratives.post_created(post.incidentId, post.id, post.content)
+        await credibility.record_post(self.db, post.author, mutation_type)
 
         return post
 
+    async def _score_against_parent(self, parent, content: str, digest: str):
+        """
+        Mutation score and type of ``content`` relative to ``parent``.
+        Exact copies (same content hash) skip the Levenshtein comparison, and
+        a copy of an already-scored sibling reuses that sibling's result.
+        """
+        if (getattr(parent, "contentHash", None) or content_hash(parent.content)) == digest:
+            return 0.0, "FACTUAL"
+
+        sibling = await self.db.post.find_first(
+            where={"contentHash": digest, "parentId": parent.id, "mutationScore": {"not": None}}
+        )
+        if sibling:
+            return sibling.mutationScore, sibling.mutationType
+
+        mutation_score = await text_compare.compute_mutation_score(parent.content, content)
+        # Simple heuristic for mutation type
+        if mutation_score < 10:
+            mutation_type = "FACTUAL" # Minor changes
+        elif mutation_score < 40:
+            mutation_type = "EMOTIONAL" # Moderate changes
+        else:
+            mutation_type = "FABRICATION" # Major changes
+        return mutation_score, mutation_type
+
+    async def suggest_parent(self, incident_id: str, content: str) -> Optional[Dict[str, Any]]:
+        """
+        The parent ``create_post`` would infer for ``content`` without a parentId.
+        """
+        await self.connect()
+        return await attribution.index.propose(self.db, incident_id, content)
+
+    async def get_copies(self, content: Optional[str] = None, post_id: Optional[str] = None) -> Optional[List[dict]]:
+        """
+        Every post whose normalized content matches ``content`` (or the
+        content of ``post_id``), oldest first. None if ``post_id`` is unknown.
+        """
+        await self.connect()
+        if post_id is not None:
+            post = await self.get_post_by_id(post_id)
+            if not post:
+                return None
+            content = post.content
+        return await self.db.post.find_many(
+            where={"contentHash": content_hash(content)},
+            order={"timestamp": "asc"}
+        )
+
+    async def backfill_content_hashes(self, batch_size: int = 1000) -> int:
+        """
+        Fills contentHash for posts created before the column existed.
+        """
+        await self.connect()
+        updated = 0
+        while True:
+            posts = await self.db.post.find_many(where={"contentHash": None}, take=batch_size)
+            if not posts:
+                return updated
+            for post in posts:
+                entity_cache.posts.put(
+                    await self.db.post.update(where={"id": post.id}, data={"contentHash": content_hash(post.content)})
+                )
+            updated += len(posts)
+
     async def get_posts_by_incident(self, incident_id: str) -> List[dict]:
+        # Archived incidents are served from cold storage
+        if archive.store.is_archived(incident_id):
+            return await archive.store.posts(incident_id)
         await self.connect()
         return await self.db.post.find_many(
             where={"incidentId": incident_id},
@@ -79,11 +160,13 @@ class PostService:
 
     async def get_post_by_id(self, post_id: str) -> Optional[dict]:
         await self.connect()
-        return await self.db.post.find_unique(where={"id": post_id})
+        post = await entity_cache.get_post(self.db, post_id)
+        if post is None:
+            return await archive.store.post(post_id)
+        return post
 
     async def get_post_diff(self, post_id: str) -> Dict[str, Any]:
-        await self.connect()
-        post = await self.db.post.find_unique(where={"id": post_id})
+        post = await self.get_post_by_id(post_id)
         if not post:
             return None
         
@@ -94,15 +177,13 @@ class PostService:
         }
 
         if post.parentId:
-            parent = await self.db.post.find_unique(where={"id": post.parentId})
+            parent = await self.get_post_by_id(post.parentId)
             if parent:
                 result["parent"] = parent
-                # Generate diff
-                import difflib
-                matcher = difflib.SequenceMatcher(None, parent.content, post.content)
+                # Generate diff (offloaded to the CPU executor for long texts)
                 # We return opcodes: tag, i1, i2, j1, j2
                 # tag: 'replace', 'delete', 'insert', 'equal'
-                result["diff"] = matcher.get_opcodes()
+                result["diff"] = await text_compare.compute_diff(parent.content, post.content)
         
         return result
 
@@ -112,28 +193,28 @@ class PostService:
         Updates credibleVotes and totalVotes.
         """
         await self.connect()
-        
-        post = await self.db.post.find_unique(where={"id": post_id})
-        if not post:
-            return None
-        
-        # Update vote counts
-        new_credible_votes = post.credibleVotes + (1 if is_credible else 0)
-        new_total_votes = post.totalVotes + 1
-        
+
+        # Atomic increments; no prior read, and None when the post is missing
         updated_post = await self.db.post.update(
             where={"id": post_id},
             data={
-                "credibleVotes": new_credible_votes,
-                "totalVotes": new_total_votes
+                "credibleVotes": {"increment": 1 if is_credible else 0},
+                "totalVotes": {"increment": 1}
             }
         )
-        
+        if not updated_post:
+            return None
+        entity_cache.posts.put(updated_post)
+
+        http_cache.bump(http_cache.incident_posts(updated_post.incidentId))
+        velocity.vote_cast(updated_post.incidentId)
+        await credibility.record_vote(self.db, updated_post.author, is_credible)
+
         # Broadcast update via WebSocket
         await manager.broadcast(
             {
                 "type": "post_voted",
-                "payload": updated_post.dict()
+                "payload": PostResponse.model_validate(updated_post)
             },
             updated_post.incidentId
         )
@@ -144,6 +225,8 @@ class PostService:
         """
         Get all comments for a post.
         """
+        if archive.store.incident_for_post(post_id):
+            return await archive.store.comments(post_id)
         await self.connect()
         
         comments = await self.db.comment.find_many(
@@ -153,34 +236,45 @@ class PostService:
         
         return comments
 
-    async def create_comment(self, post_id: str, data: Dict[str, Any]) -> dict:
+    async def create_comment(self, post_id: str, data: Dict[str, Any]) -> Optional[dict]:
         """
         Create a new comment on a post.
+        Bumps the post's commentCount and inserts the comment in one
+        transaction; returns None if the post doesn't exist.
         """
         await self.connect()
-        
-        comment = await self.db.comment.create(
-            data={
-                "postId": post_id,
-                "author": data["author"],
-                "content": data["content"]
-            }
-        )
-        
-        # Get the post to find incident ID for broadcasting
-        post = await self.db.post.find_unique(where={"id": post_id})
-        
-        # Broadcast update via WebSocket
-        if post:
-            await manager.broadcast(
-                {
-                    "type": "new_comment",
-                    "payload": {
-                        "comment": comment.dict(),
-                        "postId": post_id
-                    }
-                },
-                post.incidentId
+
+        async with self.db.tx() as tx:
+            # The increment doubles as the existence check and yields incidentId
+            post = await tx.post.update(
+                where={"id": post_id},
+                data={"commentCount": {"increment": 1}}
             )
-        
+            if not post:
+                return None
+
+            comment = await tx.comment.create(
+                data={
+                    "postId": post_id,
+                    "author": data["author"],
+                    "content": data["content"]
+                }
+            )
+
+        entity_cache.posts.put(post)
+        http_cache.bump(http_cache.incident_posts(post.incidentId))
+
+        # Broadcast update via WebSocket
+        await manager.broadcast(
+            {
+                "type": "new_comment",
+                "payload": {
+                    "comment": CommentResponse.model_validate(comment),
+                    "postId": post_id,
+                    "commentCount": post.commentCount
+                }
+            },
+            post.incidentId
+        )
+
         return comment
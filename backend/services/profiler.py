@@ -0,0 +1,219 @@
+"""
+On-demand diagnostics for the running event loop.
+
+``SamplingProfiler`` samples the loop thread's Python stack from a helper
+thread and returns collapsed stacks ("a;b;c 42" lines) that flamegraph.pl,
+speedscope or inferno can render directly.
+
+``LoopBlockMonitor`` runs a heartbeat coroutine on the loop and a watchdog
+thread next to it; whenever the heartbeat stalls past a threshold it captures
+the loop thread's stack and the task that was running, so CPU-heavy callbacks
+(Levenshtein scans, difflib, JSON encoding) show up with their call site.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, Optional
+
+from services.metrics import registry
+
+MAX_PROFILE_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "60"))
+
+LOOP_BLOCKED_DURATION = registry.histogram(
+    "factsaura_event_loop_blocked_seconds",
+    "Event loop stalls detected by the block monitor.",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+_IDLE_FUNCTIONS = {"select", "poll", "epoll", "control", "_run_once"}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    backend_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if filename.startswith(backend_root):
+        filename = os.path.relpath(filename, backend_root)
+    else:
+        filename = os.path.basename(filename)
+    return f"{filename}:{code.co_name}:{code.co_firstlineno}"
+
+
+def _collapse(frame) -> List[str]:
+    stack = []
+    while frame is not None:
+        stack.append(_frame_label(frame))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+def _is_idle(frame) -> bool:
+    return frame is not None and frame.f_code.co_name in _IDLE_FUNCTIONS and (
+        frame.f_code.co_filename.endswith("selectors.py")
+        or frame.f_code.co_filename.endswith("base_events.py")
+    )
+
+
+class ProfilerBusyError(RuntimeError):
+    pass
+
+
+class SamplingProfiler:
+    """
+    Samples one thread's stack at a fixed interval for a bounded duration.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def _sample(self, thread_id: int, seconds: float, interval: float, include_idle: bool) -> Dict[str, Any]:
+        stacks: Counter = Counter()
+        samples = 0
+        idle = 0
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            frame = sys._current_frames().get(thread_id)
+            if frame is None:
+                break
+            samples += 1
+            if not include_idle and _is_idle(frame):
+                idle += 1
+            else:
+                stacks[";".join(_collapse(frame))] += 1
+            del frame
+            time.sleep(interval)
+        return {"stacks": stacks, "samples": samples, "idle": idle}
+
+    async def profile(
+        self,
+        seconds: float = 10.0,
+        interval_ms: float = 5.0,
+        include_idle: bool = False,
+        focus: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Profiles the calling event loop's thread; returns collapsed stacks.
+
+        ``focus`` keeps only stacks containing that substring, e.g.
+        ``get_post_diff`` or ``_run_loop``.
+        """
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusyError("A profile is already running")
+        try:
+            seconds = max(0.1, min(seconds, MAX_PROFILE_SECONDS))
+            interval = max(0.001, interval_ms / 1000.0)
+            loop_thread = threading.get_ident()
+            result = await asyncio.to_thread(self._sample, loop_thread, seconds, interval, include_idle)
+        finally:
+            self._lock.release()
+
+        stacks = result["stacks"]
+        if focus:
+            stacks = Counter({stack: n for stack, n in stacks.items() if focus in stack})
+        collapsed = "\n".join(f"{stack} {count}" for stack, count in stacks.most_common())
+        return {
+            "collapsed": collapsed + ("\n" if collapsed else ""),
+            "samples": result["samples"],
+            "idle_samples": result["idle"],
+            "seconds": seconds,
+            "interval_ms": interval * 1000.0,
+        }
+
+
+class LoopBlockMonitor:
+    """
+    Detects event loop stalls longer than ``threshold_ms`` and records stacks.
+    """
+
+    def __init__(self, max_events: int = 100):
+        self.events: Deque[Dict[str, Any]] = deque(maxlen=max_events)
+        self.threshold = 0.1
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._last_beat = time.monotonic()
+
+    @property
+    def is_running(self) -> bool:
+        return self._watchdog is not None and self._watchdog.is_alive()
+
+    async def start(self, threshold_ms: float = 100.0):
+        if self.is_running:
+            await self.stop()
+        self.threshold = max(0.005, threshold_ms / 1000.0)
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._heartbeat_task = asyncio.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-block-monitor", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self):
+        self._stop.set()
+        if self._heartbeat_task:
+            self._heartbeat_task.cancel()
+            try:
+                await self._heartbeat_task
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat_task = None
+        if self._watchdog:
+            await asyncio.to_thread(self._watchdog.join, 1.0)
+            self._watchdog = None
+
+    async def _heartbeat(self):
+        tick = self.threshold / 4
+        while not self._stop.is_set():
+            self._last_beat = time.monotonic()
+            await asyncio.sleep(tick)
+
+    def _running_task(self) -> Optional[str]:
+        task = asyncio.current_task(self._loop) if self._loop else None
+        if task is None:
+            return None
+        coro = task.get_coro()
+        return f"{task.get_name()} ({getattr(coro, '__qualname__', repr(coro))})"
+
+    def _watch(self):
+        tick = self.threshold / 4
+        current: Optional[Dict[str, Any]] = None
+        while not self._stop.wait(tick):
+            stalled_for = time.monotonic() - self._last_beat
+            # The heartbeat sleeps for one tick between beats; allow for that
+            if stalled_for > self.threshold + tick:
+                if current is None:
+                    frame = sys._current_frames().get(self._loop_thread)
+                    current = {
+                        "detected_at": time.time(),
+                        "blocked_ms": round(stalled_for * 1000.0, 1),
+                        "task": self._running_task(),
+                        "stack": traceback.format_stack(frame) if frame is not None else [],
+                        "finished": False,
+                    }
+                    del frame
+                    self.events.append(current)
+                else:
+                    current["blocked_ms"] = round(stalled_for * 1000.0, 1)
+            elif current is not None:
+                current["finished"] = True
+                LOOP_BLOCKED_DURATION.observe(current["blocked_ms"] / 1000.0)
+                current = None
+
+    def report(self, limit: int = 50) -> Dict[str, Any]:
+        return {
+            "running": self.is_running,
+            "threshold_ms": self.threshold * 1000.0,
+            "events": list(reversed(self.events))[:limit],
+        }
+
+
+profiler = SamplingProfiler()
+block_monitor = LoopBlockMonitor()
@@ -0,0 +1,426 @@
+"""
+Virtual-clock replay of the simulation feed.
+
+Posts are emitted at their recorded relative times: ``timeline`` turns the
+``timestamp`` of each post into an offset (seconds since the first post),
+capping idle gaps at ``REPLAY_MAX_GAP`` so the days between two incidents
+don't stall the demo. ``VirtualClock`` advances ``REPLAY_TIME_SCALE``
+recorded seconds per wall second at speed 1, times the demo speed; pausing
+stops it and speed changes take effect from the moment they are made.
+
+Seeking goes through snapshots of the replay tables (incidents, posts,
+comments, authors) in ``<REPLAY_SNAPSHOT_DIR>/<position>.jsonl.gz``. A
+snapshot dumps every row, so they are spaced geometrically: the next one is
+due ``REPLAY_SNAPSHOT_EVERY`` posts after the last, or once the position has
+grown by ``REPLAY_SNAPSHOT_GROWTH`` times, whichever is later. That keeps the
+rows written linear in the feed length while a seek replays at most a third
+of the position (at 1.5). Paced replay snapshots as soon as one is due;
+fast-forward and seek only check once, at the end of their run. ``seek(target)`` moves
+forward by replaying the delta from the current position; backwards it
+restores the nearest snapshot at or before ``target`` (or empty tables) and
+replays only the posts after it. ``fast_forward`` ingests without pacing,
+for catching up or load testing:
+
+    python -m services.replay --data data/bench.json --fast-forward
+"""
+import asyncio
+import gzip
+import json
+import os
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from models.incident import IncidentResponse
+from models.post import CommentResponse, PostResponse
+from services import analysis_service, archive, attribution, credibility, entity_cache, http_cache, narratives, tree_layout, velocity
+from services.metrics import registry
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPLAY_TIME_SCALE = float(os.getenv("REPLAY_TIME_SCALE", "300"))
+REPLAY_MAX_GAP = float(os.getenv("REPLAY_MAX_GAP", "900"))
+REPLAY_SNAPSHOT_EVERY = int(os.getenv("REPLAY_SNAPSHOT_EVERY", "10"))
+REPLAY_SNAPSHOT_GROWTH = float(os.getenv("REPLAY_SNAPSHOT_GROWTH", "1.5"))
+REPLAY_SNAPSHOT_DIR = os.getenv("REPLAY_SNAPSHOT_DIR", os.path.join(_BACKEND_DIR, "data", "replay"))
+
+AUTHOR_FIELDS = ("name", "postCount", "classifiedCount", "fabricationCount", "credibleVotes", "totalVotes")
+
+REPLAYED_POSTS = registry.counter(
+    "factsaura_replay_posts_total",
+    "Simulation posts emitted by the replay engine (paced, fast_forward or seek).",
+    ["mode"],
+)
+
+Runner = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+def _parse(timestamp: Optional[str]) -> Optional[float]:
+    if not timestamp:
+        return None
+    try:
+        return datetime.fromisoformat(timestamp.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def timeline(posts: List[Dict[str, Any]], max_gap: float = REPLAY_MAX_GAP) -> List[float]:
+    """
+    Offset of each post from the first, in recorded seconds, with gaps
+    capped at ``max_gap``. Missing or out-of-order timestamps add no gap.
+    """
+    offsets: List[float] = []
+    previous = None
+    offset = 0.0
+    for post in posts:
+        at = _parse(post.get("timestamp"))
+        if previous is not None and at is not None:
+            offset += min(max(at - previous, 0.0), max_gap)
+        if at is not None:
+            previous = at
+        offsets.append(offset)
+    return offsets
+
+
+class VirtualClock:
+    def __init__(self, scale: float = REPLAY_TIME_SCALE, timer: Callable[[], float] = time.monotonic):
+        self.scale = scale
+        self.timer = timer
+        self.speed = 1.0
+        self.paused = False
+        # Virtual time at the anchor, and the wall time of the anchor
+        self._base = 0.0
+        self._anchor = timer()
+
+    def now(self) -> float:
+        if self.paused:
+            return self._base
+        return self._base + (self.timer() - self._anchor) * self.scale * self.speed
+
+    def _rebase(self):
+        self._base = self.now()
+        self._anchor = self.timer()
+
+    def set_speed(self, speed: float):
+        if speed > 0 and speed != self.speed:
+            self._rebase()
+            self.speed = speed
+
+    def pause(self):
+        if not self.paused:
+            self._rebase()
+            self.paused = True
+
+    def resume(self):
+        if self.paused:
+            self._anchor = self.timer()
+            self.paused = False
+
+    def jump(self, virtual_time: float):
+        self._base = virtual_time
+        self._anchor = self.timer()
+
+    def wall_seconds(self, virtual_seconds: float) -> float:
+        return virtual_seconds / (self.scale * self.speed)
+
+
+def _write_snapshot(path: str, rows: Dict[str, List[Dict[str, Any]]]):
+    tmp = path + ".tmp"
+    with gzip.open(tmp, "wt", encoding="utf-8") as f:
+        for kind, records in rows.items():
+            for record in records:
+                f.write(json.dumps({"type": kind, "record": record}, default=datetime.isoformat) + "\n")
+    os.replace(tmp, path)
+
+
+def _read_snapshot(path: str) -> Dict[str, List[Dict[str, Any]]]:
+    rows: Dict[str, List[Dict[str, Any]]] = {"incident": [], "post": [], "comment": [], "author": []}
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line)
+            rows[entry["type"]].append(entry["record"])
+    # Back to datetimes (and parents before children) for the inserts
+    rows["incident"] = [IncidentResponse.model_validate(r).model_dump() for r in rows["incident"]]
+    rows["post"] = sorted((PostResponse.model_validate(r).model_dump() for r in rows["post"]),
+                          key=lambda p: p["timestamp"])
+    rows["comment"] = [CommentResponse.model_validate(r).model_dump() for r in rows["comment"]]
+    return rows
+
+
+class SnapshotStore:
+    def __init__(self, directory: str = REPLAY_SNAPSHOT_DIR):
+        self.directory = directory
+
+    def path_for(self, position: int) -> str:
+        return os.path.join(self.directory, f"{position}.jsonl.gz")
+
+    def positions(self) -> List[int]:
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted(int(name.split(".")[0]) for name in names
+                      if name.endswith(".jsonl.gz") and name.split(".")[0].isdigit())
+
+    def nearest(self, target: int) -> Optional[int]:
+        """
+        The latest snapshot at or before ``target``.
+        """
+        earlier = [p for p in self.positions() if p <= target]
+        return earlier[-1] if earlier else None
+
+    async def write(self, position: int, rows: Dict[str, List[Dict[str, Any]]]):
+        os.makedirs(self.directory, exist_ok=True)
+        await asyncio.to_thread(_write_snapshot, self.path_for(position), rows)
+
+    async def read(self, position: int) -> Dict[str, List[Dict[str, Any]]]:
+        return await asyncio.to_thread(_read_snapshot, self.path_for(position))
+
+    def clear(self):
+        """
+        Deletes every snapshot (demo reset).
+        """
+        for position in self.positions():
+            try:
+                os.remove(self.path_for(position))
+            except FileNotFoundError:
+                pass
+
+
+snapshots = SnapshotStore()
+
+
+class ReplayEngine:
+    def __init__(self, scanner, store: SnapshotStore = snapshots, clock: Optional[VirtualClock] = None,
+                 snapshot_every: int = REPLAY_SNAPSHOT_EVERY, snapshot_growth: float = REPLAY_SNAPSHOT_GROWTH):
+        self.scanner = scanner
+        self.db = scanner.db
+        self.store = store
+        self.clock = clock or VirtualClock()
+        self.snapshot_every = snapshot_every
+        self.snapshot_growth = snapshot_growth
+        self.offsets = timeline(scanner.posts)
+        # Position the clock was last aligned with
+        self._position = 0
+        # Ingest and seeks never interleave
+        self._lock = asyncio.Lock()
+        self.align()
+
+    @property
+    def position(self) -> int:
+        return self.scanner.current_post_index
+
+    @property
+    def end(self) -> int:
+        return min(len(self.scanner.posts), self.scanner.MAX_POSTS_LIMIT)
+
+    def offset_at(self, position: int) -> float:
+        """
+        Virtual time once ``position`` posts have been emitted.
+        """
+        if not self.offsets:
+            return 0.0
+        return self.offsets[min(max(position - 1, 0), len(self.offsets) - 1)]
+
+    def align(self):
+        self.clock.jump(self.offset_at(self.position))
+        self._position = self.position
+
+    async def sync(self, state):
+        """
+        Applies the DemoState row: a reset rewinds the cursor (and clock),
+        speed and pause drive the clock.
+        """
+        await self.scanner.restore_position(state)
+        if self.position != self._position:
+            self.align()
+        if state is None:
+            return
+        self.clock.set_speed(state.speed)
+        if state.isPaused:
+            self.clock.pause()
+        else:
+            self.clock.resume()
+
+    def time_until_next(self) -> Optional[float]:
+        """
+        Wall seconds until the next post is due (0 if overdue), or None when
+        the feed is exhausted.
+        """
+        if self.position >= self.end:
+            return None
+        ahead = self.offsets[self.position] - self.clock.now()
+        return max(self.clock.wall_seconds(ahead), 0.0)
+
+    async def _emit(self, run: Runner, mode: str) -> Optional[Dict[str, Any]]:
+        post = self.scanner.get_next_post()
+        if post is None:
+            return None
+        await run(post)
+        REPLAYED_POSTS.inc(mode=mode)
+        self._position = self.position
+        return post
+
+    def snapshot_due(self) -> bool:
+        if not self.snapshot_every:
+            return False
+        last = self.store.nearest(self.position) or 0
+        return self.position >= max(last + self.snapshot_every, last * self.snapshot_growth)
+
+    async def step(self, run: Runner) -> Optional[Dict[str, Any]]:
+        """
+        Emits the next post if it is due.
+        """
+        async with self._lock:
+            wait = self.time_until_next()
+            if wait is None or wait > 0:
+                return None
+            post = await self._emit(run, "paced")
+            if self.snapshot_due():
+                await self.snapshot()
+            return post
+
+    async def fast_forward(self, run: Runner, count: Optional[int] = None, mode: str = "fast_forward") -> Dict[str, Any]:
+        """
+        Ingests up to ``count`` posts (default: the rest of the feed) without
+        pacing, then moves the clock to the last one.
+        """
+        async with self._lock:
+            return await self._fast_forward(run, count, mode)
+
+    async def _fast_forward(self, run: Runner, count: Optional[int], mode: str) -> Dict[str, Any]:
+        start = time.perf_counter()
+        emitted = 0
+        while count is None or emitted < count:
+            if await self._emit(run, mode) is None:
+                break
+            emitted += 1
+        self.align()
+        elapsed = time.perf_counter() - start
+        # One check per run (and outside the timing): snapshots inside a bulk
+        # run would make it quadratic in the posts ingested
+        if emitted and self.snapshot_due():
+            await self.snapshot()
+        return {
+            "ingested": emitted,
+            "position": self.position,
+            "seconds": round(elapsed, 3),
+            "postsPerSecond": round(emitted / elapsed, 1) if elapsed > 0 else None,
+        }
+
+    async def snapshot(self):
+        if not self.db.is_connected():
+            await self.db.connect()
+        incidents = await self.db.incident.find_many()
+        posts = await self.db.post.find_many(order={"timestamp": "asc"})
+        comments = await self.db.comment.find_many()
+        authors = await self.db.author.find_many()
+        await self.store.write(self.position, {
+            "incident": [IncidentResponse.model_validate(i).model_dump() for i in incidents],
+            "post": [PostResponse.model_validate(p).model_dump() for p in posts],
+            "comment": [CommentResponse.model_validate(c).model_dump() for c in comments],
+            "author": [{k: getattr(a, k) for k in AUTHOR_FIELDS} for a in authors],
+        })
+        print(f"[Replay] Snapshot at post {self.position}: {len(posts)} posts")
+
+    async def _restore(self, position: Optional[int]):
+        if not self.db.is_connected():
+            await self.db.connect()
+        rows = await self.store.read(position) if position is not None else None
+        async with self.db.tx() as tx:
+            await tx.comment.delete_many()
+            await tx.post.delete_many()
+            await tx.author.delete_many()
+            if rows is not None:
+                await tx.incident.delete_many()
+                for model, kind in ((tx.incident, "incident"), (tx.post, "post"),
+                                    (tx.comment, "comment"), (tx.author, "author")):
+                    if rows[kind]:
+                        await model.create_many(data=rows[kind])
+            else:
+                await tx.incident.update_many(where={"archivedAt": {"not": None}}, data={"archivedAt": None})
+
+        # Archives made after the snapshot would shadow the restored rows:
+        # only incidents archived as of the snapshot stay in cold storage
+        still_archived = {i["id"] for i in (rows or {}).get("incident", []) if i.get("archivedAt")}
+        for incident_id in list(archive.store.manifest()):
+            if incident_id not in still_archived:
+                archive.store.discard(incident_id)
+
+        # Derived in-memory state describes the rows that were just replaced
+        entity_cache.clear()
+        credibility.cache.clear()
+        attribution.index.reset()
+        velocity.tracker.reset()
+        narratives.engine.reset()
+        tree_layout.layouts.reset()
+        analysis_service.clear_verdicts()
+        for post in (rows or {}).get("post", []):
+            await narratives.post_created(post["incidentId"], post["id"], post["content"])
+        http_cache.bump_all()
+
+        self.scanner.rewind(position or 0)
+        await self.scanner.checkpoint()
+
+    async def seek(self, run: Runner, target: int) -> Dict[str, Any]:
+        """
+        Moves the replay to ``target`` posts emitted: forward by replaying
+        the delta, backward from the nearest snapshot (or empty tables).
+        """
+        target = max(0, min(target, self.end))
+        async with self._lock:
+            restored_from = None
+            if target < self.position:
+                snapshot = self.store.nearest(target)
+                await self._restore(snapshot)
+                restored_from = snapshot or 0
+            result = await self._fast_forward(run, target - self.position, "seek")
+        return {**result, "restoredFrom": restored_from}
+
+    def status(self) -> Dict[str, Any]:
+        last = self.scanner.posts[self.position - 1] if 0 < self.position <= len(self.scanner.posts) else None
+        return {
+            "position": self.position,
+            "total": self.end,
+            "virtualTime": round(self.clock.now(), 3),
+            "recordedAt": last.get("timestamp") if last else None,
+            "nextDueIn": self.time_until_next(),
+            "speed": self.clock.speed,
+            "paused": self.clock.paused,
+            "snapshots": self.store.positions(),
+        }
+
+
+async def _main(argv=None):
+    import argparse
+    from services.agent_manager import AgentManager
+    from services.agents.scanner_agent import ScannerAgent
+
+    parser = argparse.ArgumentParser(description="Replay the simulation feed without pacing (load testing).")
+    parser.add_argument("--data", default="data/simulation_data.json", help="simulation file (incidents + posts)")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--fast-forward", action="store_true", help="ingest the rest of the feed at full speed")
+    mode.add_argument("--seek", type=int, help="move the replay to this position")
+    parser.add_argument("--count", type=int, default=None, help="with --fast-forward, stop after this many posts")
+    args = parser.parse_args(argv)
+
+    manager = AgentManager()
+    manager.setup()
+    scanner = manager.scanner = ScannerAgent(data_path=args.data, db=manager.scanner.db)
+    scanner.MAX_POSTS_LIMIT = len(scanner.posts)
+    await scanner.db.connect()
+    await manager.publisher.db.connect()
+    await scanner.restore_position()
+    engine = ReplayEngine(scanner)
+    try:
+        if args.seek is not None:
+            result = await engine.seek(manager.run_pipeline, args.seek)
+        else:
+            result = await engine.fast_forward(manager.run_pipeline, args.count)
+        print(json.dumps(result))
+    finally:
+        await scanner.db.disconnect()
+        await manager.publisher.db.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
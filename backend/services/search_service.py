@@ -0,0 +1,166 @@
+"""
+Full-text search over Post and Comment content.
+
+Both tables carry a generated ``searchVector`` tsvector column with a GIN
+index (see the ``full_text_search`` migration), so matching is an index
+scan. Hits are ordered by ``ts_rank_cd`` (``sort="rank"``) or newest first
+(``sort="recent"``) and paged with a keyset cursor on (sort key, id) rather
+than OFFSET, so deep pages cost the same as the first. Ranking has to score
+every match, so very common terms are cheaper with ``sort="recent"``, which
+can walk the timestamp index and stop at the page size. ``ts_headline`` is
+comparatively expensive and only runs on the returned page.
+
+``highlight`` is safe to render as HTML: ts_headline marks matches with
+private-use sentinel characters, and ``render_highlight`` HTML-escapes the
+excerpt (user content) before turning the sentinels into ``<mark>`` tags.
+"""
+import base64
+import html
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from services.metrics import instrument_prisma
+
+SEARCH_CONFIG = "english"
+# U+E000/U+E001: can't be confused with markup, and stripped from content first
+MARK_START = "\ue000"
+MARK_STOP = "\ue001"
+HEADLINE_OPTIONS = f"StartSel={MARK_START}, StopSel={MARK_STOP}, MaxFragments=2, MaxWords=24, MinWords=8"
+
+_POST_HITS = """
+    SELECT 'post' AS "kind", p."id", p."id" AS "postId", p."incidentId", p."author", p."content",
+           p."timestamp" AS "createdAt", ts_rank_cd(p."searchVector", q.query) AS "rank"
+    FROM "Post" p, q
+    WHERE p."searchVector" @@ q.query
+      AND ($2::text IS NULL OR p."incidentId" = $2)
+      AND ($3::timestamp IS NULL OR p."timestamp" >= $3::timestamp)
+      AND ($4::timestamp IS NULL OR p."timestamp" < $4::timestamp)
+"""
+
+_COMMENT_HITS = """
+    SELECT 'comment' AS "kind", c."id", c."postId", p."incidentId", c."author", c."content",
+           c."createdAt", ts_rank_cd(c."searchVector", q.query) AS "rank"
+    FROM "Comment" c JOIN "Post" p ON p."id" = c."postId", q
+    WHERE c."searchVector" @@ q.query
+      AND ($2::text IS NULL OR p."incidentId" = $2)
+      AND ($3::timestamp IS NULL OR c."createdAt" >= $3::timestamp)
+      AND ($4::timestamp IS NULL OR c."createdAt" < $4::timestamp)
+"""
+
+_SEARCH_SQL = """
+WITH q AS (SELECT websearch_to_tsquery('{config}', $1) AS query),
+hits AS ({hits}),
+page AS (
+    SELECT * FROM hits
+    WHERE $5::{key_type} IS NULL OR "{key}" < $5::{key_type} OR ("{key}" = $5::{key_type} AND "id" > $6)
+    ORDER BY "{key}" DESC, "id" ASC
+    LIMIT $7
+)
+SELECT page.*, ts_headline('{config}', translate(page."content", '{sentinels}', ''), q.query, '{headline}') AS "highlight"
+FROM page, q
+ORDER BY page."{key}" DESC, page."id" ASC
+"""
+
+KINDS = {"posts": (_POST_HITS,), "comments": (_COMMENT_HITS,), "all": (_POST_HITS, _COMMENT_HITS)}
+# sort -> (column, SQL type of the cursor key)
+SORTS = {"rank": ("rank", "real"), "recent": ("createdAt", "timestamp")}
+
+
+def encode_cursor(sort: str, key: Any, hit_id: str) -> str:
+    if isinstance(key, datetime):
+        key = _timestamp(key)
+    raw = json.dumps([sort, key, hit_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str):
+    """
+    Returns (key, id); raises ValueError on a malformed cursor or one
+    issued for a different sort order.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, key, hit_id = json.loads(base64.urlsafe_b64decode(padded))
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+    if cursor_sort != sort:
+        raise ValueError("Cursor was issued for a different sort order")
+    return key, str(hit_id)
+
+
+def build_query(kind: str, sort: str = "rank") -> str:
+    hits = "\n    UNION ALL\n".join(KINDS[kind])
+    key, key_type = SORTS[sort]
+    return _SEARCH_SQL.format(config=SEARCH_CONFIG, hits=hits, headline=HEADLINE_OPTIONS, key=key, key_type=key_type,
+                              sentinels=MARK_START + MARK_STOP)
+
+
+def render_highlight(headline: str) -> str:
+    """
+    ts_headline output -> HTML: the excerpt escaped, matches in <mark>.
+    """
+    return html.escape(headline).replace(MARK_START, "<mark>").replace(MARK_STOP, "</mark>")
+
+
+def _timestamp(value: Optional[datetime]) -> Optional[str]:
+    # Prisma stores DateTime as UTC timestamp(3) without time zone
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat()
+
+
+class SearchService:
+    def __init__(self, db=None):
+        if db is None:
+            from prisma import Prisma
+            db = instrument_prisma(Prisma())
+        self.db = db
+
+    async def connect(self):
+        if not self.db.is_connected():
+            await self.db.connect()
+
+    async def disconnect(self):
+        if self.db.is_connected():
+            await self.db.disconnect()
+
+    async def search(
+        self,
+        query: str,
+        incident_id: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        kind: str = "all",
+        sort: str = "rank",
+        limit: int = 20,
+        cursor: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Matches for a web-search style query ("quoted phrases", -exclusions, or).
+        Returns {"results": [...], "nextCursor": str | None}.
+        """
+        await self.connect()
+        after_key, after_id = decode_cursor(cursor, sort) if cursor else (None, None)
+
+        # One extra row tells us whether another page exists
+        rows = await self.db.query_raw(
+            build_query(kind, sort),
+            query,
+            incident_id,
+            _timestamp(since),
+            _timestamp(until),
+            after_key,
+            after_id,
+            limit + 1,
+        )
+        results: List[Dict[str, Any]] = rows[:limit]
+        for row in results:
+            row["highlight"] = render_highlight(row["highlight"])
+        next_cursor = None
+        if len(rows) > limit and results:
+            last = results[-1]
+            next_cursor = encode_cursor(sort, last[SORTS[sort][0]], last["id"])
+        return {"results": results, "nextCursor": next_cursor}
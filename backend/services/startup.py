@@ -0,0 +1,33 @@
+"""
+Cold-start timing for the API process.
+
+``main.py`` marks when its imports begin and end and when the lifespan
+finishes; the phases are exported as gauges on ``/metrics`` so cold-start
+regressions show up next to request latency. For a per-module import
+breakdown run ``python -m benchmarks.startup_report``.
+"""
+import time
+from typing import Dict, Optional
+
+from services.metrics import registry
+
+STARTUP_PHASE_SECONDS = registry.gauge(
+    "factsaura_startup_phase_seconds",
+    "Wall time spent in each startup phase of this process.",
+    ["phase"],
+)
+
+_marks: Dict[str, float] = {}
+
+
+def mark(name: str, at: Optional[float] = None):
+    _marks[name] = time.perf_counter() if at is None else at
+
+
+def record_phase(phase: str, start_mark: str, end_mark: str):
+    if start_mark in _marks and end_mark in _marks:
+        STARTUP_PHASE_SECONDS.set(_marks[end_mark] - _marks[start_mark], phase=phase)
+
+
+def phases() -> Dict[str, float]:
+    return {key[0]: value for key, value in STARTUP_PHASE_SECONDS.values.items()}
@@ -0,0 +1,81 @@
+"""
+Text comparison primitives (Levenshtein similarity, difflib opcodes).
+
+The plain functions are module-level so the process pool can pickle them.
+The async wrappers decide from the input size whether to run inline or on
+the shared executor:
+
+  SIMILARITY_OFFLOAD_CHARS - total characters scanned by find_similar
+                             before the scan is chunked across the pool;
+  SIMILARITY_CHUNK_SIZE    - candidates per chunk;
+  PAIR_OFFLOAD_CHARS       - combined length of a pair above which a single
+                             mutation score or diff is offloaded.
+"""
+import os
+from typing import List, Sequence, Tuple
+
+from services import executor
+
+SIMILARITY_OFFLOAD_CHARS = int(os.getenv("SIMILARITY_OFFLOAD_CHARS", "200000"))
+SIMILARITY_CHUNK_SIZE = int(os.getenv("SIMILARITY_CHUNK_SIZE", "2000"))
+PAIR_OFFLOAD_CHARS = int(os.getenv("PAIR_OFFLOAD_CHARS", "20000"))
+
+
+def mutation_score(parent_content: str, child_content: str) -> float:
+    """
+    Score = (1 - Levenshtein ratio) * 100; 0 = identical, 100 = unrelated.
+    """
+    if not parent_content or not child_content:
+        return 100.0
+
+    from Levenshtein import ratio
+    return (1.0 - ratio(parent_content, child_content)) * 100.0
+
+
+def diff_opcodes(old: str, new: str) -> List[Tuple[str, int, int, int, int]]:
+    """
+    difflib opcodes (tag, i1, i2, j1, j2) turning ``old`` into ``new``.
+    """
+    import difflib
+    return difflib.SequenceMatcher(None, old, new).get_opcodes()
+
+
+def similarity_scores(candidates: Sequence[str], content: str, threshold: float) -> List[Tuple[int, float]]:
+    """
+    (index, ratio) for every candidate whose ratio to ``content`` >= threshold.
+    """
+    from Levenshtein import ratio
+    matches = []
+    for index, candidate in enumerate(candidates):
+        similarity = ratio(content, candidate)
+        if similarity >= threshold:
+            matches.append((index, similarity))
+    return matches
+
+
+async def find_similar(content: str, candidates: Sequence[str], threshold: float) -> List[Tuple[int, float]]:
+    """
+    Async ``similarity_scores`` that fans large scans out over the executor.
+    """
+    work = len(content) * len(candidates) + sum(len(c) for c in candidates)
+    if work < SIMILARITY_OFFLOAD_CHARS or len(candidates) <= 1:
+        return await executor.run_cpu("similarity", similarity_scores, candidates, content, threshold, offload=False)
+
+    chunk_results = await executor.map_chunks(
+        "similarity", similarity_scores, list(candidates), SIMILARITY_CHUNK_SIZE, content, threshold
+    )
+    matches = []
+    for chunk_index, chunk in enumerate(chunk_results):
+        offset = chunk_index * SIMILARITY_CHUNK_SIZE
+        matches.extend((offset + index, similarity) for index, similarity in chunk)
+    return matches
+
+
+async def compute_mutation_score(parent_content: str, child_content: str) -> float:
+    offload = len(parent_content or "") + len(child_content or "") >= PAIR_OFFLOAD_CHARS
+    return await executor.run_cpu("mutation_score", mutation_score, parent_content, child_content, offload=offload)
+
+
+async def compute_diff(old: str, new: str) -> List[Tuple[str, int, int, int, int]]:
+    offload = len(old) + len(new) >= PAIR_OFFLOAD_CHARS
+    return await executor.run_cpu("diff", diff_opcodes, old, new, offload=offload)
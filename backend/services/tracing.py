@@ -0,0 +1,120 @@
+"""
+Lightweight span tracing.
+
+A trace is opened per HTTP request by ``MetricsMiddleware``; code underneath
+(Prisma queries, Gemini calls) opens child spans with ``span()``. Finished
+traces are kept in a bounded in-memory buffer and served by ``/api/traces``.
+
+Disabled unless ``TRACING_ENABLED`` is set; ``TRACE_SAMPLE_RATE`` (0-1)
+controls which fraction of requests is traced.
+"""
+import os
+import random
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, List, Optional
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() in ("1", "true", "yes")
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "200"))
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("factsaura_current_span", default=None)
+_finished: Deque[Dict[str, Any]] = deque(maxlen=TRACE_BUFFER_SIZE)
+
+
+class Span:
+    def __init__(self, name: str, trace_id: str, parent: Optional["Span"] = None, **attributes: Any):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent = parent
+        self.attributes: Dict[str, Any] = attributes
+        self.children: List["Span"] = []
+        self.start = time.perf_counter()
+        self.started_at = time.time()
+        self.end: Optional[float] = None
+        self.error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        if self.end is None:
+            return None
+        return round((self.end - self.start) * 1000.0, 3)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "spanId": self.span_id,
+            "startedAt": self.started_at,
+            "durationMs": self.duration_ms,
+            "attributes": self.attributes,
+            "error": self.error,
+            "children": [child.to_dict() for child in self.children],
+        }
+
+
+def is_enabled() -> bool:
+    return TRACING_ENABLED
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+@contextmanager
+def start_trace(name: str, **attributes: Any):
+    """
+    Opens a root span, or yields None when tracing is off or not sampled.
+    """
+    if not TRACING_ENABLED or random.random() >= TRACE_SAMPLE_RATE:
+        yield None
+        return
+
+    root = Span(name, uuid.uuid4().hex, **attributes)
+    token = _current_span.set(root)
+    try:
+        yield root
+    except BaseException as e:
+        root.error = repr(e)
+        raise
+    finally:
+        root.end = time.perf_counter()
+        _current_span.reset(token)
+        _finished.append({"traceId": root.trace_id, **root.to_dict()})
+
+
+@contextmanager
+def span(name: str, **attributes: Any):
+    """
+    Opens a child of the current span; a no-op outside a trace.
+    """
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+
+    child = Span(name, parent.trace_id, parent, **attributes)
+    parent.children.append(child)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.error = repr(e)
+        raise
+    finally:
+        child.end = time.perf_counter()
+        _current_span.reset(token)
+
+
+def get_traces(limit: int = 50) -> List[Dict[str, Any]]:
+    """
+    Most recent finished traces, newest first.
+    """
+    return list(reversed(_finished))[:limit]
+
+
+def get_trace(trace_id: str) -> Optional[Dict[str, Any]]:
+    return next((t for t in _finished if t["traceId"] == trace_id), None)
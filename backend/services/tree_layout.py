@@ -0,0 +1,175 @@
+"""
+Server-side layout of an incident's post tree (parent -> reply).
+
+The layout is layered and append-only: a post sits one row below its parent
+(roots, and replies to unknown parents, on row 0), at the parent's x or the
+first free slot to its right in that row. Placing a post therefore costs
+O(1) and never moves an existing node, so appending a leaf leaves every
+other position (and what clients already drew) unchanged.
+
+Within a row, x only grows in arrival order, so each row is a sorted list
+and a viewport query is a bisect per visible row. Layouts are built from the
+database (or the archive) the first time an incident is asked for, then kept
+current by the ingest hooks; at most ``LAYOUT_MAX_INCIDENTS`` are cached.
+"""
+import bisect
+import os
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from services import archive
+from services.metrics import record_cache
+
+LAYOUT_MAX_INCIDENTS = int(os.getenv("LAYOUT_MAX_INCIDENTS", "200"))
+
+# Same node box as the frontend's PostNode
+NODE_WIDTH = 300
+NODE_HEIGHT = 150
+COLUMN_PITCH = NODE_WIDTH + 40
+ROW_PITCH = NODE_HEIGHT + 100
+
+
+class Placement(NamedTuple):
+    x: float
+    y: float
+    depth: int
+    parent_id: Optional[str]
+
+
+class TreeLayout:
+    def __init__(self):
+        self.nodes: Dict[str, Placement] = {}
+        # Per depth: node x positions (ascending) and ids, in arrival order
+        self._xs: List[List[float]] = []
+        self._ids: List[List[str]] = []
+
+    def add(self, post_id: str, parent_id: Optional[str]) -> bool:
+        if post_id in self.nodes:
+            return False
+        parent = self.nodes.get(parent_id) if parent_id else None
+        depth = parent.depth + 1 if parent else 0
+        if depth == len(self._xs):
+            self._xs.append([])
+            self._ids.append([])
+        xs = self._xs[depth]
+        free = xs[-1] + COLUMN_PITCH if xs else 0.0
+        x = max(parent.x, free) if parent else free
+        xs.append(x)
+        self._ids[depth].append(post_id)
+        self.nodes[post_id] = Placement(x, depth * ROW_PITCH, depth, parent_id if parent else None)
+        return True
+
+    def bounds(self) -> Dict[str, float]:
+        if not self.nodes:
+            return {"width": 0.0, "height": 0.0}
+        return {
+            "width": max(xs[-1] for xs in self._xs) + NODE_WIDTH,
+            "height": (len(self._xs) - 1) * ROW_PITCH + NODE_HEIGHT,
+        }
+
+    def visible(self, x0: float, y0: float, x1: float, y1: float) -> List[str]:
+        """
+        Ids of the nodes whose box intersects the rectangle.
+        """
+        first = max(int((y0 - NODE_HEIGHT) // ROW_PITCH) + 1, 0)
+        last = min(int(y1 // ROW_PITCH), len(self._xs) - 1)
+        ids: List[str] = []
+        for depth in range(first, last + 1):
+            xs = self._xs[depth]
+            lo = bisect.bisect_right(xs, x0 - NODE_WIDTH)
+            hi = bisect.bisect_right(xs, x1)
+            ids.extend(self._ids[depth][lo:hi])
+        return ids
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+
+class LayoutCache:
+    def __init__(self, max_incidents: int = LAYOUT_MAX_INCIDENTS):
+        self.max_incidents = max_incidents
+        self._layouts: "OrderedDict[str, TreeLayout]" = OrderedDict()
+        # Posts that arrived while their incident's layout was being built
+        self._pending: Dict[str, List[Tuple[str, Optional[str]]]] = {}
+
+    async def get(self, db, incident_id: str) -> TreeLayout:
+        layout = self._layouts.get(incident_id)
+        record_cache("tree_layout", layout is not None)
+        if layout is not None:
+            self._layouts.move_to_end(incident_id)
+            return layout
+
+        pending = self._pending.setdefault(incident_id, [])
+        try:
+            if archive.store.is_archived(incident_id):
+                posts = await archive.store.posts(incident_id)
+            else:
+                posts = await db.post.find_many(where={"incidentId": incident_id}, order={"timestamp": "asc"})
+        except BaseException:
+            self._pending.pop(incident_id, None)
+            raise
+        layout = self._layouts.get(incident_id)
+        if layout is None:
+            layout = TreeLayout()
+            for post in posts:
+                layout.add(post.id, post.parentId)
+            self._layouts[incident_id] = layout
+            if len(self._layouts) > self.max_incidents:
+                self._layouts.popitem(last=False)
+        for post_id, parent_id in self._pending.pop(incident_id, pending):
+            layout.add(post_id, parent_id)
+        return layout
+
+    def add(self, incident_id: str, post_id: str, parent_id: Optional[str]):
+        layout = self._layouts.get(incident_id)
+        if layout is not None:
+            layout.add(post_id, parent_id)
+        elif incident_id in self._pending:
+            self._pending[incident_id].append((post_id, parent_id))
+
+    def reset(self):
+        self._layouts.clear()
+        self._pending.clear()
+
+
+layouts = LayoutCache()
+
+
+def post_created(incident_id: str, post_id: str, parent_id: Optional[str]):
+    """
+    Ingest hook: places a stored post in its incident's cached layout.
+    """
+    layouts.add(incident_id, post_id, parent_id)
+
+
+def view(layout: TreeLayout, x0: Optional[float] = None, y0: Optional[float] = None,
+         x1: Optional[float] = None, y1: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Positioned nodes and edges inside the viewport (the whole tree when no
+    bound is given). Parents of visible nodes are included so every
+    returned edge has both ends.
+    """
+    if None in (x0, y0, x1, y1):
+        ids = list(layout.nodes)
+    else:
+        ids = layout.visible(x0, y0, x1, y1)
+    selected = dict.fromkeys(ids)
+    for post_id in ids:
+        parent_id = layout.nodes[post_id].parent_id
+        if parent_id is not None:
+            selected.setdefault(parent_id)
+    nodes = []
+    edges = []
+    for post_id in selected:
+        node = layout.nodes[post_id]
+        nodes.append({"id": post_id, "x": node.x, "y": node.y, "depth": node.depth, "parentId": node.parent_id})
+        if node.parent_id is not None and node.parent_id in selected:
+            edges.append({"id": f"{node.parent_id}-{post_id}", "source": node.parent_id, "target": post_id})
+    return {
+        "nodeWidth": NODE_WIDTH,
+        "nodeHeight": NODE_HEIGHT,
+        "size": len(layout),
+        "bounds": layout.bounds(),
+        "nodes": nodes,
+        "edges": edges,
+    }
@@ -0,0 +1,211 @@
+"""
+Sliding-window propagation velocity per incident.
+
+The ingest path feeds events (``post_created``, ``post_classified``,
+``vote_cast``) into fixed-size, time-bucketed ring buffers:
+
+  - a fine ring of 12 x 5 s buckets answers the 1 m window;
+  - a coarse ring of 60 x 1 min buckets answers the 15 m and 1 h windows.
+
+Each incident therefore costs a constant amount of memory however many
+posts arrive, and at most ``VELOCITY_MAX_INCIDENTS`` incidents are tracked
+(least recently active evicted first). Reading a snapshot sums at most 60
+buckets and never touches the database.
+
+When the 1 m posts/min or new-branches/min rate crosses its threshold
+(``VELOCITY_ALERT_POSTS_PER_MIN``, ``VELOCITY_ALERT_BRANCHES_PER_MIN``) a
+``velocity_alert`` message is broadcast on the incident's WebSocket channel.
+The alert re-arms once the rate falls below ``VELOCITY_ALERT_REARM`` of the
+threshold, so a rate hovering at the limit doesn't spam subscribers.
+"""
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from services.metrics import registry
+
+MAX_INCIDENTS = int(os.getenv("VELOCITY_MAX_INCIDENTS", "1000"))
+ALERT_POSTS_PER_MIN = float(os.getenv("VELOCITY_ALERT_POSTS_PER_MIN", "30"))
+ALERT_BRANCHES_PER_MIN = float(os.getenv("VELOCITY_ALERT_BRANCHES_PER_MIN", "10"))
+ALERT_REARM = float(os.getenv("VELOCITY_ALERT_REARM", "0.8"))
+
+# Counters kept per bucket
+FIELDS = ("posts", "branches", "classified", "fabrications", "votes")
+POSTS, BRANCHES, CLASSIFIED, FABRICATIONS, VOTES = range(len(FIELDS))
+
+# window name -> (ring, seconds)
+WINDOWS = {"1m": ("fine", 60), "15m": ("coarse", 900), "1h": ("coarse", 3600)}
+
+VELOCITY_ALERTS = registry.counter(
+    "factsaura_velocity_alerts_total",
+    "Velocity threshold crossings broadcast to incident subscribers.",
+    ["metric"],
+)
+VELOCITY_TRACKED_INCIDENTS = registry.gauge(
+    "factsaura_velocity_tracked_incidents",
+    "Incidents with live velocity ring buffers.",
+)
+
+
+class RingBuffer:
+    """
+    ``size`` buckets of ``bucket_seconds`` each, indexed by absolute bucket
+    number modulo ``size``; a slot whose stamp is stale is treated as empty.
+    """
+    def __init__(self, bucket_seconds: int, size: int):
+        self.bucket_seconds = bucket_seconds
+        self.size = size
+        self.stamps = [-1] * size
+        self.counts = [[0] * len(FIELDS) for _ in range(size)]
+
+    def add(self, now: float, field: int, amount: int = 1):
+        bucket = int(now // self.bucket_seconds)
+        slot = bucket % self.size
+        if self.stamps[slot] != bucket:
+            self.stamps[slot] = bucket
+            self.counts[slot] = [0] * len(FIELDS)
+        self.counts[slot][field] += amount
+
+    def totals(self, now: float, seconds: int) -> List[int]:
+        current = int(now // self.bucket_seconds)
+        oldest = current - min(self.size, seconds // self.bucket_seconds) + 1
+        totals = [0] * len(FIELDS)
+        for stamp, counts in zip(self.stamps, self.counts):
+            if oldest <= stamp <= current:
+                for i, value in enumerate(counts):
+                    totals[i] += value
+        return totals
+
+
+class IncidentVelocity:
+    def __init__(self):
+        self.fine = RingBuffer(5, 12)
+        self.coarse = RingBuffer(60, 60)
+        self.last_event = 0.0
+        # metric -> True while above threshold (alert already sent)
+        self.alerting: Dict[str, bool] = {}
+
+    def add(self, now: float, field: int, amount: int = 1):
+        self.fine.add(now, field, amount)
+        self.coarse.add(now, field, amount)
+        self.last_event = now
+
+    def window(self, name: str, now: float) -> Dict[str, Any]:
+        ring_name, seconds = WINDOWS[name]
+        totals = getattr(self, ring_name).totals(now, seconds)
+        minutes = seconds / 60
+        classified = totals[CLASSIFIED]
+        return {
+            "posts": totals[POSTS],
+            "postsPerMin": round(totals[POSTS] / minutes, 3),
+            "branchesPerMin": round(totals[BRANCHES] / minutes, 3),
+            "fabricationShare": round(totals[FABRICATIONS] / classified, 4) if classified else None,
+            "votesPerMin": round(totals[VOTES] / minutes, 3),
+        }
+
+
+class VelocityTracker:
+    def __init__(self, max_incidents: int = MAX_INCIDENTS):
+        self.max_incidents = max_incidents
+        self._incidents: "OrderedDict[str, IncidentVelocity]" = OrderedDict()
+
+    def _incident(self, incident_id: str) -> IncidentVelocity:
+        state = self._incidents.get(incident_id)
+        if state is None:
+            state = self._incidents[incident_id] = IncidentVelocity()
+            if len(self._incidents) > self.max_incidents:
+                self._incidents.popitem(last=False)
+            VELOCITY_TRACKED_INCIDENTS.set(len(self._incidents))
+        else:
+            self._incidents.move_to_end(incident_id)
+        return state
+
+    def record_post(self, incident_id: str, is_branch: bool, mutation_type: Optional[str] = None,
+                    now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Records a new post; returns the alerts it triggered (possibly none).
+        """
+        now = time.time() if now is None else now
+        state = self._incident(incident_id)
+        state.add(now, POSTS)
+        if is_branch:
+            state.add(now, BRANCHES)
+        if mutation_type:
+            self._classify(state, mutation_type, now)
+        return self._check_alerts(incident_id, state, now)
+
+    def record_classification(self, incident_id: str, mutation_type: Optional[str], now: Optional[float] = None):
+        """
+        Records the verdict for a post that was ingested unclassified.
+        """
+        if mutation_type:
+            self._classify(self._incident(incident_id), mutation_type, time.time() if now is None else now)
+
+    def record_vote(self, incident_id: str, now: Optional[float] = None):
+        self._incident(incident_id).add(time.time() if now is None else now, VOTES)
+
+    @staticmethod
+    def _classify(state: IncidentVelocity, mutation_type: str, now: float):
+        state.add(now, CLASSIFIED)
+        if mutation_type == "FABRICATION":
+            state.add(now, FABRICATIONS)
+
+    def _check_alerts(self, incident_id: str, state: IncidentVelocity, now: float) -> List[Dict[str, Any]]:
+        current = state.window("1m", now)
+        alerts = []
+        for metric, threshold in (("postsPerMin", ALERT_POSTS_PER_MIN), ("branchesPerMin", ALERT_BRANCHES_PER_MIN)):
+            value = current[metric]
+            if not state.alerting.get(metric) and value >= threshold:
+                state.alerting[metric] = True
+                VELOCITY_ALERTS.inc(metric=metric)
+                alerts.append({
+                    "incidentId": incident_id,
+                    "metric": metric,
+                    "window": "1m",
+                    "value": value,
+                    "threshold": threshold,
+                    "timestamp": now,
+                })
+            elif state.alerting.get(metric) and value < threshold * ALERT_REARM:
+                state.alerting[metric] = False
+        return alerts
+
+    def snapshot(self, incident_id: str, now: Optional[float] = None) -> Dict[str, Any]:
+        now = time.time() if now is None else now
+        state = self._incidents.get(incident_id)
+        if state is None:
+            state = IncidentVelocity()
+        return {
+            "incidentId": incident_id,
+            "asOf": now,
+            "lastEvent": state.last_event or None,
+            "windows": {name: state.window(name, now) for name in WINDOWS},
+        }
+
+    def reset(self):
+        self._incidents.clear()
+        VELOCITY_TRACKED_INCIDENTS.set(0)
+
+
+tracker = VelocityTracker()
+
+
+async def _broadcast(alerts: List[Dict[str, Any]]):
+    if not alerts:
+        return
+    from services.connection_manager import manager
+    for alert in alerts:
+        await manager.broadcast({"type": "velocity_alert", "payload": alert}, alert["incidentId"])
+
+
+async def post_created(incident_id: str, is_branch: bool, mutation_type: Optional[str] = None):
+    await _broadcast(tracker.record_post(incident_id, is_branch, mutation_type))
+
+
+def post_classified(incident_id: str, mutation_type: Optional[str]):
+    tracker.record_classification(incident_id, mutation_type)
+
+
+def vote_cast(incident_id: str):
+    tracker.record_vote(incident_id)
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from services import admission
+
+
+def test_token_bucket_refills_at_rate():
+    bucket = admission.TokenBucket(rate=2.0, burst=2)
+    now = bucket.updated
+    assert bucket.try_acquire(now) == 0
+    assert bucket.try_acquire(now) == 0
+    assert bucket.try_acquire(now) == pytest.approx(0.5)
+    assert bucket.try_acquire(now + 0.5) == 0
+
+
+def test_concurrency_limiter_hands_slots_over_in_order_and_bounds_the_queue():
+    async def scenario():
+        slots = admission.ConcurrencyLimiter(limit=1, max_queue=1, max_wait=1.0)
+        await slots.acquire()
+        waiter = asyncio.ensure_future(slots.acquire())
+        await asyncio.sleep(0)
+        assert slots.queued == 1
+
+        with pytest.raises(admission.Rejected) as rejected:
+            await slots.acquire()
+        assert rejected.value.outcome == "queue_full"
+
+        slots.release()
+        await waiter
+        assert slots.active == 1 and slots.queued == 0
+        slots.release()
+        assert slots.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_rate_limited_client_gets_429_with_retry_after():
+    admission._limiters["test_route"] = admission.RouteLimiter(
+        "test_route", rate=0.1, burst=1, concurrency=2, queue=2, max_wait=1.0
+    )
+    app = FastAPI()
+
+    @app.post("/work", dependencies=[Depends(admission.limit("test_route"))])
+    async def work():
+        return {"ok": True}
+
+    client = TestClient(app)
+    assert client.post("/work").status_code == 200
+
+    limited = client.post("/work")
+    assert limited.status_code == 429
+    assert int(limited.headers["retry-after"]) >= 1
+    assert admission.ADMISSION_DECISIONS.get(route="test_route", outcome="rate_limited") == 1
+    assert admission.get_limiter("test_route").slots.active == 0
@@ -0,0 +1,89 @@
+import asyncio
+
+from benchmarks.stub_prisma import StubPrisma, StubRecord
+from services import archive
+from services.archive import ArchiveService, ArchiveStore
+from services.post_service import PostService
+
+
+def test_archived_incident_is_served_lazily_from_cold_storage(tmp_path, monkeypatch):
+    store = ArchiveStore(str(tmp_path), cache_size=1)
+    monkeypatch.setattr(archive, "store", store)
+
+    async def scenario():
+        db = StubPrisma({})
+        posts = PostService(db)
+        await db.incident.create(data={"id": "inc", "title": "t", "severity": "WARNING", "location": "x", "status": "RESOLVED"})
+        root = await posts.create_post({"content": "bridge closed", "author": "a", "incidentId": "inc"})
+        child = await posts.create_post({"content": "bridge closed forever", "author": "b", "incidentId": "inc", "parentId": root.id})
+        await posts.create_comment(child.id, {"author": "c", "content": "source?"})
+
+        entry = await ArchiveService(db, store).archive_incident("inc")
+        assert entry["posts"] == 2 and entry["comments"] == 1
+        assert await db.post.count() == 0
+        assert (await db.incident.find_unique(where={"id": "inc"})).archivedAt is not None
+
+        # Nothing is decoded until the first read
+        assert store._loaded == {}
+        listed = await posts.get_posts_by_incident("inc")
+        assert [p.id for p in listed] == [root.id, child.id]
+        assert listed[1].commentCount == 1
+
+        diff = await posts.get_post_diff(child.id)
+        assert diff["parent"].id == root.id and diff["diff"]
+        assert [c.content for c in await posts.get_comments(child.id)] == ["source?"]
+
+        restored = await ArchiveService(db, store).restore_incident("inc")
+        assert restored == {"posts": 2, "comments": 1}
+        assert await db.post.count() == 2
+        assert not store.is_archived("inc")
+
+    asyncio.run(scenario())
+
+
+
+def test_archive_keeps_posts_written_after_the_read_and_commits_before_the_manifest(tmp_path, monkeypatch):
+    store = ArchiveStore(str(tmp_path))
+    monkeypatch.setattr(archive, "store", store)
+    rows = {}
+    write_archive = archive._write_archive
+
+    def write_then_race(path, posts, comments):
+        write_archive(path, posts, comments)
+        if posts and posts[0]["incidentId"] == "inc":
+            # A post lands between the archive read and the delete
+            rows["post"]["late"] = StubRecord(**{**vars(rows["post"][posts[0]["id"]]), "id": "late"})
+
+    monkeypatch.setattr(archive, "_write_archive", write_then_race)
+
+    async def scenario():
+        db = StubPrisma(rows)
+        posts = PostService(db)
+        for incident_id in ("inc", "inc_fail"):
+            await db.incident.create(data={"id": incident_id, "title": "t", "severity": "WARNING",
+                                           "location": "x", "status": "RESOLVED"})
+            await posts.create_post({"content": "bridge closed", "author": "a", "incidentId": incident_id})
+
+        entry = await ArchiveService(db, store).archive_incident("inc")
+        assert entry["posts"] == 1 and store.is_archived("inc")
+        assert [p.id for p in rows["post"].values() if p.incidentId == "inc"] == ["late"]
+
+        async def failing_update(**kwargs):
+            raise RuntimeError("connection lost")
+
+        db.incident.update = failing_update
+        try:
+            await ArchiveService(db, store).archive_incident("inc_fail")
+            raise AssertionError("expected the transaction to fail")
+        except RuntimeError:
+            pass
+        # Not marked archived unless the transaction committed
+        assert not store.is_archived("inc_fail")
+
+        # Another worker's archival is seen on the next miss
+        other = ArchiveStore(str(tmp_path))
+        assert other.is_archived("inc") and not other.is_archived("inc2")
+        store.add("inc2", {"postIds": ["p2"]})
+        assert other.is_archived("inc2") and other.incident_for_post("p2") == "inc2"
+
+    asyncio.run(scenario())
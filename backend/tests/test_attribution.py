@@ -0,0 +1,42 @@
+import asyncio
+
+from benchmarks.stub_prisma import StubPrisma
+from services import attribution
+from services.attribution import AttributionIndex, IncidentWindow
+from services.post_service import PostService
+
+
+def test_orphan_posts_are_attached_to_their_closest_recent_post(monkeypatch):
+    monkeypatch.setattr(attribution, "index", AttributionIndex())
+
+    async def scenario():
+        service = PostService(StubPrisma({}))
+        flood = await service.create_post({"content": "Heavy rains in Dadar, waterlogging near the station",
+                                           "author": "a", "incidentId": "inc_attr"})
+        await service.create_post({"content": "Power cut across Andheri east since morning",
+                                   "author": "b", "incidentId": "inc_attr"})
+
+        orphan = await service.create_post({"content": "Heavy rains in Dadar!! Station fully underwater",
+                                            "author": "c", "incidentId": "inc_attr"})
+        assert orphan.parentId == flood.id and orphan.attributionConfidence >= attribution.MIN_CONFIDENCE
+        assert orphan.mutationType is not None
+
+        broken = await service.create_post({"content": "Power cut across Andheri east since morning today",
+                                            "author": "d", "incidentId": "inc_attr", "parentId": "gone"})
+        assert broken.parentId != "gone" and broken.attributionConfidence > 0.9
+
+        unrelated = await service.create_post({"content": "Vaccination camp opens at the civic hospital",
+                                               "author": "e", "incidentId": "inc_attr"})
+        assert unrelated.parentId is None and unrelated.attributionConfidence is None
+
+    asyncio.run(scenario())
+
+
+def test_window_slides_and_drops_evicted_postings():
+    window = IncidentWindow(size=2)
+    window.add("p1", "bridge closed near station")
+    window.add("p2", "bridge reopened for traffic")
+    window.add("p3", "station flooded")
+    assert list(window.posts) == ["p2", "p3"]
+    assert window.postings["bridge"] == {"p2"} and "closed" not in window.postings
+    assert window.candidates({"station"}, 5) == ["p3"]
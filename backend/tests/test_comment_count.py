@@ -0,0 +1,48 @@
+import asyncio
+import os
+import sqlite3
+
+from benchmarks.stub_prisma import StubPrisma
+from services.post_service import PostService
+
+MIGRATION = os.path.join(os.path.dirname(__file__), "..", "prisma", "migrations",
+                         "20261019120000_post_comment_count", "migration.sql")
+
+
+def test_comments_bump_the_post_count_and_missing_posts_get_none():
+    async def scenario():
+        db = StubPrisma({})
+        posts = PostService(db)
+        root = await posts.create_post({"content": "Bridge closed", "author": "a", "incidentId": "inc"})
+        other = await posts.create_post({"content": "Roads flooded", "author": "b", "incidentId": "inc"})
+        for i in range(3):
+            await posts.create_comment(root.id, {"author": f"c{i}", "content": f"comment {i}"})
+        await posts.create_comment(other.id, {"author": "d", "content": "source?"})
+
+        assert (await db.post.find_unique(where={"id": root.id})).commentCount == 3
+        assert (await db.post.find_unique(where={"id": other.id})).commentCount == 1
+        assert [p.commentCount for p in await posts.get_posts_by_incident("inc")] == [3, 1]
+
+        # No post, no orphan comment
+        assert await posts.create_comment("missing", {"author": "e", "content": "hello?"}) is None
+        assert await db.comment.count() == 4
+
+    asyncio.run(scenario())
+
+
+def test_migration_backfills_counts_from_existing_comments():
+    with open(MIGRATION, encoding="utf-8") as f:
+        statements = [s for s in f.read().split(";") if "UPDATE" in s]
+    # Same statement on SQLite (3.33+ has UPDATE ... FROM), minus the Postgres cast
+    backfill = statements[0].replace("::INTEGER", "")
+
+    db = sqlite3.connect(":memory:")
+    db.executescript("""
+        CREATE TABLE "Post" ("id" TEXT PRIMARY KEY, "commentCount" INTEGER NOT NULL DEFAULT 0);
+        CREATE TABLE "Comment" ("id" TEXT PRIMARY KEY, "postId" TEXT NOT NULL);
+        INSERT INTO "Post" ("id") VALUES ('p1'), ('p2'), ('p3');
+        INSERT INTO "Comment" VALUES ('c1', 'p1'), ('c2', 'p1'), ('c3', 'p2');
+    """)
+    db.execute(backfill)
+    counts = dict(db.execute('SELECT "id", "commentCount" FROM "Post"'))
+    assert counts == {"p1": 2, "p2": 1, "p3": 0}
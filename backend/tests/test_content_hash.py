@@ -0,0 +1,65 @@
+import asyncio
+
+from benchmarks.stub_prisma import StubPrisma
+from services import text_compare
+from services.content_hash import content_hash, normalize
+from services.post_service import PostService
+
+
+def test_retweets_and_whitespace_normalize_to_the_same_hash():
+    original = "Heavy rains in Dadar.  Avoid the area! #MumbaiRains"
+    assert normalize("RT @CitizenReporter: " + original) == normalize(original.upper())
+    assert content_hash("rt @a: RT @b " + original) == content_hash(original)
+    assert content_hash(original) != content_hash(original + " Now!")
+
+
+def test_exact_copies_skip_mutation_scoring_and_are_listed(monkeypatch):
+    async def scenario():
+        service = PostService(StubPrisma({}))
+        root = await service.create_post({"content": "Bridge closed near station", "author": "a", "incidentId": "inc"})
+
+        async def fail(*args):
+            raise AssertionError("copies must not be re-scored")
+
+        monkeypatch.setattr(text_compare, "compute_mutation_score", fail)
+        copy = await service.create_post({"content": "RT @a: bridge closed near  station", "author": "b",
+                                          "incidentId": "inc", "parentId": root.id})
+        assert copy.mutationScore == 0.0 and copy.mutationType == "FACTUAL"
+
+        copies = await service.get_copies(post_id=copy.id)
+        assert [p.id for p in copies] == [root.id, copy.id]
+        assert await service.get_copies(post_id="missing") is None
+
+    asyncio.run(scenario())
+
+
+def test_stored_copies_win_over_cached_verdicts_which_are_per_incident(monkeypatch):
+    from services import analysis_service, narratives
+    from services.analysis_service import AnalysisService
+    from services.narratives import NarrativeEngine
+
+    monkeypatch.setattr(narratives, "engine", NarrativeEngine())
+    monkeypatch.setattr(analysis_service, "_verdicts", analysis_service.VerdictCache("test_verdict"))
+    text = "Metro services suspended on the Blue Line until further notice"
+
+    async def scenario():
+        db = StubPrisma({})
+        service = AnalysisService(db)
+        calls = []
+
+        async def ask_model(content):
+            calls.append(content)
+            return {"risk_level": "LOW", "confidence": 0.7, "analysis": "Routine service notice"}
+
+        monkeypatch.setattr(service, "ask_model", ask_model)
+        assert (await service.generate_truth_scorecard(text, "inc_a"))["risk_level"] == "LOW"
+        assert (await service.generate_truth_scorecard(text, "inc_a"))["risk_level"] == "LOW"
+        # Another incident has its own narratives: not answered from inc_a's entry
+        await service.generate_truth_scorecard(text, "inc_b")
+        assert len(calls) == 2
+
+        await PostService(db).create_post({"content": text, "author": "a", "incidentId": "inc_a"})
+        copy = await service.generate_truth_scorecard(text, "inc_a")
+        assert copy["risk_level"] == "HIGH" and copy["analysis"].startswith("Exact copy")
+
+    asyncio.run(scenario())
@@ -0,0 +1,60 @@
+import asyncio
+
+from benchmarks.stub_prisma import StubPrisma, StubRecord
+from services import credibility, entity_cache
+from services.agents.publisher_agent import PublisherAgent
+from services.post_service import PostService
+
+
+def test_author_aggregates_follow_posts_votes_and_verdicts(monkeypatch):
+    monkeypatch.setattr(credibility, "cache", credibility._AuthorCache())
+
+    async def scenario():
+        db = StubPrisma({})
+        posts = PostService(db)
+        root = await posts.create_post({"content": "Bridge closed", "author": "reporter", "incidentId": "inc"})
+        fake = await posts.create_post({"content": "Bridge collapsed, hundreds dead", "author": "troll",
+                                        "incidentId": "inc", "parentId": root.id})
+        for credible in (True, True, False):
+            await posts.vote_on_post(root.id, credible)
+        await posts.vote_on_post(fake.id, False)
+
+        publisher = PublisherAgent(db)
+        result = {"post_id": fake.id, "mutation_score": 90.0, "mutation_type": "FABRICATION"}
+        await publisher.publish(result)
+        # Re-publishing the same verdict must not count it twice
+        await publisher.publish(result)
+
+        troll = await db.author.find_unique(where={"name": "troll"})
+        assert (troll.postCount, troll.classifiedCount, troll.fabricationCount) == (1, 1, 1)
+        assert (troll.credibleVotes, troll.totalVotes) == (0, 1)
+
+        found = await credibility.lookup_many(db, ["reporter", "troll", "nobody"])
+        assert found["nobody"] is None
+        assert found["reporter"]["voteCredibility"] == round(2 / 3, 4)
+        assert found["reporter"]["score"] > found["troll"]["score"]
+        # Smoothing keeps a single bad post well away from zero
+        assert found["troll"]["score"] > 0.3
+
+    asyncio.run(scenario())
+
+
+def test_verdict_delta_uses_the_stored_row_not_a_cached_copy(monkeypatch):
+    monkeypatch.setattr(credibility, "cache", credibility._AuthorCache())
+    monkeypatch.setattr(entity_cache, "posts", entity_cache.EntityCache("post"))
+
+    async def scenario():
+        db = StubPrisma({})
+        post = await PostService(db).create_post({"content": "Bridge collapsed", "author": "troll", "incidentId": "inc"})
+        stale = StubRecord(**vars(post))
+
+        # Another process classifies the post; this process still caches the old row
+        await PublisherAgent(StubPrisma(db.store)).publish(
+            {"post_id": post.id, "mutation_score": 90.0, "mutation_type": "FABRICATION"})
+        entity_cache.posts.put(stale)
+        await PublisherAgent(db).publish({"post_id": post.id, "mutation_score": 90.0, "mutation_type": "FABRICATION"})
+
+        troll = await db.author.find_unique(where={"name": "troll"})
+        assert (troll.classifiedCount, troll.fabricationCount) == (1, 1)
+
+    asyncio.run(scenario())
@@ -0,0 +1,95 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from benchmarks.stub_prisma import StubPrisma
+from models.incident import IncidentCreate
+from routes import dashboard_routes
+from services import http_cache
+from services.agent_manager import AgentManager
+from services.dashboard import Dashboard
+from services.demo_service import DemoService
+from services.incident_service import IncidentService
+
+
+def build():
+    db = StubPrisma({})
+    agents = AgentManager()
+    dashboard = Dashboard(DemoService(db), IncidentService(db), agents=agents)
+    calls = {"demo": 0, "incidents": 0}
+    get_state, get_all = dashboard.demo_service.get_state, dashboard.incident_service.get_all_incidents
+
+    async def counted_state():
+        calls["demo"] += 1
+        return await get_state()
+
+    async def counted_incidents(*args, **kwargs):
+        calls["incidents"] += 1
+        return await get_all(*args, **kwargs)
+
+    dashboard.demo_service.get_state = counted_state
+    dashboard.incident_service.get_all_incidents = counted_incidents
+
+    app = FastAPI()
+    app.include_router(dashboard_routes.router)
+    app.dependency_overrides[dashboard_routes.get_dashboard] = lambda: dashboard
+    return TestClient(app), dashboard, agents, calls
+
+
+def test_snapshot_parts_are_rebuilt_only_when_their_version_moves():
+    client, dashboard, agents, calls = build()
+    agents.add_log("SCANNER", "Detected", "p1")
+
+    first = client.get("/api/dashboard").json()
+    assert first["demo"] == {"speed": 1.0, "isPaused": False, "progress": 0}
+    assert [log["details"] for log in first["logs"]] == ["p1"] and first["cursor"] == 1
+
+    # Only logs moved: demo state and incidents come from memory
+    agents.add_log("VERIFIER", "Analyzing", "p1")
+    second = client.get("/api/dashboard", params={"cursor": first["cursor"], "version": first["version"]}).json()
+    assert [log["action"] for log in second["logs"]] == ["Analyzing"]
+    assert second["version"] != first["version"]
+    assert calls == {"demo": 1, "incidents": 1}
+
+    # Nothing moved: answered from the version alone
+    unchanged = client.get("/api/dashboard", params={"cursor": second["cursor"], "version": second["version"]})
+    assert unchanged.json() == {"version": second["version"], "unchanged": True, "cursor": 2}
+    assert calls == {"demo": 1, "incidents": 1}
+
+    asyncio.run(dashboard.incident_service.create_incident(
+        IncidentCreate(title="Flooding", severity="CRITICAL", location="Mumbai", status="ACTIVE")
+    ))
+    third = client.get("/api/dashboard", params={"cursor": second["cursor"], "version": second["version"]}).json()
+    assert [i["title"] for i in third["incidents"]] == ["Flooding"] and third["logs"] == []
+    assert calls == {"demo": 1, "incidents": 2}
+
+
+def test_unchanged_snapshot_gets_304_and_stale_cursor_gets_all_logs():
+    client, dashboard, agents, calls = build()
+    agents.add_log("SYSTEM", "Started", "loop")
+    first = client.get("/api/dashboard")
+    again = client.get("/api/dashboard", headers={"If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304
+
+    # A cursor from before a restart is ahead of this process's logs
+    assert len(client.get("/api/dashboard", params={"cursor": 99}).json()["logs"]) == 1
+
+    http_cache.bump_all()
+    client.get("/api/dashboard")
+    assert calls == {"demo": 2, "incidents": 2}
+
+
+def test_counters_are_not_trusted_when_http_cache_is_disabled(monkeypatch):
+    monkeypatch.setattr(http_cache, "HTTP_CACHE_ENABLED", False)
+    client, dashboard, agents, calls = build()
+    first = client.get("/api/dashboard").json()
+
+    # Another worker's write doesn't bump this process's counters
+    asyncio.run(dashboard.incident_service.db.incident.create(data={
+        "id": "inc_other", "title": "Flooding", "severity": "CRITICAL", "location": "Mumbai", "status": "ACTIVE",
+    }))
+    second = client.get("/api/dashboard", params={"cursor": first["cursor"], "version": first["version"]}).json()
+    assert "unchanged" not in second and [i["title"] for i in second["incidents"]] == ["Flooding"]
+    assert "etag" not in client.get("/api/dashboard").headers
+    assert calls == {"demo": 3, "incidents": 3}
@@ -0,0 +1,122 @@
+import asyncio
+
+from benchmarks.stub_prisma import StubPrisma
+from services import entity_cache
+from services.entity_cache import EntityCache
+from services.post_service import PostService
+
+
+def test_parent_lookups_hit_memory_and_writes_refresh_entries(monkeypatch):
+    monkeypatch.setattr(entity_cache, "posts", EntityCache("post"))
+
+    async def scenario():
+        db = StubPrisma({})
+        service = PostService(db)
+        root = await service.create_post({"content": "Bridge closed", "author": "a", "incidentId": "inc"})
+
+        reads = []
+        find_unique = db.post.find_unique
+
+        async def counting(**kwargs):
+            reads.append(kwargs)
+            return await find_unique(**kwargs)
+
+        db.post.find_unique = counting
+        for i in range(3):
+            await service.create_post({"content": f"Bridge closed {i}", "author": "b", "incidentId": "inc",
+                                       "parentId": root.id})
+        await service.get_post_diff(root.id)
+        assert reads == []
+
+        await service.vote_on_post(root.id, True)
+        await service.create_comment(root.id, {"author": "c", "content": "confirmed"})
+        cached = await service.get_post_by_id(root.id)
+        assert (cached.totalVotes, cached.commentCount) == (1, 1)
+        assert await service.vote_on_post("missing", True) is None
+
+    asyncio.run(scenario())
+
+
+def test_multi_get_and_concurrent_misses_share_queries():
+    async def scenario():
+        cache = EntityCache("test_entity", ttl=60)
+        loads = []
+
+        class Row:
+            def __init__(self, id):
+                self.id = id
+
+        async def load(key):
+            loads.append(key)
+            await asyncio.sleep(0.01)
+            return Row(key)
+
+        async def load_many(keys):
+            loads.append(tuple(keys))
+            return [Row(k) for k in keys if k != "ghost"]
+
+        rows = await asyncio.gather(*(cache.get("a", load) for _ in range(5)))
+        assert loads == ["a"] and len({id(r) for r in rows}) == 1
+
+        found = await cache.get_many(["a", "b", "ghost"], load_many)
+        assert sorted(found) == ["a", "b"] and loads[-1] == ("b", "ghost")
+
+        cache.invalidate("a")
+        await cache.get("a", load)
+        assert loads[-1] == "a"
+
+    asyncio.run(scenario())
+
+
+def test_cancelling_one_caller_does_not_fail_the_shared_load():
+    async def scenario():
+        cache = EntityCache("test_entity", ttl=60)
+        loads = []
+
+        class Row:
+            def __init__(self, id):
+                self.id = id
+
+        async def load(key):
+            loads.append(key)
+            await asyncio.sleep(0.02)
+            return Row(key)
+
+        first = asyncio.ensure_future(cache.get("a", load))
+        second = asyncio.ensure_future(cache.get("a", load))
+        await asyncio.sleep(0)
+        first.cancel()
+        row = await second
+        assert row.id == "a" and loads == ["a"] and first.cancelled()
+        assert await cache.get("a", load) is row
+
+    asyncio.run(scenario())
+
+
+def test_a_write_during_a_load_is_not_overwritten_by_the_older_row():
+    async def scenario():
+        cache = EntityCache("test_entity", ttl=60)
+
+        class Row:
+            def __init__(self, id, votes):
+                self.id, self.votes = id, votes
+
+        async def load(key):
+            await asyncio.sleep(0.01)
+            return Row(key, 0)
+
+        reader = asyncio.ensure_future(cache.get("p", load))
+        await asyncio.sleep(0)
+        # A vote lands while the read is in flight
+        cache.put(Row("p", 1))
+        assert (await reader).votes == 0
+        assert (await cache.get("p", load)).votes == 1
+
+        # Same for an invalidation: the next read goes to the database
+        reader = asyncio.ensure_future(cache.get("q", load))
+        await asyncio.sleep(0)
+        cache.invalidate("q")
+        await reader
+        assert cache._lookup("q") is None
+
+    asyncio.run(scenario())
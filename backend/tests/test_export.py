@@ -0,0 +1,36 @@
+import asyncio
+import csv
+import gzip
+import io
+
+from benchmarks.stub_prisma import StubPrisma
+from services.export import ExportService
+
+
+def test_csv_export_pages_through_posts_and_comments():
+    async def scenario():
+        db = StubPrisma({})
+        await db.incident.create(data={"id": "inc", "title": "t", "severity": "WARNING", "location": "x", "status": "ACTIVE"})
+        await db.post.create(data={"id": "p000", "content": "root", "author": "a", "incidentId": "inc"})
+        for i in range(1, 12):
+            await db.post.create(data={"id": f"p{i:03d}", "content": f"copy {i}", "author": "a",
+                                       "incidentId": "inc", "parentId": "p000", "totalVotes": 2, "credibleVotes": 1})
+        for i in range(7):
+            await db.comment.create(data={"id": f"c{i}", "postId": "p001", "author": "b", "content": "hm"})
+
+        service = ExportService(db, chunk_size=5)
+
+        async def read(table):
+            data = b"".join([chunk async for chunk in service.stream(["inc"], table, "csv")])
+            return list(csv.DictReader(io.StringIO(gzip.decompress(data).decode())))
+
+        posts = await read("posts")
+        assert [row["id"] for row in posts] == [f"p{i:03d}" for i in range(12)]
+        edges = await read("edges")
+        assert len(edges) == 11 and edges[0]["parentId"] == "p000"
+        votes = await read("votes")
+        assert votes[1]["credibility"] == "0.5" and votes[0]["credibility"] == ""
+        comments = await read("comments")
+        assert sorted(row["id"] for row in comments) == [f"c{i}" for i in range(7)]
+
+    asyncio.run(scenario())
@@ -0,0 +1,53 @@
+from fastapi import FastAPI, Request, Response
+from fastapi.testclient import TestClient
+
+from services import compression, http_cache
+
+app = FastAPI()
+app.add_middleware(compression.CompressionMiddleware, minimum_size=100)
+calls = {"count": 0}
+
+
+@app.get("/items")
+async def items(request: Request, response: Response):
+    cached = http_cache.not_modified(request, response, "items")
+    if cached:
+        return cached
+    calls["count"] += 1
+    return [{"id": i, "content": "x" * 20} for i in range(20)]
+
+
+client = TestClient(app)
+
+
+def test_unchanged_poll_gets_304_without_running_the_handler():
+    first = client.get("/items")
+    assert first.status_code == 200
+    served = calls["count"]
+
+    second = client.get("/items", headers={"If-None-Match": first.headers["etag"]})
+    assert second.status_code == 304
+    assert second.content == b""
+    assert calls["count"] == served
+
+
+def test_bump_invalidates_the_validator():
+    etag = client.get("/items").headers["etag"]
+    http_cache.bump("items")
+    response = client.get("/items", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_large_json_is_gzipped_when_accepted():
+    response = client.get("/items", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json()[0]["id"] == 0
+
+    plain = client.get("/items", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+
+
+def test_encoding_negotiation_respects_q_zero():
+    assert compression.choose_encoding("gzip;q=0, deflate") is None
+    assert compression.choose_encoding("deflate, gzip") == "gzip"
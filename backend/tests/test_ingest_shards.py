@@ -0,0 +1,94 @@
+import asyncio
+
+from benchmarks.stub_prisma import StubPrisma
+from benchmarks.synthetic import generate_dataset, to_scanner_post
+from services.agent_manager import AgentManager
+from services.ingest_shards import LeaseLost, ShardCursor, ShardedIngest, partition
+
+
+def build(store, incidents=6, posts_per_incident=8):
+    manager = AgentManager()
+    manager.setup(client_factory=lambda: StubPrisma(store))
+    dataset = generate_dataset(incidents=incidents, posts_per_incident=posts_per_incident, id_prefix="shard")
+    manager.scanner.incidents = dataset["incidents"]
+    manager.scanner.posts = [to_scanner_post(p) for p in dataset["posts"]]
+    manager.scanner.MAX_POSTS_LIMIT = len(manager.scanner.posts)
+    return manager
+
+
+def test_partition_keeps_each_incident_in_one_shard_in_feed_order():
+    posts = [{"incidentId": f"inc_{i % 5}"} for i in range(40)]
+    parts = partition(posts, 3)
+    assert sorted(i for part in parts for i in part) == list(range(40))
+    for part in parts:
+        assert part == sorted(part)
+        incidents = {posts[i]["incidentId"] for i in part}
+        assert not any(incidents & {posts[i]["incidentId"] for i in other} for other in parts if other is not part)
+
+
+def test_shards_ingest_every_post_once_with_their_own_cursors():
+    store = {}
+    manager = build(store)
+
+    async def scenario():
+        ingest = ShardedIngest(manager.scanner, manager.run_pipeline, shards=3)
+        result = await ingest.drain()
+        assert result["ingested"] == 48 and len(store["post"]) == 48
+        # Parents were always ingested before their replies
+        assert all(p.parentId in store["post"] for p in store["post"].values() if p.parentId)
+        assert {r.id: r.position for r in store["ingestshard"].values()} == {
+            f"3:{i}": len(part) for i, part in enumerate(ingest.parts)
+        }
+        assert all(r.lockedBy is None for r in store["ingestshard"].values())
+
+        again = ShardedIngest(manager.scanner, manager.run_pipeline, shards=3)
+        assert (await again.drain())["ingested"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_a_held_shard_is_not_claimed_until_its_lease_passes():
+    store = {}
+    manager = build(store)
+    db = manager.scanner.db
+
+    async def scenario():
+        first = ShardCursor(db, "2:0", owner="a", lease=30)
+        assert await first.claim()
+        assert not await ShardCursor(db, "2:0", owner="b", lease=30).claim()
+
+        # drain skips the shard held by "a" and ingests the other one
+        ingest = ShardedIngest(manager.scanner, manager.run_pipeline, shards=2, owner="b")
+        result = await ingest.drain()
+        assert result["ingested"] == len(ingest.parts[1])
+
+        # "a" stops renewing: its lease runs out
+        first.lease = 0
+        await first.save(db)
+        takeover = ShardCursor(db, "2:0", owner="b", lease=30)
+        assert await takeover.claim()
+        try:
+            await first.save(db)
+            raise AssertionError("expected LeaseLost")
+        except LeaseLost:
+            pass
+
+    asyncio.run(scenario())
+
+
+def test_async_workers_run_until_every_shard_is_done():
+    store = {}
+    manager = build(store, incidents=4, posts_per_incident=5)
+
+    async def scenario():
+        ingest = ShardedIngest(manager.scanner, manager.run_pipeline, shards=4)
+        await ingest.start()
+        for _ in range(200):
+            if all(ingest.done(i) for i in ingest.cursors):
+                break
+            await asyncio.sleep(0.01)
+        await ingest.stop()
+        assert len(store["post"]) == 20
+        assert all(r.lockedBy is None for r in store["ingestshard"].values())
+
+    asyncio.run(scenario())
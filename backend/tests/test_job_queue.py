@@ -0,0 +1,166 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.stub_prisma import StubPrisma
+from services import job_queue
+from services.job_queue import FAILED, QUEUED, SUCCEEDED, JobQueue, WorkerPool, backoff_delay
+
+
+def _claim(job, worker="w1"):
+    # Stands in for the SKIP LOCKED claim query, which needs Postgres
+    job.status, job.lockedBy, job.attempts = "RUNNING", worker, job.attempts + 1
+    return job
+
+
+def test_backoff_grows_exponentially_with_a_cap():
+    for attempts, ceiling in [(1, 2), (2, 4), (4, 16), (20, 300)]:
+        delay = backoff_delay(attempts, base=2, cap=300)
+        assert ceiling / 2 <= delay <= ceiling
+
+
+def test_critical_incidents_are_prioritized():
+    async def scenario():
+        db = StubPrisma({})
+        await db.incident.create(data={"id": "crit", "title": "t", "severity": "CRITICAL", "location": "x", "status": "ACTIVE"})
+        await db.incident.create(data={"id": "warn", "title": "t", "severity": "WARNING", "location": "x", "status": "ACTIVE"})
+        queue = JobQueue(db)
+        jobs = [await queue.enqueue("analyze", {"content": "c"}, incident_id=i) for i in ("crit", "warn", None)]
+        assert [j.priority for j in jobs] == [100, 50, job_queue.DEFAULT_PRIORITY]
+
+    asyncio.run(scenario())
+
+
+def test_failed_jobs_retry_with_backoff_then_fail_permanently():
+    async def scenario():
+        queue = JobQueue(StubPrisma({}))
+        calls = []
+
+        async def flaky(payload):
+            calls.append(payload)
+            if len(calls) < 2:
+                raise RuntimeError("model unavailable")
+            return {"echo": payload["content"]}
+
+        async def broken(payload):
+            raise RuntimeError("always")
+
+        pool = WorkerPool(queue, {"analyze": flaky, "broken": broken}, concurrency=1, publish=False)
+
+        job = await queue.enqueue("analyze", {"content": "hello"})
+        await pool.run(_claim(job))
+        assert job.status == QUEUED and job.lockedBy is None
+        assert job.runAt > datetime.now(timezone.utc) and "model unavailable" in job.lastError
+        await pool.run(_claim(job))
+        assert job.status == SUCCEEDED and job_queue.decode(job.result) == {"echo": "hello"}
+
+        doomed = await queue.enqueue("broken", {}, max_attempts=2)
+        await pool.run(_claim(doomed))
+        await pool.run(_claim(doomed))
+        assert doomed.status == FAILED and doomed.attempts == 2
+
+    asyncio.run(scenario())
+
+
+def test_stale_worker_cannot_overwrite_a_reclaimed_job():
+    async def scenario():
+        queue = JobQueue(StubPrisma({}))
+        job = await queue.enqueue("analyze", {"content": "x"})
+        stale = type(job)(**job.dict())
+        stale.lockedBy = "old-worker"
+        _claim(job, "new-worker")
+        assert not await queue.complete(stale, {"late": True})
+        assert job.status == "RUNNING" and job.result is None
+        assert await queue.fail(stale, "late failure") is None and job.lastError is None
+
+    asyncio.run(scenario())
+
+
+def test_taken_over_job_is_neither_counted_nor_published(monkeypatch):
+    published = []
+
+    async def record(job):
+        published.append(job.id)
+
+    monkeypatch.setattr(job_queue, "publish_result", record)
+
+    async def scenario():
+        queue = JobQueue(StubPrisma({}))
+        job = await queue.enqueue("analyze", {"content": "x"})
+        stale = type(job)(**_claim(job, "old-worker").dict())
+
+        async def slow(payload):
+            # The lease runs out mid-run and another worker claims the job
+            _claim(job, "new-worker")
+            return {"late": True}
+
+        pool = WorkerPool(queue, {"analyze": slow}, concurrency=1)
+        succeeded = job_queue.JOBS.get(kind="analyze", outcome="succeeded")
+        await pool.run(stale)
+        assert published == [] and job.status == "RUNNING"
+        assert job_queue.JOBS.get(kind="analyze", outcome="succeeded") == succeeded
+
+    asyncio.run(scenario())
+
+
+def test_async_analysis_payload_carries_its_incident(monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from routes import analysis
+
+    queue = JobQueue(StubPrisma({}))
+    monkeypatch.setattr(job_queue, "get_queue", lambda: queue)
+    app = FastAPI()
+    app.include_router(analysis.router)
+    app.dependency_overrides[analysis.get_service] = lambda: None
+    response = TestClient(app).post("/api/analyze", params={"mode": "async"},
+                                    json={"content": "bridge closed", "incidentId": "inc_1"})
+    assert response.status_code == 202
+    job = asyncio.run(queue.get(response.json()["jobId"]))
+    assert job_queue.decode(job.payload) == {"content": "bridge closed", "incidentId": "inc_1"}
+
+
+class ClaimingStub(StubPrisma):
+    """
+    Evaluates the expire and claim statements' conditions in Python
+    (the SQL itself needs Postgres).
+    """
+
+    async def query_raw(self, sql, *args):
+        now = datetime.now(timezone.utc)
+        expired = [j for j in self.store["analysisjob"].values()
+                   if j.status == "RUNNING" and j.lockedUntil < now]
+        if sql is job_queue._EXPIRE_SQL:
+            assert '"attempts" >= "maxAttempts"' in sql
+            out = [j for j in expired if j.attempts >= j.maxAttempts]
+            for job in out:
+                job.status, job.lockedBy, job.lockedUntil = "FAILED", None, None
+                job.lastError = f"Lease expired on the last attempt ({job.attempts} of {job.maxAttempts})"
+            return [{"id": j.id, "kind": j.kind} for j in out]
+        assert '"lockedUntil" < now() AND "attempts" < "maxAttempts"' in sql
+        worker, lease, limit = args
+        runnable = [j for j in self.store["analysisjob"].values() if j.status == "QUEUED"]
+        runnable += [j for j in expired if j.attempts < j.maxAttempts]
+        for job in runnable[:limit]:
+            job.__dict__.setdefault("runAt", job.createdAt)
+            _claim(job, worker)
+            job.lockedUntil = now + timedelta(seconds=lease)
+        return [job.dict() for job in runnable[:limit]]
+
+
+def test_expired_lease_on_the_last_attempt_fails_the_job():
+    async def scenario():
+        db = ClaimingStub({})
+        queue = JobQueue(db)
+        job = await queue.enqueue("analyze", {"content": "x"}, max_attempts=2)
+        assert [j.id for j in await queue.claim("w1")] == [job.id]
+
+        # The worker hangs until its lease runs out: the job is retried once
+        job.lockedUntil = datetime.now(timezone.utc) - timedelta(seconds=1)
+        assert [j.attempts for j in await queue.claim("w2")] == [2]
+
+        # ...and on its last attempt it fails instead of being handed out again
+        job.lockedUntil = datetime.now(timezone.utc) - timedelta(seconds=1)
+        assert await queue.claim("w3") == []
+        assert job.status == FAILED and job.lockedBy is None and "Lease expired" in job.lastError
+
+    asyncio.run(scenario())
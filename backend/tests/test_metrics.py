@@ -0,0 +1,50 @@
+import asyncio
+from unittest import mock
+
+from benchmarks.stub_prisma import StubPrisma
+from services import metrics, tracing
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = metrics.MetricsRegistry()
+    hist = registry.histogram("test_latency_seconds", "Test latency.", ["route"], buckets=(0.1, 1.0))
+    hist.observe(0.05, route="/a")
+    hist.observe(0.5, route="/a")
+    hist.observe(5.0, route="/a")
+
+    text = registry.render()
+    assert '# TYPE test_latency_seconds histogram' in text
+    assert 'test_latency_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{route="/a",le="1.0"} 2' in text
+    assert 'test_latency_seconds_bucket{route="/a",le="+Inf"} 3' in text
+    assert 'test_latency_seconds_count{route="/a"} 3' in text
+
+
+def test_label_values_are_escaped():
+    registry = metrics.MetricsRegistry()
+    counter = registry.counter("test_total", "Test.", ["path"])
+    counter.inc(path='a"b\\c')
+    assert 'test_total{path="a\\"b\\\\c"} 1.0' in registry.render()
+
+
+def test_instrumented_prisma_records_queries_inside_trace():
+    db = metrics.instrument_prisma(StubPrisma())
+    before = metrics.DB_QUERY_DURATION.count(model="post", operation="find_many")
+
+    async def run():
+        with mock.patch.object(tracing, "TRACING_ENABLED", True):
+            with tracing.start_trace("POST /api/analyze") as root:
+                await db.post.find_many()
+                with tracing.span("gemini.generate_content"):
+                    pass
+        return root
+
+    root = asyncio.run(run())
+    assert metrics.DB_QUERY_DURATION.count(model="post", operation="find_many") == before + 1
+    assert [child.name for child in root.children] == ["prisma post.find_many", "gemini.generate_content"]
+    assert tracing.get_trace(root.trace_id)["name"] == "POST /api/analyze"
+
+
+def test_span_outside_trace_is_noop():
+    with tracing.span("orphan") as span:
+        assert span is None
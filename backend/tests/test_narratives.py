@@ -0,0 +1,113 @@
+import asyncio
+
+from benchmarks.stub_prisma import StubPrisma
+from services import analysis_service, narratives
+from services.analysis_service import AnalysisService
+from services.narratives import NarrativeEngine
+
+RUMOUR = "Bandra-Worli Sea Link closed after cracks found in the main pillar"
+
+
+def test_variants_join_the_leaders_cluster_and_new_narratives_start_one():
+    async def scenario():
+        engine = NarrativeEngine()
+        first = await engine.assign("inc", RUMOUR, post_id="p1")
+        variant = await engine.assign("inc", RUMOUR.replace("cracks", "huge cracks"))
+        other = await engine.assign("inc", "Free vaccines being distributed at every railway station tonight")
+        elsewhere = await engine.assign("other", RUMOUR)
+
+        assert first.created and not variant.created and variant.cluster is first.cluster
+        assert other.created and other.cluster is not first.cluster
+        assert elsewhere.created
+        summary = engine.narratives("inc")
+        assert [c["size"] for c in summary["clusters"]] == [2, 1]
+        assert summary["clusters"][0]["leaderPostId"] == "p1"
+
+    asyncio.run(scenario())
+
+
+def test_model_runs_once_per_cluster(monkeypatch):
+    monkeypatch.setattr(narratives, "engine", NarrativeEngine())
+    monkeypatch.setattr(analysis_service, "_verdicts", analysis_service.VerdictCache("test_verdict"))
+
+    async def scenario():
+        service = AnalysisService(StubPrisma({}))
+        calls = []
+
+        async def ask_model(content):
+            calls.append(content)
+            return {"risk_level": "HIGH", "confidence": 0.9, "analysis": "Unverified structural claim"}
+
+        monkeypatch.setattr(service, "ask_model", ask_model)
+        for text in (RUMOUR, RUMOUR + "!!", "URGENT: " + RUMOUR):
+            scorecard = await service.generate_truth_scorecard(text, "inc")
+            assert scorecard["risk_level"] == "HIGH"
+        assert calls == [RUMOUR]
+
+        await service.generate_truth_scorecard("Airport shut down due to heavy fog and low visibility", "inc")
+        assert len(calls) == 2
+        assert narratives.engine.narratives("inc")["hitRate"] == 0.5
+
+    asyncio.run(scenario())
+
+
+def test_repeated_texts_do_not_inflate_a_cluster():
+    async def scenario():
+        engine = NarrativeEngine()
+        first = await engine.assign("inc", RUMOUR, post_id="p1")
+        # The ingest hook and a later analysis of the same post
+        again = await engine.assign("inc", RUMOUR)
+        variant = await engine.assign("inc", RUMOUR.replace("cracks", "huge cracks"), post_id="p2")
+        await engine.assign("inc", RUMOUR.replace("cracks", "huge cracks"))
+        assert again.cluster is first.cluster and not again.created and again.similarity == 1.0
+        assert variant.cluster is first.cluster
+        assert engine.narratives("inc")["clusters"][0]["size"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_evicting_an_incident_keeps_a_lock_that_is_in_use(monkeypatch):
+    gate = asyncio.Event()
+    find_similar = narratives.text_compare.find_similar
+
+    async def held(content, leaders, threshold):
+        if content == "held":
+            await gate.wait()
+        return await find_similar(content, leaders, threshold)
+
+    monkeypatch.setattr(narratives.text_compare, "find_similar", held)
+
+    async def scenario():
+        engine = NarrativeEngine(max_incidents=1)
+        holder = asyncio.create_task(engine.assign("a", "held"))
+        await asyncio.sleep(0)
+        lock = engine._locks["a"]
+        waiter = asyncio.create_task(engine.assign("a", RUMOUR))
+        await asyncio.sleep(0)
+
+        # "b" evicts "a" while a's lock is held and waited on
+        await engine.assign("b", RUMOUR)
+        assert engine._locks["a"] is lock
+
+        gate.set()
+        await asyncio.gather(holder, waiter)
+        # "a" came back (the waiter re-created it) and evicted "b"
+        assert set(engine._locks) == {"a"} and engine._lock_users == {}
+
+    asyncio.run(scenario())
+
+
+def test_member_hashes_are_bounded_and_the_gauge_follows_evictions():
+    async def scenario():
+        engine = NarrativeEngine(max_incidents=1, max_members=3)
+        first = await engine.assign("inc", RUMOUR)
+        for i in range(5):
+            await engine.assign("inc", f"{RUMOUR} update {i}")
+        assert first.cluster.size == 6 and len(first.cluster.members) == 3
+        assert narratives.NARRATIVE_CLUSTERS.get() == 1
+
+        await engine.assign("other", "Free vaccines being distributed at every railway station tonight")
+        await engine.assign("third", "Airport shut down due to heavy fog and low visibility")
+        assert narratives.NARRATIVE_CLUSTERS.get() == 1
+
+    asyncio.run(scenario())
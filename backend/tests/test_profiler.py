@@ -0,0 +1,67 @@
+import asyncio
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routes import admin_routes
+from services.profiler import LoopBlockMonitor, SamplingProfiler
+
+
+def blocking_handler():
+    time.sleep(0.3)
+
+
+def spin(seconds):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        sum(range(1000))
+
+
+def test_block_monitor_reports_a_blocking_call_with_its_stack():
+    async def scenario():
+        monitor = LoopBlockMonitor()
+        await monitor.start(threshold_ms=50)
+        await asyncio.sleep(0.05)
+        blocking_handler()
+        await asyncio.sleep(0.1)
+        await monitor.stop()
+        return monitor.report()
+
+    report = asyncio.run(scenario())
+    assert len(report["events"]) == 1
+    event = report["events"][0]
+    assert event["finished"] and event["blocked_ms"] >= 200
+    assert any("blocking_handler" in line for line in event["stack"])
+
+
+def test_profiler_samples_the_loop_thread():
+    async def scenario():
+        async def busy():
+            await asyncio.sleep(0.02)
+            spin(0.3)
+
+        task = asyncio.create_task(busy())
+        result = await SamplingProfiler().profile(seconds=0.5, interval_ms=5, focus="spin")
+        await task
+        return result
+
+    result = asyncio.run(scenario())
+    lines = result["collapsed"].splitlines()
+    assert lines and all("tests/test_profiler.py:spin" in line for line in lines)
+    assert result["samples"] > sum(int(line.rsplit(" ", 1)[1]) for line in lines) > 10
+
+
+def test_admin_routes_require_the_token(monkeypatch):
+    app = FastAPI()
+    app.include_router(admin_routes.router)
+    client = TestClient(app)
+
+    monkeypatch.delenv("ADMIN_TOKEN", raising=False)
+    assert client.get("/api/admin/loop-blocks", headers={"X-Admin-Token": "anything"}).status_code == 403
+
+    monkeypatch.setenv("ADMIN_TOKEN", "s3cret")
+    assert client.get("/api/admin/loop-blocks").status_code == 401
+    assert client.get("/api/admin/loop-blocks", headers={"X-Admin-Token": "wrong"}).status_code == 401
+    response = client.get("/api/admin/loop-blocks", headers={"X-Admin-Token": "s3cret"})
+    assert response.status_code == 200 and "events" in response.json()
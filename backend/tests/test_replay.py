@@ -0,0 +1,125 @@
+import asyncio
+
+from benchmarks.stub_prisma import StubPrisma
+from services import archive
+from services.agent_manager import AgentManager
+from services.archive import ArchiveService, ArchiveStore
+from services.post_service import PostService
+from services.replay import ReplayEngine, SnapshotStore, VirtualClock, timeline
+
+
+def test_timeline_keeps_recorded_spacing_and_caps_idle_gaps():
+    posts = [{"timestamp": "2025-07-15T09:00:00Z"}, {"timestamp": "2025-07-15T09:05:00Z"},
+             {"timestamp": None}, {"timestamp": "2025-08-10T14:00:00Z"}]
+    assert timeline(posts, max_gap=900) == [0.0, 300.0, 300.0, 1200.0]
+
+
+def test_virtual_clock_follows_speed_and_pause():
+    wall = [0.0]
+    clock = VirtualClock(scale=60, timer=lambda: wall[0])
+    wall[0] = 1.0
+    assert clock.now() == 60
+    clock.set_speed(2.0)
+    wall[0] = 2.0
+    assert clock.now() == 180
+    clock.pause()
+    wall[0] = 10.0
+    assert clock.now() == 180
+    clock.resume()
+    wall[0] = 10.5
+    assert clock.now() == 240 and clock.wall_seconds(120) == 1.0
+
+
+def test_paced_step_waits_for_the_recorded_time(tmp_path):
+    manager = AgentManager()
+    manager.setup(client_factory=lambda: StubPrisma({}))
+    wall = [0.0]
+    engine = ReplayEngine(manager.scanner, SnapshotStore(str(tmp_path)),
+                          VirtualClock(scale=300, timer=lambda: wall[0]), snapshot_every=0)
+
+    async def scenario():
+        assert (await engine.step(manager.run_pipeline))["id"] == "post_m001"
+        # post_m002 was recorded 5 minutes later: one wall second at scale 300
+        assert engine.time_until_next() == 1.0
+        assert await engine.step(manager.run_pipeline) is None
+        wall[0] = 1.0
+        assert (await engine.step(manager.run_pipeline))["id"] == "post_m002"
+
+    asyncio.run(scenario())
+
+
+def test_snapshots_are_spaced_geometrically(tmp_path):
+    manager = AgentManager()
+    manager.setup(client_factory=lambda: StubPrisma({}))
+    engine = ReplayEngine(manager.scanner, SnapshotStore(str(tmp_path)), VirtualClock(timer=lambda: 0.0),
+                          snapshot_every=2, snapshot_growth=2.0)
+
+    async def scenario():
+        for _ in range(20):
+            await engine.fast_forward(manager.run_pipeline, 1)
+        assert engine.store.positions() == [2, 4, 8, 16]
+
+    asyncio.run(scenario())
+
+
+def test_seek_restores_the_nearest_snapshot_and_replays_the_delta(tmp_path):
+    store = {}
+    manager = AgentManager()
+    manager.setup(client_factory=lambda: StubPrisma(store))
+    engine = ReplayEngine(manager.scanner, SnapshotStore(str(tmp_path)),
+                          VirtualClock(timer=lambda: 0.0), snapshot_every=5)
+    run = manager.run_pipeline
+
+    async def scenario():
+        result = await engine.fast_forward(run, 5)
+        assert result["ingested"] == 5 and engine.store.positions() == [5]
+        # A bulk run snapshots once, at its end
+        result = await engine.fast_forward(run, 7)
+        assert result["ingested"] == 7 and engine.store.positions() == [5, 12]
+        await manager.scanner.db.post.update(where={"id": "post_m001"}, data={"totalVotes": 3})
+
+        back = await engine.seek(run, 7)
+        assert back["restoredFrom"] == 5 and back["ingested"] == 2
+        assert sorted(store["post"]) == sorted(p["id"] for p in manager.scanner.posts[:7])
+        # Rows come back as they were at the snapshot
+        assert store["post"]["post_m001"].totalVotes == 0
+        assert store["post"]["post_m002"].parentId == "post_m001"
+        assert (await manager.scanner.db.demostate.find_first()).currentPosition == 7
+
+        forward = await engine.seek(run, 9)
+        assert forward["restoredFrom"] is None and forward["ingested"] == 2
+
+        start = await engine.seek(run, 2)
+        assert start["restoredFrom"] == 0 and len(store["post"]) == 2
+        assert engine.clock.now() == engine.offsets[1]
+
+    asyncio.run(scenario())
+
+
+def test_seek_back_past_an_archival_serves_the_restored_rows(tmp_path, monkeypatch):
+    cold = ArchiveStore(str(tmp_path / "archive"))
+    monkeypatch.setattr(archive, "store", cold)
+    store = {}
+    manager = AgentManager()
+    manager.setup(client_factory=lambda: StubPrisma(store))
+    engine = ReplayEngine(manager.scanner, SnapshotStore(str(tmp_path / "replay")),
+                          VirtualClock(timer=lambda: 0.0), snapshot_every=5)
+    run = manager.run_pipeline
+
+    async def scenario():
+        db = StubPrisma(store)
+        await engine.fast_forward(run, 5)
+        await engine.fast_forward(run, 3)
+        incident_id = store["post"]["post_m001"].incidentId
+        await ArchiveService(db, cold).archive_incident(incident_id)
+        assert cold.is_archived(incident_id)
+
+        await engine.seek(run, 7)
+        assert not cold.is_archived(incident_id) and not list(tmp_path.joinpath("archive").glob("*.gz"))
+        assert (await db.incident.find_unique(where={"id": incident_id})).archivedAt is None
+        hot = [p.id for p in store["post"].values() if p.incidentId == incident_id]
+        assert hot
+        for post_id in hot:
+            assert (await PostService(db).get_post_by_id(post_id)) is store["post"][post_id]
+
+    asyncio.run(scenario())
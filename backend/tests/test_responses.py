@@ -0,0 +1,85 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from benchmarks.stub_prisma import StubPrisma
+from models.post import CommentResponse, PostDiffResponse, PostResponse
+from routes import post_routes
+from services import connection_manager
+from services.connection_manager import ConnectionManager
+from services.post_service import PostService
+
+
+class FakeSocket:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.frames = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        if self.fail:
+            raise RuntimeError("closed")
+        self.frames.append(text)
+
+
+def test_broadcast_serializes_once_and_sends_the_same_frame(monkeypatch):
+    calls = []
+    dumps = connection_manager.dumps
+
+    def counting(message):
+        calls.append(message)
+        return dumps(message)
+
+    monkeypatch.setattr(connection_manager, "dumps", counting)
+
+    async def scenario():
+        manager = ConnectionManager()
+        sockets = [FakeSocket(), FakeSocket(fail=True), FakeSocket()]
+        for socket in sockets:
+            await manager.connect(socket, "inc")
+        await manager.broadcast({"type": "new_post", "data": {"id": "p1"}}, "inc")
+        await manager.broadcast({"type": "ignored"}, "other")
+        return sockets
+
+    first, _, third = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert first.frames == ['{"type":"new_post","data":{"id":"p1"}}']
+    # One encoded string shared by every subscriber
+    assert first.frames[0] is third.frames[0]
+
+
+def test_post_routes_match_their_response_models():
+    db = StubPrisma({})
+    service = PostService(db)
+    root = asyncio.run(service.create_post({"content": "Bridge closed near the station", "author": "a",
+                                            "incidentId": "inc"}))
+    child = asyncio.run(service.create_post({"content": "Bridge collapsed near the station", "author": "b",
+                                             "incidentId": "inc", "parentId": root.id}))
+
+    app = FastAPI()
+    app.include_router(post_routes.router)
+    app.dependency_overrides[post_routes.get_service] = lambda: service
+    client = TestClient(app)
+
+    def fields(model):
+        return set(model.model_fields)
+
+    post = client.get(f"/api/posts/{child.id}").json()
+    assert set(post) == fields(PostResponse) and PostResponse.model_validate(post).parentId == root.id
+
+    comment = client.post(f"/api/posts/{child.id}/comments", json={"author": "c", "content": "source?"}).json()
+    assert set(comment) == fields(CommentResponse)
+    comments = client.get(f"/api/posts/{child.id}/comments").json()
+    assert [CommentResponse.model_validate(c).id for c in comments] == [comment["id"]]
+
+    diff = client.get(f"/api/posts/{child.id}/diff").json()
+    assert set(diff) == fields(PostDiffResponse)
+    parsed = PostDiffResponse.model_validate(diff)
+    assert parsed.parent.id == root.id and parsed.post.commentCount == 1
+    assert all(tag in ("equal", "replace", "insert", "delete") for tag, *_ in parsed.diff)
+
+    listed = client.get("/api/incidents/inc/posts").json()
+    assert [PostResponse.model_validate(p).id for p in listed] == [root.id, child.id]
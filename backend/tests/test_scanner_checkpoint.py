@@ -0,0 +1,37 @@
+import asyncio
+
+from benchmarks.stub_prisma import StubPrisma
+from services.agents import scanner_agent
+from services.agents.scanner_agent import ScannerAgent
+
+
+def test_scanner_resumes_from_checkpoint_without_duplicates(monkeypatch):
+    monkeypatch.setattr(scanner_agent, "CHECKPOINT_EVERY", 2)
+
+    async def scenario():
+        store = {}
+        scanner = ScannerAgent(db=StubPrisma(store))
+        for _ in range(3):
+            await scanner.process_post_db(scanner.get_next_post())
+        state = await scanner.db.demostate.find_first()
+        # Post 3 was ingested but not yet checkpointed when the "crash" hits
+        assert state.currentPosition == 2
+        assert len(store["post"]) == 3
+        assert store["post"]["post_m002"].incidentId == "inc_mumbai_001"
+        assert store["post"]["post_m002"].parentId == "post_m001"
+
+        restarted = ScannerAgent(db=StubPrisma(store))
+        await restarted.restore_position()
+        assert restarted.current_post_index == 2
+        await restarted.process_post_db(restarted.get_next_post())
+        assert len(store["post"]) == 3
+        await restarted.checkpoint()
+        assert (await restarted.db.demostate.find_first()).currentPosition == 3
+
+        # A demo reset recreates the state row; the scanner rewinds to it
+        await restarted.db.demostate.delete_many()
+        fresh = await restarted.db.demostate.create(data={"speed": 1.0, "isPaused": False, "currentPosition": 0})
+        await restarted.restore_position(fresh)
+        assert restarted.current_post_index == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,37 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from services import search_service
+
+
+def test_cursor_round_trips_and_is_bound_to_its_sort():
+    cursor = search_service.encode_cursor("rank", 0.25, "post_1")
+    assert search_service.decode_cursor(cursor, "rank") == (0.25, "post_1")
+
+    with pytest.raises(ValueError):
+        search_service.decode_cursor(cursor, "recent")
+    with pytest.raises(ValueError):
+        search_service.decode_cursor("not-a-cursor", "rank")
+
+
+def test_recent_cursor_stores_naive_utc_timestamps():
+    stamp = datetime(2025, 7, 15, 14, 30, tzinfo=timezone.utc)
+    cursor = search_service.encode_cursor("recent", stamp, "c1")
+    assert search_service.decode_cursor(cursor, "recent") == ("2025-07-15T14:30:00", "c1")
+
+
+def test_query_only_unions_the_requested_tables():
+    posts_only = search_service.build_query("posts", "recent")
+    assert '"Comment"' not in posts_only
+    assert 'ORDER BY "createdAt" DESC' in posts_only
+    assert "UNION ALL" in search_service.build_query("all")
+
+
+def test_highlight_escapes_content_and_only_marks_matches():
+    headline = f"{search_service.MARK_START}bridge{search_service.MARK_STOP} closed <script>alert('x')</script>"
+    assert search_service.render_highlight(headline) == (
+        "<mark>bridge</mark> closed &lt;script&gt;alert(&#x27;x&#x27;)&lt;/script&gt;"
+    )
+    # Sentinels in user content are removed before ts_headline runs
+    assert "translate(page.\"content\"" in search_service.build_query("posts")
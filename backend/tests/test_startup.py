@@ -0,0 +1,9 @@
+from benchmarks.startup_report import LAZY_MODULES, build_report
+
+
+def test_heavy_dependencies_are_not_imported_at_startup():
+    report = build_report("main", runs=1, top=5)
+    assert report["eager_heavy_modules"] == [], (
+        f"{report['eager_heavy_modules']} imported by main; load them lazily on first use"
+    )
+    assert set(LAZY_MODULES) >= {"google.generativeai", "difflib"}
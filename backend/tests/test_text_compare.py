@@ -0,0 +1,43 @@
+import asyncio
+from unittest import mock
+
+from services import executor, text_compare
+
+
+def _run_find_similar(candidates, content, threshold):
+    return asyncio.run(text_compare.find_similar(content, candidates, threshold))
+
+
+def test_chunked_offload_matches_inline_scan():
+    candidates = [f"flood water rising near bridge number {i}" for i in range(25)]
+    content = "flood water rising near bridge number 7"
+    inline = text_compare.similarity_scores(candidates, content, 0.9)
+
+    with mock.patch.object(text_compare, "SIMILARITY_OFFLOAD_CHARS", 0), \
+            mock.patch.object(text_compare, "SIMILARITY_CHUNK_SIZE", 4), \
+            mock.patch.object(executor, "CPU_EXECUTOR", "thread"), \
+            mock.patch.object(executor, "_executor", None):
+        try:
+            offloaded = _run_find_similar(candidates, content, 0.9)
+        finally:
+            executor.shutdown()
+
+    assert sorted(offloaded) == sorted(inline)
+    assert (7, 1.0) in offloaded
+
+
+def test_small_pairs_stay_inline():
+    before = executor.CPU_TASKS.get(operation="diff", mode="inline")
+    opcodes = asyncio.run(text_compare.compute_diff("abc", "abd"))
+    assert opcodes[0] == ("equal", 0, 2, 0, 2)
+    assert executor.CPU_TASKS.get(operation="diff", mode="inline") == before + 1
+
+
+def test_process_pool_runs_module_level_functions():
+    with mock.patch.object(executor, "CPU_EXECUTOR", "process"), \
+            mock.patch.object(executor, "_executor", None):
+        try:
+            score = asyncio.run(executor.run_cpu("mutation_score", text_compare.mutation_score, "abcd", "abcd"))
+        finally:
+            executor.shutdown()
+    assert score == 0.0
@@ -0,0 +1,65 @@
+import asyncio
+
+from benchmarks.stub_prisma import StubPrisma
+from services import tree_layout
+from services.incident_service import IncidentService
+from services.post_service import PostService
+from services.tree_layout import COLUMN_PITCH, ROW_PITCH, LayoutCache, TreeLayout, view
+
+
+def test_appending_a_leaf_never_moves_existing_nodes():
+    layout = TreeLayout()
+    layout.add("root", None)
+    layout.add("a", "root")
+    layout.add("b", "root")
+    layout.add("a1", "a")
+    before = dict(layout.nodes)
+
+    layout.add("b1", "b")
+    assert all(layout.nodes[k] == v for k, v in before.items())
+    assert layout.nodes["b1"].y == 2 * ROW_PITCH
+    # Under its parent when the slot is free, else the next free slot in the row
+    assert layout.nodes["a1"].x == layout.nodes["a"].x == 0
+    assert layout.nodes["b1"].x == layout.nodes["b"].x == COLUMN_PITCH
+    layout.add("a2", "a")
+    assert layout.nodes["a2"].x == 2 * COLUMN_PITCH
+
+    # Replies to unknown parents start a new root
+    layout.add("orphan", "missing")
+    assert layout.nodes["orphan"].depth == 0 and layout.nodes["orphan"].parent_id is None
+
+
+def test_viewport_returns_visible_nodes_with_their_parents():
+    layout = TreeLayout()
+    layout.add("root", None)
+    for i in range(50):
+        layout.add(f"c{i}", "root")
+    layout.add("g", "c40")
+
+    window = view(layout, 40 * COLUMN_PITCH, ROW_PITCH, 41 * COLUMN_PITCH - 1, 2 * ROW_PITCH + 10)
+    ids = {node["id"] for node in window["nodes"]}
+    assert ids == {"c40", "g", "root"}
+    assert {edge["id"] for edge in window["edges"]} == {"root-c40", "c40-g"}
+    assert window["size"] == 52 and len(view(layout)["nodes"]) == 52
+
+
+def test_cached_layout_is_extended_by_new_posts(monkeypatch):
+    monkeypatch.setattr(tree_layout, "layouts", LayoutCache())
+
+    async def scenario():
+        db = StubPrisma({})
+        posts = PostService(db)
+        incidents = IncidentService(db)
+        root = await posts.create_post({"content": "Bridge closed near the station", "author": "a",
+                                        "incidentId": "inc_layout"})
+        first = await incidents.get_layout("inc_layout")
+        assert [n["id"] for n in first["nodes"]] == [root.id]
+
+        reply = await posts.create_post({"content": "Bridge closed near the station, avoid it", "author": "b",
+                                         "incidentId": "inc_layout", "parentId": root.id})
+        second = await incidents.get_layout("inc_layout", include_posts=True)
+        assert second["edges"] == [{"id": f"{root.id}-{reply.id}", "source": root.id, "target": reply.id}]
+        assert second["nodes"][1]["post"]["content"].endswith("avoid it")
+        assert second["nodes"][0]["x"] == first["nodes"][0]["x"]
+
+    asyncio.run(scenario())
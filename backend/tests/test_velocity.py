@@ -0,0 +1,44 @@
+from services.velocity import VelocityTracker
+
+
+def test_windows_count_only_recent_events():
+    tracker = VelocityTracker()
+    start = 1_000_000.0
+    for i in range(30):
+        tracker.record_post("inc", is_branch=i % 3 == 0, mutation_type="FABRICATION" if i % 2 else "FACTUAL", now=start + i)
+    tracker.record_vote("inc", now=start + 30)
+
+    now = start + 40
+    snapshot = tracker.snapshot("inc", now=now)
+    assert snapshot["windows"]["1m"]["postsPerMin"] == 30
+    assert snapshot["windows"]["1m"]["branchesPerMin"] == 10
+    assert snapshot["windows"]["1m"]["fabricationShare"] == 0.5
+    assert snapshot["windows"]["15m"]["posts"] == 30
+
+    later = tracker.snapshot("inc", now=start + 600)
+    assert later["windows"]["1m"]["posts"] == 0
+    assert later["windows"]["1m"]["fabricationShare"] is None
+    assert later["windows"]["15m"]["posts"] == 30
+    assert tracker.snapshot("inc", now=start + 4000)["windows"]["1h"]["posts"] == 0
+
+
+def test_alert_fires_once_per_crossing_and_rearms():
+    tracker = VelocityTracker()
+    start = 2_000_000.0
+    alerts = []
+    for i in range(40):
+        alerts += tracker.record_post("inc", is_branch=False, now=start + i * 0.5)
+    assert [a["metric"] for a in alerts] == ["postsPerMin"]
+
+    # Quiet period drops the rate below the re-arm level, then a new burst
+    for i in range(40):
+        alerts += tracker.record_post("inc", is_branch=False, now=start + 300 + i * 0.5)
+    assert len(alerts) == 2
+
+
+def test_tracked_incidents_are_bounded():
+    tracker = VelocityTracker(max_incidents=3)
+    for i in range(10):
+        tracker.record_post(f"inc{i}", is_branch=False, now=1.0)
+    assert len(tracker._incidents) == 3
+    assert tracker.snapshot("inc0", now=1.0)["windows"]["1m"]["posts"] == 0
@@ -9,8 +9,10 @@ import ReactFlow, {
     type NodeTypes,
 } from 'reactflow';
 import 'reactflow/dist/style.css';
+import { useQuery } from '@tanstack/react-query';
 import { PostNode } from './PostNode';
-import { getLayoutedElements } from '../../lib/treeUtils';
+import { fetchIncidentLayout } from '../../lib/api';
+import { getLayoutedElements, getPositionedElements } from '../../lib/treeUtils';
 import { DiffPanel } from './DiffPanel';
 import type { Post } from '../../types';
 
@@ -28,17 +30,31 @@ export function TreeVisualization({ posts, isLoading }: TreeVisualizationProps)
     const [edges, setEdges, onEdgesChange] = useEdgesState([]);
     const [selectedPostId, setSelectedPostId] = useState<string | null>(null);
 
-    // Recalculate layout when posts change
+    // Node positions are computed (incrementally) by the backend; refetched
+    // when the post count changes
+    const incidentId = posts[0]?.incidentId;
+    const { data: layout, isError: layoutFailed } = useQuery({
+        queryKey: ['layout', incidentId, posts.length],
+        queryFn: () => fetchIncidentLayout(incidentId!),
+        enabled: !!incidentId,
+        placeholderData: (previous) => previous,
+    });
+
     useEffect(() => {
         if (posts.length === 0) {
             setNodes([]);
             setEdges([]);
             return;
         }
-        const { nodes: layoutedNodes, edges: layoutedEdges } = getLayoutedElements(posts);
+        if (!layout && !layoutFailed) {
+            return;
+        }
+        const { nodes: layoutedNodes, edges: layoutedEdges } = layout
+            ? getPositionedElements(posts, layout)
+            : getLayoutedElements(posts);
         setNodes(layoutedNodes);
         setEdges(layoutedEdges);
-    }, [posts]);
+    }, [posts, layout, layoutFailed]);
 
     const onNodeClick = useCallback((_: React.MouseEvent, node: Node) => {
         setSelectedPostId(node.id);
@@ -1,4 +1,5 @@
-import { useState, useEffect } from 'react';
+import { useMemo } from 'react';
+import { useDashboard } from './useDashboard';
 
 export interface AgentLogEntry {
     id: string;
@@ -9,34 +10,18 @@ export interface AgentLogEntry {
 }
 
 export function useAgentActivity() {
-    const [logs, setLogs] = useState<AgentLogEntry[]>([]);
+    // Logs arrive with the dashboard snapshot (only entries after our cursor)
+    const { data: rawLogs = [] } = useDashboard((snapshot) => snapshot.logs);
 
-    useEffect(() => {
-        const fetchLogs = async () => {
-            try {
-                const response = await fetch('http://localhost:8000/api/agent/logs');
-                if (response.ok) {
-                    const data = await response.json();
-                    // Parse timestamp strings into Date objects
-                    const parsedData = data.map((log: any) => ({
-                        ...log,
-                        timestamp: new Date(log.timestamp)
-                    }));
-                    setLogs(parsedData);
-                }
-            } catch (error) {
-                console.error("Failed to fetch agent logs:", error);
-            }
-        };
-
-        // Initial fetch
-        fetchLogs();
-
-        // Poll every 2 seconds
-        const interval = setInterval(fetchLogs, 2000);
-
-        return () => clearInterval(interval);
-    }, []);
+    const logs = useMemo<AgentLogEntry[]>(
+        () => rawLogs.map((log) => ({
+            ...log,
+            agent: log.agent as AgentLogEntry['agent'],
+            // Parse timestamp strings into Date objects
+            timestamp: new Date(log.timestamp),
+        })),
+        [rawLogs]
+    );
 
     return { logs };
 }
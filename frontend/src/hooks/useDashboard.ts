@@ -0,0 +1,37 @@
+import { useQuery, useQueryClient } from '@tanstack/react-query';
+import { fetchDashboard } from '../lib/api';
+import type { DashboardSnapshot } from '../types';
+
+const MAX_LOGS = 50;
+
+export const EMPTY_DASHBOARD: DashboardSnapshot = {
+    version: '',
+    demo: { speed: 1, isPaused: false, progress: 0 },
+    incidents: [],
+    agentRunning: false,
+    logs: [],
+    cursor: 0,
+};
+
+// One poll of /api/dashboard shared by every component (same query key);
+// each picks its slice with `select`. The request carries the version and log
+// cursor already held, so an unchanged dashboard costs the server nothing.
+export function useDashboard<T = DashboardSnapshot>(select?: (snapshot: DashboardSnapshot) => T) {
+    const queryClient = useQueryClient();
+
+    return useQuery<DashboardSnapshot, Error, T>({
+        queryKey: ['dashboard'],
+        queryFn: async () => {
+            const previous = queryClient.getQueryData<DashboardSnapshot>(['dashboard']);
+            const snapshot = await fetchDashboard(previous?.version, previous?.cursor ?? 0);
+            if ('unchanged' in snapshot) {
+                return previous ?? EMPTY_DASHBOARD;
+            }
+            // A cursor going backwards means the server restarted: start over
+            const kept = previous && snapshot.cursor >= previous.cursor ? previous.logs : [];
+            return { ...snapshot, logs: [...snapshot.logs, ...kept].slice(0, MAX_LOGS) };
+        },
+        refetchInterval: 2000,
+        select,
+    });
+}
@@ -1,49 +1,43 @@
-import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
-import { fetchDemoState, updateDemoSpeed, pauseDemo, resumeDemo, resetDemo } from '../lib/api';
-import type { DemoState } from '../types';
+import { useMutation, useQueryClient } from '@tanstack/react-query';
+import { updateDemoSpeed, pauseDemo, resumeDemo, resetDemo } from '../lib/api';
+import { EMPTY_DASHBOARD, useDashboard } from './useDashboard';
 
 export function useDemoControls() {
     const queryClient = useQueryClient();
 
-    // Poll demo state every 2 seconds
-    const { data: demoState } = useQuery<DemoState>({
-        queryKey: ['demoState'],
-        queryFn: fetchDemoState,
-        refetchInterval: 2000,
-        initialData: { speed: 1, isPaused: false, progress: 0 },
-    });
+    // Demo state comes with the shared dashboard poll
+    const { data: demoState = EMPTY_DASHBOARD.demo } = useDashboard((snapshot) => snapshot.demo);
 
     const speedMutation = useMutation({
         mutationFn: updateDemoSpeed,
         onSuccess: () => {
-            queryClient.invalidateQueries({ queryKey: ['demoState'] });
+            queryClient.invalidateQueries({ queryKey: ['dashboard'] });
         },
     });
 
     const pauseMutation = useMutation({
         mutationFn: pauseDemo,
         onSuccess: () => {
-            queryClient.invalidateQueries({ queryKey: ['demoState'] });
+            queryClient.invalidateQueries({ queryKey: ['dashboard'] });
         },
     });
 
     const resumeMutation = useMutation({
         mutationFn: resumeDemo,
         onSuccess: () => {
-            queryClient.invalidateQueries({ queryKey: ['demoState'] });
+            queryClient.invalidateQueries({ queryKey: ['dashboard'] });
         },
     });
 
     const resetMutation = useMutation({
         mutationFn: resetDemo,
         onSuccess: () => {
-            queryClient.invalidateQueries({ queryKey: ['demoState'] });
-            queryClient.invalidateQueries({ queryKey: ['incidents'] });
+            queryClient.invalidateQueries({ queryKey: ['dashboard'] });
         },
     });
 
     return {
-        demoState: demoState!,
+        demoState,
         updateSpeed: speedMutation.mutate,
         pause: pauseMutation.mutate,
         resume: resumeMutation.mutate,
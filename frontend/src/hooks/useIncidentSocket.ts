@@ -1,14 +1,10 @@
 import { useQuery } from '@tanstack/react-query';
-import { fetchPostsByIncident, fetchDemoState } from '../lib/api';
+import { fetchPostsByIncident } from '../lib/api';
+import { useDashboard } from './useDashboard';
 
 export function useIncidentSocket(incidentId: string | null) {
     // Get demo state to check if paused
-    const { data: demoState } = useQuery({
-        queryKey: ['demoState'],
-        queryFn: fetchDemoState,
-        refetchInterval: 2000,
-        initialData: { speed: 1, isPaused: false, progress: 0 },
-    });
+    const { data: demoState } = useDashboard((snapshot) => snapshot.demo);
 
     // Use polling instead of WebSocket for reliability
     const { data: posts = [], isLoading } = useQuery({
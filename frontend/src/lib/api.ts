@@ -1,4 +1,4 @@
-import type { Incident } from "../types";
+import type { DashboardSnapshot, Incident, TreeLayout } from "../types";
 
 const API_BASE_URL = "http://localhost:8000/api";
 
@@ -26,6 +26,23 @@ export async function fetchPostsByIncident(incidentId: string): Promise<any[]> {
     return response.json();
 }
 
+// Server-computed tree positions; new posts are appended without moving
+// existing nodes. Pass a viewport to fetch only part of a large tree.
+export async function fetchIncidentLayout(
+    incidentId: string,
+    viewport?: { x0: number; y0: number; x1: number; y1: number }
+): Promise<TreeLayout> {
+    const params = new URLSearchParams();
+    if (viewport) {
+        Object.entries(viewport).forEach(([key, value]) => params.set(key, String(value)));
+    }
+    const response = await fetch(`${API_BASE_URL}/incidents/${incidentId}/layout?${params}`);
+    if (!response.ok) {
+        throw new Error("Failed to fetch tree layout");
+    }
+    return response.json();
+}
+
 export async function fetchPostDiff(postId: string): Promise<any> {
     const response = await fetch(`${API_BASE_URL}/posts/${postId}/diff`);
     if (!response.ok) {
@@ -66,6 +83,23 @@ export async function createComment(postId: string, author: string, content: str
     return response.json();
 }
 
+// Demo state, incidents and agent logs after `cursor` in one request; when
+// `version` is still current the server answers { unchanged: true }
+export async function fetchDashboard(
+    version: string | undefined,
+    cursor: number
+): Promise<DashboardSnapshot | { version: string; unchanged: true; cursor: number }> {
+    const params = new URLSearchParams({ cursor: String(cursor) });
+    if (version) {
+        params.set("version", version);
+    }
+    const response = await fetch(`${API_BASE_URL}/dashboard?${params}`);
+    if (!response.ok) {
+        throw new Error("Failed to fetch dashboard");
+    }
+    return response.json();
+}
+
 // Demo Control API
 export async function fetchDemoState(): Promise<any> {
     const response = await fetch(`${API_BASE_URL}/demo/state`);
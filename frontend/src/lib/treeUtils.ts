@@ -1,10 +1,60 @@
 import dagre from 'dagre';
 import { type Node, type Edge, Position } from 'reactflow';
-import type { Post } from '../types';
+import type { Post, TreeLayout } from '../types';
 
 const nodeWidth = 300;
 const nodeHeight = 150;
 
+const edgeColor = (post: Post) => {
+    if (post.mutationScore && post.mutationScore >= 40) return '#ef4444'; // Red (>= 40)
+    if (post.mutationScore && post.mutationScore >= 10) return '#eab308'; // Yellow (10-40)
+    return '#22c55e'; // Green (< 10)
+};
+
+const borderColorFor = (post: Post) => {
+    if (post.mutationScore && post.mutationScore >= 40) return 'border-red-500';
+    if (post.mutationScore && post.mutationScore >= 10) return 'border-yellow-500';
+    if (post.mutationScore !== null) return 'border-green-500';
+    return 'border-slate-700';
+};
+
+const toEdge = (post: Post): Edge => ({
+    id: `${post.parentId}-${post.id}`,
+    source: post.parentId!,
+    target: post.id,
+    type: 'smoothstep',
+    style: { stroke: edgeColor(post), strokeWidth: 2 },
+    animated: true,
+});
+
+const toNode = (post: Post, x: number, y: number): Node => ({
+    id: post.id,
+    type: 'postNode',
+    targetPosition: Position.Top,
+    sourcePosition: Position.Bottom,
+    position: { x, y },
+    data: {
+        post,
+        borderColor: borderColorFor(post),
+    },
+});
+
+// Positions from the backend layout (GET /api/incidents/{id}/layout); posts
+// the layout doesn't have yet are left out until the next fetch
+export const getPositionedElements = (posts: Post[], layout: TreeLayout) => {
+    const positions = new Map(layout.nodes.map((node) => [node.id, node]));
+    const placed = posts.filter((post) => positions.has(post.id));
+    const nodes = placed.map((post) => {
+        const position = positions.get(post.id)!;
+        return toNode(post, position.x, position.y);
+    });
+    const edges = placed.filter((post) => post.parentId && positions.has(post.parentId)).map(toEdge);
+    return { nodes, edges };
+};
+
+// Client-side dagre layout of the whole list; fallback when the backend
+// layout is unavailable
+
 export const getLayoutedElements = (posts: Post[], direction = 'TB') => {
     const dagreGraph = new dagre.graphlib.Graph();
     dagreGraph.setDefaultEdgeLabel(() => ({}));
@@ -20,23 +70,7 @@ export const getLayoutedElements = (posts: Post[], direction = 'TB') => {
     const edges: Edge[] = [];
     posts.forEach((post) => {
         if (post.parentId) {
-            // Determine edge color based on mutation score
-            let strokeColor = '#22c55e'; // Green (< 10)
-            if (post.mutationScore && post.mutationScore >= 40) {
-                strokeColor = '#ef4444'; // Red (>= 40)
-            } else if (post.mutationScore && post.mutationScore >= 10) {
-                strokeColor = '#eab308'; // Yellow (10-40)
-            }
-
-            edges.push({
-                id: `${post.parentId}-${post.id}`,
-                source: post.parentId,
-                target: post.id,
-                type: 'smoothstep',
-                style: { stroke: strokeColor, strokeWidth: 2 },
-                animated: true,
-            });
-
+            edges.push(toEdge(post));
             dagreGraph.setEdge(post.parentId, post.id);
         }
     });
@@ -45,28 +79,7 @@ export const getLayoutedElements = (posts: Post[], direction = 'TB') => {
 
     const nodes: Node[] = posts.map((post) => {
         const nodeWithPosition = dagreGraph.node(post.id);
-
-        // Determine border color based on mutation/truth
-        // This logic can be refined or moved to the node component
-        let borderColor = 'border-slate-700';
-        if (post.mutationScore && post.mutationScore >= 40) borderColor = 'border-red-500';
-        else if (post.mutationScore && post.mutationScore >= 10) borderColor = 'border-yellow-500';
-        else if (post.mutationScore !== null) borderColor = 'border-green-500';
-
-        return {
-            id: post.id,
-            type: 'postNode',
-            targetPosition: Position.Top,
-            sourcePosition: Position.Bottom,
-            position: {
-                x: nodeWithPosition.x - nodeWidth / 2,
-                y: nodeWithPosition.y - nodeHeight / 2,
-            },
-            data: {
-                post,
-                borderColor
-            },
-        };
+        return toNode(post, nodeWithPosition.x - nodeWidth / 2, nodeWithPosition.y - nodeHeight / 2);
     });
 
     return { nodes, edges };
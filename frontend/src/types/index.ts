@@ -42,3 +42,31 @@ export interface DemoState {
     isPaused: boolean;
     progress: number;
 }
+
+export interface AgentLog {
+    seq: number;
+    id: string;
+    agent: string;
+    action: string;
+    details: string;
+    timestamp: string;
+}
+
+export interface DashboardSnapshot {
+    version: string;
+    demo: DemoState;
+    incidents: Incident[];
+    agentRunning: boolean;
+    logs: AgentLog[];
+    cursor: number;
+}
+
+export interface TreeLayout {
+    incidentId: string;
+    nodeWidth: number;
+    nodeHeight: number;
+    size: number;
+    bounds: { width: number; height: number };
+    nodes: { id: string; x: number; y: number; depth: number; parentId: string | null }[];
+    edges: { id: string; source: string; target: string }[];
+}